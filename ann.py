@@ -0,0 +1,160 @@
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from codi.constants import CODI_ANN, CODI_ANN_MIN_FILES
+
+
+# ============================================================
+# IVF Approximate Nearest-Neighbour Index
+# ============================================================
+#
+# Vectors are L2-normalised, so inner product == cosine. A spherical
+# k-means coarse quantizer splits rows into `nlist` inverted lists; a
+# query probes the `nprobe` closest lists and ranks only their rows
+# exactly against the (memory-mapped) embeddings matrix.
+
+ANN_FILE = "ann.npz"
+
+
+class IVFIndex:
+    def __init__(self, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray, digest: str = ""):
+        self.centroids = centroids      # (nlist, dim) float32, normalised
+        self.order = order              # row ids grouped by list
+        self.offsets = offsets          # list i = order[offsets[i]:offsets[i + 1]]
+        self.digest = digest            # embeddings row-order digest at build time
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    # --------------------------------------------------------
+    # Build
+    # --------------------------------------------------------
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: Optional[int] = None, iterations: int = 10,
+              sample_per_list: int = 40, seed: int = 0, digest: str = "") -> "IVFIndex":
+        n = vectors.shape[0]
+        nlist = nlist or max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n) if n else 1
+        rng = np.random.default_rng(seed)
+
+        # Train on a sample — quality barely changes, build time does
+        sample_size = min(n, nlist * sample_per_list)
+        sample = np.asarray(vectors[np.sort(rng.choice(n, sample_size, replace=False))], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist)
+
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            centroids = (sums / norms).astype(np.float32)
+
+        assign = assign_lists(vectors, centroids)
+        order = np.argsort(assign, kind="stable").astype(np.int64)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assign, minlength=nlist))
+
+        return cls(centroids, order, offsets, digest)
+
+    # --------------------------------------------------------
+    # Search
+    # --------------------------------------------------------
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, k: int, nprobe: int = 8) -> np.ndarray:
+        """Row ids of the (approximate) top-k rows by cosine, best first."""
+        nprobe = min(max(nprobe, 1), self.nlist)
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        candidates = np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in probe])
+        if candidates.size == 0:
+            return candidates
+
+        candidates.sort()   # sequential reads from the memory-mapped matrix
+        scores = np.asarray(vectors[candidates], dtype=np.float32) @ query
+        return candidates[top_k(scores, k)]
+
+    # --------------------------------------------------------
+    # Storage
+    # --------------------------------------------------------
+
+    def save(self, path: Path):
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(f, centroids=self.centroids, order=self.order,
+                     offsets=self.offsets, digest=np.array(self.digest))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IVFIndex"]:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                return cls(data["centroids"], data["order"], data["offsets"], str(data["digest"]))
+        except Exception:
+            return None
+
+
+# ============================================================
+# Index Lifecycle (.codi/ann.npz)
+# ============================================================
+
+def ann_enabled(rows: int) -> bool:
+    if CODI_ANN == "off":
+        return False
+    return CODI_ANN == "on" or rows >= CODI_ANN_MIN_FILES
+
+
+def build_ann_index(codi_dir: Path, vectors: np.ndarray, digest: str):
+    """Build + save the IVF index during `codi init` (or drop a stale one)."""
+    path = codi_dir / ANN_FILE
+    if not vectors.shape[0] or not ann_enabled(vectors.shape[0]):
+        path.unlink(missing_ok=True)
+        return
+    IVFIndex.build(vectors, digest=digest).save(path)
+
+
+def load_ann_index(codi_dir: Path, digest: str) -> Optional[IVFIndex]:
+    """The saved IVF index, or None if disabled / missing / built for other rows."""
+    if CODI_ANN == "off":
+        return None
+    index = IVFIndex.load(codi_dir / ANN_FILE)
+    if index is None or index.digest != digest:
+        return None
+    return index
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 16384) -> np.ndarray:
+    """Nearest centroid per row, chunked to bound memory."""
+    assign = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], chunk):
+        block = np.asarray(vectors[start:start + chunk], dtype=np.float32)
+        assign[start:start + chunk] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, sorted descending (partial selection)."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def exact_search(vectors: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force reference: row ids of the true top-k."""
+    return top_k(np.asarray(vectors, dtype=np.float32) @ query, k)
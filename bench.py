@@ -0,0 +1,1411 @@
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import typer
+
+
+# ============================================================
+# CODI Benchmarks
+#   python -m codi.logic.bench <benchmark> [options]
+# ============================================================
+
+app = typer.Typer(help="CODI performance benchmarks")
+
+
+@app.callback()
+def main():
+    """Each command prints a human summary followed by a JSON result."""
+
+
+# ============================================================
+# Startup
+# ============================================================
+
+# Runs one CLI command in a fresh interpreter, then reports whether torch
+# (or sentence_transformers) got imported along the way.
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from codi.cli import app
+try:
+    app(args={args!r}, standalone_mode=False)
+except SystemExit:
+    pass
+print(json.dumps({{
+    "in_process": time.perf_counter() - start,
+    "torch": "torch" in sys.modules,
+    "sentence_transformers": "sentence_transformers" in sys.modules,
+}}))
+"""
+
+STARTUP_COMMANDS = [["version"], ["task", "--list"]]
+
+
+@app.command()
+def startup(
+    budget: float = typer.Option(1.5, help="Max wall seconds per command (incl. interpreter start)"),
+    runs: int = typer.Option(3, help="Runs per command; the best one is reported"),
+):
+    """Assert `codi version` / `codi task --list` start fast without importing torch."""
+
+    results = {}
+    for args in STARTUP_COMMANDS:
+        name = " ".join(args)
+        best = None
+
+        for _ in range(runs):
+            start = time.perf_counter()
+            out = subprocess.run(
+                [sys.executable, "-c", STARTUP_PROBE.format(args=args)],
+                capture_output=True, text=True, check=True,
+            )
+            wall = time.perf_counter() - start
+            probe = json.loads(out.stdout.strip().splitlines()[-1])
+            probe["wall"] = wall
+            if best is None or wall < best["wall"]:
+                best = probe
+
+        results[name] = best
+        typer.echo(f"⏱  codi {name}: {best['wall']:.3f}s wall, "
+                   f"torch imported: {best['torch']}")
+
+    typer.echo(json.dumps(results, indent=2))
+
+    for name, probe in results.items():
+        assert not probe["torch"], f"`codi {name}` imported torch"
+        assert not probe["sentence_transformers"], f"`codi {name}` imported sentence_transformers"
+        assert probe["wall"] <= budget, f"`codi {name}` took {probe['wall']:.3f}s > {budget}s"
+
+
+# ============================================================
+# ANN vs exact retrieval
+# ============================================================
+
+def synthetic_vectors(n: int, dim: int, clusters: int, seed: int = 0):
+    """Clustered, L2-normalised float32 vectors (a rough stand-in for code embeddings)."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+@app.command()
+def ann(
+    size: int = typer.Option(100_000, help="Corpus vectors"),
+    dim: int = typer.Option(384, help="Vector dimension (MiniLM = 384)"),
+    queries: int = typer.Option(100, help="Queries to average over"),
+    k: int = typer.Option(10, help="Recall@k"),
+    nprobes: str = typer.Option("1,4,8,16,32", help="Comma-separated nprobe values"),
+):
+    """Recall@k and per-query latency: exact brute force vs the IVF index."""
+    import numpy as np
+    from codi.logic.ann import IVFIndex, exact_search
+
+    vectors = synthetic_vectors(size, dim, clusters=max(size // 500, 1))
+    rng = np.random.default_rng(1)
+    picks = vectors[rng.integers(0, size, queries)]
+    query_set = picks + 0.3 * rng.standard_normal(picks.shape).astype(np.float32)
+    query_set /= np.linalg.norm(query_set, axis=1, keepdims=True)
+
+    start = time.perf_counter()
+    exact = [exact_search(vectors, q, k) for q in query_set]
+    exact_ms = (time.perf_counter() - start) * 1000 / queries
+
+    start = time.perf_counter()
+    index = IVFIndex.build(vectors)
+    build_s = time.perf_counter() - start
+
+    results = {
+        "size": size, "dim": dim, "k": k, "nlist": index.nlist,
+        "build_s": build_s,
+        "exact": {"ms_per_query": exact_ms, "recall": 1.0},
+        "ivf": [],
+    }
+    typer.echo(f"🎯 exact: {exact_ms:.2f} ms/query  (IVF build {build_s:.2f}s, nlist={index.nlist})")
+
+    for nprobe in [int(p) for p in nprobes.split(",")]:
+        start = time.perf_counter()
+        found = [index.search(vectors, q, k, nprobe) for q in query_set]
+        ms = (time.perf_counter() - start) * 1000 / queries
+        recall = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(found, exact)]))
+        results["ivf"].append({"nprobe": nprobe, "ms_per_query": ms, "recall": recall})
+        typer.echo(f"⚡ ivf nprobe={nprobe:<3} {ms:.2f} ms/query  recall@{k}={recall:.3f}")
+
+    typer.echo(json.dumps(results, indent=2))
+
+
+# ============================================================
+# File relationships: inverted index vs pairwise loop
+# ============================================================
+
+def synthetic_keyword_entries(n: int, topic_size: int = 50, per_file: int = 8, seed: int = 0):
+    """
+    Index-like entries: each file takes most keywords from its topic (~topic_size
+    files share a topic) plus a couple from a global vocabulary.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    topics = max(n // topic_size, 1)
+    entries = []
+    for i in range(n):
+        topic = rng.integers(topics)
+        local = [f"t{topic}-kw{k}" for k in rng.integers(0, 30, per_file - 2)]
+        common = [f"kw{k}" for k in rng.integers(0, 20000, 2)]
+        entries.append({
+            "path": f"src/mod{i:06d}.py",
+            "keywords": local + common,
+            "related_files": [],
+        })
+    return entries
+
+
+def pairwise_relationships(files_data):
+    """The original O(n²) builder, kept as the reference implementation."""
+    for file in files_data:
+        file["related_files"] = []
+        for other in files_data:
+            if file["path"] == other["path"]:
+                continue
+            if len(set(file["keywords"]) & set(other["keywords"])) >= 2:
+                file["related_files"].append(other["path"])
+
+
+@app.command()
+def relationships(
+    sizes: str = typer.Option("1000,10000,50000", help="Comma-separated corpus sizes"),
+    pairwise_max: int = typer.Option(2000, help="Largest size to also run the O(n²) loop on"),
+    changed: int = typer.Option(10, help="Files changed for the incremental update"),
+):
+    """Scaling of create_file_relationships, full vs incremental vs pairwise."""
+    import copy
+    from codi.logic.file_indexer import create_file_relationships, update_file_relationships
+
+    results = []
+    for n in [int(x) for x in sizes.split(",")]:
+        entries = synthetic_keyword_entries(n)
+
+        start = time.perf_counter()
+        keyword_index = create_file_relationships(entries)
+        full_s = time.perf_counter() - start
+
+        # Incremental: re-key `changed` files and patch relationships
+        previous = {e["path"]: copy.deepcopy(e) for e in entries[:changed]}
+        for i, entry in enumerate(entries[:changed]):
+            entry["keywords"] = synthetic_keyword_entries(1, seed=n + i)[0]["keywords"]
+        start = time.perf_counter()
+        update_file_relationships(entries, keyword_index, previous, set(previous))
+        incremental_s = time.perf_counter() - start
+
+        row = {"files": n, "full_s": full_s, "incremental_s": incremental_s}
+
+        if n <= pairwise_max:
+            reference = copy.deepcopy(entries)
+            start = time.perf_counter()
+            pairwise_relationships(reference)
+            row["pairwise_s"] = time.perf_counter() - start
+            assert [e["related_files"] for e in reference] == [e["related_files"] for e in entries], \
+                "inverted-index relationships differ from the pairwise reference"
+
+        results.append(row)
+        pairwise = f"  pairwise {row['pairwise_s']:.3f}s" if "pairwise_s" in row else ""
+        typer.echo(f"🔗 {n:>6} files: full {full_s:.3f}s  incremental({changed}) "
+                   f"{incremental_s:.4f}s{pairwise}")
+
+    typer.echo(json.dumps(results, indent=2))
+
+
+# ============================================================
+# Index storage: legacy index.json vs index.jsonl store
+# ============================================================
+
+def synthetic_index_entries(n: int, seed: int = 0):
+    """Entries shaped like real index rows, with a full `semantic` object."""
+    import random
+
+    rng = random.Random(seed)
+    words = [f"term{i}" for i in range(5000)]
+    fields = ["keywords", "capabilities", "side_effects", "inputs", "outputs",
+              "risks", "patterns", "data_entities", "external_dependencies"]
+    entries = []
+    for i in range(n):
+        semantic = {field: rng.sample(words, 6) for field in fields}
+        entries.append({
+            "path": f"src/pkg{i % 97}/module{i:06d}.py",
+            "semantic": semantic,
+            "keywords": semantic["keywords"],
+            "functions": [f"fn_{i}_{j}" for j in range(rng.randint(1, 12))],
+            "related_files": [f"src/pkg{i % 97}/module{rng.randrange(n):06d}.py" for _ in range(5)],
+        })
+    entries.sort(key=lambda e: e["path"])
+    return entries
+
+
+# Runs in a fresh interpreter so peak RSS belongs to one load strategy only.
+STORE_PROBE = """
+import json, resource, sys, time
+from pathlib import Path
+from codi.logic.index_store import IndexReader
+codi_dir, mode = Path(sys.argv[1]), sys.argv[2]
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if mode == "legacy":
+    rows = len(json.load((codi_dir / "index.json").open()))
+elif mode == "store":
+    rows = len(IndexReader.open(codi_dir).load_all())
+else:
+    reader = IndexReader.open(codi_dir)
+    rows = sum(1 for path in reader.paths[::max(len(reader) // 100, 1)] if reader.get(path))
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"rows": rows, "seconds": elapsed, "peak_rss_mb": peak / 1024,
+                  "delta_rss_mb": (peak - base) / 1024}))
+"""
+
+
+@app.command()
+def store(
+    size: int = typer.Option(20_000, help="Index entries"),
+):
+    """Load time + peak RSS of legacy index.json vs the index.jsonl store."""
+    import tempfile
+    from pathlib import Path
+    from codi.logic.index_store import write_index
+
+    entries = synthetic_index_entries(size)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        codi_dir = Path(tmp)
+
+        start = time.perf_counter()
+        with (codi_dir / "index.json").open("w") as f:
+            json.dump(entries, f, indent=2)
+        legacy_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        write_index(codi_dir, entries, export_json=True)
+        store_write = time.perf_counter() - start
+
+        results = {
+            "entries": size,
+            "legacy": {"bytes": (codi_dir / "index.json").stat().st_size, "write_s": legacy_write},
+            "store": {"bytes": (codi_dir / "index.jsonl").stat().st_size, "write_s": store_write},
+        }
+
+        for mode in ("legacy", "store", "random"):
+            out = subprocess.run([sys.executable, "-c", STORE_PROBE, str(codi_dir), mode],
+                                 capture_output=True, text=True, check=True)
+            probe = json.loads(out.stdout)
+            results.setdefault(mode, {}).update(probe)
+            typer.echo(f"📦 {mode:<7} {probe['rows']:>7} rows  {probe['seconds']:.3f}s  "
+                       f"+{probe['delta_rss_mb']:.1f} MB RSS")
+
+    typer.echo(json.dumps(results, indent=2))
+
+
+# ============================================================
+# Symbol extraction: single pass vs the original six regexes
+# ============================================================
+
+LEGACY_FUNCTION_PATTERNS = [
+    r"\bfunction\s+([a-zA-Z_][a-zA-Z0-9_]*)",
+    r"([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*\([^)]*\)\s*=>",
+    r"\bexport function\s+([a-zA-Z_][a-zA-Z0-9_]*)",
+    r"\bclass\s+([A-Za-z_][A-Za-z0-9_]*)",
+    r"\bdef\s+([a-zA-Z_][a-zA-Z0-9_]*)",
+    r"(?:public|private|protected)\s+[a-zA-Z<>]+\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\("
+]
+
+
+def legacy_extract_functions(content: str):
+    """The original extract_functions, kept as the reference implementation."""
+    import re
+
+    extracted = set()
+    for pattern in LEGACY_FUNCTION_PATTERNS:
+        for match in re.findall(pattern, content):
+            extracted.add(match if isinstance(match, str) else match[-1])
+    return extracted
+
+
+def synthetic_minified_js(size_mb: float, adversarial: int) -> str:
+    """One long line of bundler-style JS, plus `adversarial` unclosed `v=(` calls."""
+    parts, total, i = [], 0, 0
+    while total < size_mb * 1e6:
+        part = (f"function f{i}(a,b){{return a+b}};var g{i}=(x,y)=>x*y;"
+                f"class C{i}{{m(){{return g{i}(1,2)}}}};h{i}=u(t,{i});")
+        parts.append(part)
+        total += len(part)
+        i += 1
+    return "".join(parts) + "v=(" * adversarial
+
+
+def synthetic_python(lines: int) -> str:
+    parts, count, i = [], 0, 0
+    while count < lines:
+        parts.append(f"class Model{i}:\n"
+                     f"    def load_{i}(self, path):\n"
+                     f"        return open(path).read()\n\n"
+                     f"    async def save_{i}(self, data):\n"
+                     f"        pass\n\n\n"
+                     f"def helper_{i}(x, y=(1, 2)):\n"
+                     f"    return [v for v in x if v]\n\n\n")
+        count += 12
+        i += 1
+    return "".join(parts)
+
+
+@app.command()
+def symbols(
+    js_mb: float = typer.Option(2.0, help="Size of the minified JS file"),
+    adversarial: int = typer.Option(10_000, help="Unclosed `v=(` calls appended to the JS"),
+    py_lines: int = typer.Option(50_000, help="Lines in the generated Python file"),
+):
+    """symbols.extract_symbols vs the six-regex extractor on minified JS and a large .py."""
+    from codi.logic.symbols import extract_symbols, symbol_names
+
+    cases = [
+        ("minified.js", ".js", synthetic_minified_js(js_mb, 0)),
+        ("adversarial.js", ".js", synthetic_minified_js(js_mb, adversarial)),
+        ("large.py", ".py", synthetic_python(py_lines)),
+    ]
+
+    results = []
+    for name, suffix, content in cases:
+        start = time.perf_counter()
+        found = extract_symbols(content, suffix)
+        new_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        legacy = legacy_extract_functions(content)
+        legacy_s = time.perf_counter() - start
+
+        missing = legacy - set(symbol_names(found)) - {"v"}
+        results.append({
+            "file": name, "bytes": len(content), "symbols": len(found),
+            "single_pass_s": new_s, "legacy_s": legacy_s, "missed_vs_legacy": len(missing),
+        })
+        typer.echo(f"🔎 {name:<15} {len(content) / 1e6:6.2f} MB  {len(found):>7} symbols  "
+                   f"single-pass {new_s:.3f}s ({len(content) / 1e6 / max(new_s, 1e-9):.1f} MB/s)  "
+                   f"legacy {legacy_s:.3f}s")
+
+    typer.echo(json.dumps(results, indent=2))
+
+
+# ============================================================
+# codi serve: warm query latency
+# ============================================================
+
+@app.command()
+def daemon(
+    size: int = typer.Option(10_000, help="Index entries"),
+    queries: int = typer.Option(200, help="Queries to time"),
+    dim: int = typer.Option(384, help="Embedding dimension (MiniLM = 384)"),
+):
+    """p50 / p95 /query latency against a warm `codi serve` on a synthetic index."""
+    import os
+    import random
+    import tempfile
+    import threading
+    from pathlib import Path
+    from codi.logic.daemon import CodiDaemon, daemon_request
+    from codi.logic.embeddings import save_embeddings
+    from codi.logic.index_store import write_index
+
+    entries = synthetic_index_entries(size)
+    vectors = synthetic_vectors(size, dim, clusters=64)
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)           # task_processor resolves .codi relative to the project root
+        try:
+            codi_dir = Path(".codi")
+            codi_dir.mkdir()
+            write_index(codi_dir, entries)
+            save_embeddings(codi_dir, entries, vectors)
+
+            server = CodiDaemon(codi_dir, "127.0.0.1", 0)
+            start = time.perf_counter()
+            server.warm_up()
+            warm_s = time.perf_counter() - start
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+            rng = random.Random(0)
+            words = [f"term{i}" for i in range(5000)]
+            latencies = []
+            for _ in range(queries):
+                payload = {"keywords": rng.sample(words, 4), "limit": 10}
+                start = time.perf_counter()
+                daemon_request(server.url, "/query", payload)
+                latencies.append(time.perf_counter() - start)
+
+            server.server.shutdown()
+        finally:
+            os.chdir(cwd)
+
+    latencies.sort()
+    results = {
+        "files": size,
+        "warm_up_s": warm_s,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+    typer.echo(f"⚡ {size} files: warm-up {warm_s:.2f}s  p50 {results['p50_ms']:.1f} ms  "
+               f"p95 {results['p95_ms']:.1f} ms")
+    typer.echo(json.dumps(results, indent=2))
+
+
+# ============================================================
+# Scoring: vectorized engine vs per-file compute_score
+# ============================================================
+
+def reference_matches(task_keywords, index_data, similarities):
+    """The original loop: compute_score per file, then a stable full sort."""
+    from codi.logic.task_processor import compute_score
+
+    scored = []
+    for row, similarity in enumerate(similarities):
+        score = compute_score(task_keywords, index_data[row], float(similarity))
+        if score > 0:
+            scored.append((score, row))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [(index_data[row]["path"], score) for score, row in scored]
+
+
+@app.command()
+def scoring(
+    size: int = typer.Option(10_000, help="Index entries"),
+    queries: int = typer.Option(50, help="Random queries (each checked against the reference)"),
+    limit: int = typer.Option(10, help="Top-k for the partial-selection timing"),
+):
+    """Regression-check ScoringIndex against compute_score and time both."""
+    import random
+    import tempfile
+    from pathlib import Path
+    import numpy as np
+    from codi.logic.scoring import ScoringIndex, build_scoring_index, load_scoring_index
+    from codi.logic.task_processor import build_matches
+
+    entries = synthetic_index_entries(size)
+    rng = random.Random(1)
+    for entry in rng.sample(entries, size // 50):      # files with nothing to score
+        entry["semantic"], entry["functions"] = {}, []
+
+    start = time.perf_counter()
+    engine = ScoringIndex.build(entries)
+    build_s = time.perf_counter() - start
+
+    # What `codi init` saves and every later query loads
+    with tempfile.TemporaryDirectory() as tmp:
+        build_scoring_index(Path(tmp), entries, "bench")
+        start = time.perf_counter()
+        engine = load_scoring_index(Path(tmp), entries, "bench")
+        load_s = time.perf_counter() - start
+    assert engine.digest == "bench", "saved scoring arrays were not reused"
+
+    rows = np.arange(size)
+    with_functions = [entry for entry in entries if entry["functions"]]
+    words = [f"term{i}" for i in range(5000)]
+    reference_s = full_s = top_s = 0.0
+
+    for q in range(queries):
+        keywords = [w.upper() if rng.random() < 0.3 else w for w in rng.sample(words, rng.randint(0, 6))]
+        if q % 3 == 0:      # a function name, matched case-insensitively
+            keywords.append(rng.choice(with_functions)["functions"][0].upper())
+        similarities = np.random.default_rng(q).uniform(-0.2, 0.9, size).astype(np.float32)
+        if q % 5 == 0:      # land exactly on rounding boundaries
+            similarities = (np.round(similarities, 3) + np.float32(0.001)).astype(np.float32)
+
+        start = time.perf_counter()
+        expected = reference_matches(keywords, entries, similarities)
+        reference_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        full = build_matches(keywords, entries, rows, similarities, {}, scoring=engine)
+        full_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        top = build_matches(keywords, entries, rows, similarities, {}, scoring=engine, limit=limit)
+        top_s += time.perf_counter() - start
+
+        got = [(m["file"], m["score"]) for m in full]
+        assert got == expected, f"query {q}: vectorized scores differ from compute_score"
+        assert got[:limit] == [(m["file"], m["score"]) for m in top], f"query {q}: top-{limit} differs"
+
+    results = {
+        "files": size,
+        "queries": queries,
+        "engine_build_s": build_s,
+        "engine_load_ms": load_s * 1000,
+        "reference_ms": reference_s / queries * 1000,
+        "vectorized_full_ms": full_s / queries * 1000,
+        f"vectorized_top{limit}_ms": top_s / queries * 1000,
+    }
+    typer.echo(f"🧮 {size} files, {queries} queries identical to compute_score  "
+               f"reference {results['reference_ms']:.1f} ms  full {results['vectorized_full_ms']:.1f} ms  "
+               f"top-{limit} {results[f'vectorized_top{limit}_ms']:.2f} ms  "
+               f"(build {build_s:.2f}s, load {load_s * 1000:.1f} ms)")
+    typer.echo(json.dumps(results, indent=2))
+
+
+
+# ============================================================
+# Embedding stage: throughput per batch size / threads, storage formats
+# ============================================================
+
+@app.command()
+def embeddings(
+    size: int = typer.Option(2_000, help="Files to encode"),
+    batch_sizes: str = typer.Option("1,16,64,128", help="Comma-separated encode batch sizes"),
+    threads: str = typer.Option("", help="Comma-separated torch thread counts (default: torch's own)"),
+    queries: int = typer.Option(200, help="Queries for the quantization ranking check"),
+    k: int = typer.Option(10, help="Top-k compared against float32"),
+):
+    """files/s per batch size and thread count; bytes/vector and ranking drift per storage dtype."""
+    import random
+    import numpy as np
+    from codi.logic.embeddings import (
+        STORAGE_DTYPES, encode, get_model, file_embedding_text, quantize, dequantize,
+    )
+
+    texts = [file_embedding_text(entry) for entry in synthetic_index_entries(size)]
+    get_model()                 # load outside the timings
+
+    thread_counts = [int(t) for t in threads.split(",") if t] or [0]
+    throughput = []
+    for count in thread_counts:
+        if count:
+            import torch
+            torch.set_num_threads(count)
+        for batch in (int(b) for b in batch_sizes.split(",")):
+            start = time.perf_counter()
+            vectors = encode(texts, batch_size=batch)
+            elapsed = time.perf_counter() - start
+            throughput.append({"threads": count or "default", "batch": batch, "files_per_s": size / elapsed})
+            typer.echo(f"🧠 threads {count or 'default':>7}  batch {batch:>4}  {size / elapsed:8.1f} files/s")
+
+    # Ranking drift: top-k of each stored format vs the float32 ranking
+    rng = random.Random(0)
+    words = [f"term{i}" for i in range(5000)]
+    query_vectors = encode([" ".join(rng.sample(words, 4)) for _ in range(queries)])
+    exact = query_vectors @ vectors.T
+    exact_top = np.argsort(-exact, axis=1, kind="stable")[:, :k]
+
+    storage = []
+    for dtype in STORAGE_DTYPES:
+        stored, scales = quantize(vectors, dtype)
+        decoded = dequantize(stored, scales)
+        nbytes = stored.nbytes + (scales.nbytes if scales is not None else 0)
+
+        approx = query_vectors @ decoded.T
+        approx_top = np.argsort(-approx, axis=1, kind="stable")[:, :k]
+        recall = np.mean([len(set(a) & set(e)) / k for a, e in zip(approx_top, exact_top)])
+        rounded_changed = np.mean(np.round(approx, 3) != np.round(exact, 3))
+
+        storage.append({
+            "dtype": dtype, "bytes_per_vector": nbytes / size,
+            f"recall_at_{k}": float(recall),
+            "max_score_error": float(np.abs(approx - exact).max()),
+            "rounded_scores_changed": float(rounded_changed),
+        })
+        typer.echo(f"💾 {dtype:<8} {nbytes / size:6.1f} B/vector  recall@{k} {recall:.4f}  "
+                   f"max |Δscore| {np.abs(approx - exact).max():.5f}  "
+                   f"3-dp scores changed {rounded_changed:.2%}")
+
+    typer.echo(json.dumps({"files": size, "dim": int(vectors.shape[1]),
+                           "throughput": throughput, "storage": storage}, indent=2))
+
+
+# ============================================================
+# Offline extractor: `codi init --extractor local` on a synthetic repo
+# ============================================================
+
+def synthetic_source_file(rng, words, functions: int) -> str:
+    """A Python module with imports, a docstring, a class and commented functions."""
+    def ident():
+        return "_".join(rng.sample(words, 2))
+
+    lines = [f"import {rng.choice(['os', 'json', 're', 'sqlite3', 'requests', 'logging'])}",
+             f"from pkg.{ident()} import {ident()}", "", f'"""{" ".join(rng.sample(words, 12))}."""', "",
+             f"class {''.join(w.title() for w in rng.sample(words, 2))}:"]
+    for _ in range(functions):
+        lines += [f"    def {rng.choice(['load', 'save', 'parse', 'validate', 'send'])}_{ident()}(self, {ident()}, {ident()}=None):",
+                  f"        # {' '.join(rng.sample(words, 8))}",
+                  f"        {ident()} = self.{ident()}({ident()})",
+                  f"        if {ident()} is None:",
+                  f"            raise ValueError('{' '.join(rng.sample(words, 4))}')",
+                  f"        return {ident()}", ""]
+    return "\n".join(lines) + "\n"
+
+
+def write_synthetic_repo(root, files: int, functions: int, seed: int = 0):
+    """
+    `files` modules under root/pkg*/ → (total bytes, [(relative path, topic
+    words)]). Each package (~50 modules) draws on its own 32-word topic,
+    like a real codebase; one shared vocabulary would relate every file to
+    every other.
+    """
+    import random
+
+    rng = random.Random(seed)
+    stems = [a + b for a in ("us", "or", "ca", "em", "to", "re", "qu", "pr", "in", "se", "pa", "ac", "au", "st")
+             for b in ("er", "der", "che", "ail", "ken", "port", "eue", "ice", "voice", "ssion", "yment", "count")]
+    packages = max(1, files // 50)
+    topics = [[f"{rng.choice(stems)}{rng.choice(stems)}" for _ in range(32)] for _ in range(packages)]
+
+    total_bytes, written = 0, []
+    for i in range(files):
+        rel = f"pkg{i % packages}/module{i:05d}.py"
+        path = root / rel
+        path.parent.mkdir(exist_ok=True)
+        total_bytes += path.write_text(synthetic_source_file(rng, topics[i % packages], functions))
+        written.append((rel, topics[i % packages]))
+    return total_bytes, written
+
+
+@app.command()
+def local(
+    files: int = typer.Option(10_000, help="Files in the synthetic repo"),
+    functions: int = typer.Option(12, help="Functions per file (~100 bytes each)"),
+):
+    """Wall time of a full offline index (local extractor, no network) and schema check."""
+    import contextlib
+    import os
+    import tempfile
+    from pathlib import Path
+    from codi.logic.file_indexer import index_project
+    from codi.logic.index_store import load_entries
+    from codi.logic.task_processor import compute_score
+
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        total_bytes, _ = write_synthetic_repo(Path(tmp), files, functions)
+
+        os.chdir(tmp)
+        try:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(devnull):
+                index_project(extractor="local")
+            elapsed = time.perf_counter() - start
+            entries = load_entries(Path(".codi"))
+        finally:
+            os.chdir(cwd)
+
+    fields = {"keywords", "capabilities", "side_effects", "inputs", "outputs", "risks", "patterns",
+              "data_entities", "external_dependencies"}
+    assert len(entries) == files, f"indexed {len(entries)} of {files} files"
+    assert all(fields <= set(entry["semantic"]) for entry in entries), "semantic object is missing fields"
+    scored = sum(compute_score(entry["keywords"][:3], entry, 0.0) > 0 for entry in entries)
+
+    results = {"files": files, "bytes": total_bytes, "index_s": elapsed, "files_per_s": files / elapsed,
+               "scored_by_own_keywords": scored}
+    typer.echo(f"🏠 {files} files ({total_bytes / 1e6:.1f} MB) indexed offline in {elapsed:.1f}s "
+               f"({files / elapsed:.0f} files/s); {scored} score > 0 on their own keywords")
+    typer.echo(json.dumps(results, indent=2))
+
+
+# ============================================================
+# Context packer: `codi context --id` from a large index
+# ============================================================
+
+@app.command()
+def context(
+    files: int = typer.Option(10_000, help="Files in the synthetic repo"),
+    functions: int = typer.Option(12, help="Functions per file (~100 bytes each)"),
+    budget: int = typer.Option(100_000, help="Token budget"),
+    repeat: int = typer.Option(5, help="Timed runs (best and median reported)"),
+):
+    """Time to plan + stream a token-budgeted context for a saved task (index open included)."""
+    import os
+    import random
+    import statistics
+    import tempfile
+    import tracemalloc
+    from pathlib import Path
+    from codi.logic.context import plan_context, iter_context
+    from codi.logic.file_indexer import make_entry, create_file_relationships
+    from codi.logic.index_store import IndexReader, write_index
+    from codi.logic.symbols import extract_symbols, public_symbol
+    from codi.logic.task_store import TaskStore
+    from codi.constants import CODI_TASK_TOP_K
+
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "wb") as devnull:
+        root = Path(tmp)
+        total_bytes, written = write_synthetic_repo(root, files, functions)
+
+        # Index entries as `codi init` would store them (symbols with line ranges)
+        entries = []
+        for rel, topic in sorted(written):
+            symbols = extract_symbols((root / rel).read_text(), ".py")
+            entries.append(make_entry(rel, [public_symbol(s) for s in symbols], {"keywords": rng.sample(topic, 8)}))
+        create_file_relationships(entries)
+        (root / ".codi").mkdir()
+        write_index(root / ".codi", entries)
+
+        # A saved task matching one package's vocabulary
+        task_keywords = written[0][1][:3]
+        overlap = sorted(((len(set(task_keywords) & set(e["keywords"])), e["path"]) for e in entries), reverse=True)
+        matches = [{"file": path, "score": round(count / 3, 3)} for count, path in overlap[:CODI_TASK_TOP_K]]
+        store = TaskStore(root / ".codi" / "tasks.db")
+        store.save("bench", "synthetic task", task_keywords, matches)
+
+        def pack():
+            reader = IndexReader.open(root / ".codi")
+            saved = store.get("bench")
+            plan = plan_context(saved, reader, root, budget)
+            written_bytes = 0
+            for piece in iter_context("bench", saved, plan):
+                written_bytes += devnull.write(piece)
+            reader.close()
+            return plan, written_bytes
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            plan, written_bytes = pack()
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        pack()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        store.close()
+
+    tokens = sum(item["tokens"] for item in plan)
+    partial = sum(1 for item in plan if item["sections"][0][4] is not None)
+    assert tokens <= budget, f"packed {tokens} tokens over a {budget} budget"
+
+    results = {"files": files, "repo_bytes": total_bytes, "budget": budget, "tokens": tokens,
+               "packed_files": len(plan), "partial_files": partial, "bytes_out": written_bytes,
+               "best_s": min(timings), "median_s": statistics.median(timings), "peak_alloc_mb": peak / 1e6}
+    typer.echo(f"📦 {tokens}/{budget} tokens from {len(plan)} files ({partial} partial) of {files}: "
+               f"best {min(timings) * 1e3:.1f} ms, median {statistics.median(timings) * 1e3:.1f} ms, "
+               f"peak alloc {peak / 1e6:.1f} MB")
+    typer.echo(json.dumps(results, indent=2))
+
+
+# ============================================================
+# Graph re-rank: latency and ranking quality vs flat ranking
+# ============================================================
+
+def labelled_feature_fixture(files: int, feature_size: int, dim: int, seed: int = 0):
+    """
+    Files grouped into features (the files one story has to touch). Members
+    share feature words, so create_file_relationships links them; every 100
+    features also share a domain vocabulary that adds spurious links. Two
+    members per feature are "core" (close to the feature in embedding
+    space), the rest only loosely. Returns (entries, unit vectors,
+    feature id per row, feature centroids, feature words).
+    """
+    import random
+    import numpy as np
+    from codi.logic.file_indexer import create_file_relationships
+
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    features = files // feature_size
+    centroids = np_rng.standard_normal((features, dim))
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+    words = [[f"feat{f}w{j}" for j in range(8)] for f in range(features)]
+
+    entries, feature_of, vectors = [], [], []
+    for f in range(features):
+        domain = [f"domain{f // 100}w{j}" for j in range(10)]
+        for m in range(feature_size):
+            keywords = rng.sample(words[f], 4) + rng.sample(domain, 2) + [f"file{len(entries)}"]
+            entries.append({
+                "path": f"feature{f:05d}/part{m}.py",
+                "keywords": keywords,
+                "semantic": {"keywords": keywords},
+                "functions": [f"handle_{keywords[0]}"],
+            })
+            closeness = 1.0 if m < 2 else 0.25
+            vector = closeness * centroids[f] + np_rng.standard_normal(dim) / np.sqrt(dim)
+            vectors.append(vector / np.linalg.norm(vector))
+            feature_of.append(f)
+
+    create_file_relationships(entries)
+    return entries, np.array(vectors, dtype=np.float32), np.array(feature_of), centroids, words
+
+
+@app.command()
+def graph(
+    files: int = typer.Option(50_000, help="Files (graph nodes)"),
+    feature_size: int = typer.Option(8, help="Files per labelled feature"),
+    queries: int = typer.Option(200, help="Labelled queries"),
+    k: int = typer.Option(10, help="Cut-off for recall / nDCG"),
+    weights: str = typer.Option("0.25,0.5,1.0", help="Graph weights to compare with flat ranking"),
+):
+    """Graph re-rank vs flat ranking on a labelled fixture: recall@k, nDCG@k and latency."""
+    import math
+    import random
+    import statistics
+    from functools import partial
+    import numpy as np
+    from codi.logic.graph import RelationGraph
+    from codi.logic.scoring import ScoringIndex
+    from codi.logic.task_processor import build_matches
+
+    dim = 64
+    start = time.perf_counter()
+    entries, vectors, feature_of, centroids, words = labelled_feature_fixture(files, feature_size, dim)
+    fixture_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    graph = RelationGraph.from_entries(entries)
+    build_s = time.perf_counter() - start
+    scoring = ScoringIndex.build(entries)
+    rows = np.arange(len(entries))
+    row_of = {entry["path"]: row for row, entry in enumerate(entries)}
+
+    def evaluate(weight):
+        """The same queries for every weight (0 = flat ranking)."""
+        rng, np_rng = random.Random(1), np.random.default_rng(1)
+        graph.rerank = partial(RelationGraph.rerank, graph, weight=weight)
+        recall, ndcg, timings = [], [], []
+        for q in range(queries):
+            feature = q * 7919 % len(centroids)
+            keywords = rng.sample(words[feature], 2) + [f"noise{q}"]
+            task_vector = centroids[feature] + np_rng.standard_normal(dim) / np.sqrt(dim)
+            similarities = vectors @ (task_vector / np.linalg.norm(task_vector)).astype(np.float32)
+
+            start = time.perf_counter()
+            matches = build_matches(keywords, entries, rows, similarities, {}, scoring=scoring, limit=k,
+                                    graph=graph if weight else None)
+            timings.append(time.perf_counter() - start)
+
+            hits = [feature_of[row_of[m["file"]]] == feature for m in matches]
+            recall.append(sum(hits) / feature_size)
+            ideal = sum(1 / math.log2(i + 2) for i in range(min(k, feature_size)))
+            ndcg.append(sum(1 / math.log2(i + 2) for i, hit in enumerate(hits) if hit) / ideal)
+        return {"recall": statistics.mean(recall), "ndcg": statistics.mean(ndcg),
+                "median_ms": statistics.median(timings) * 1e3}
+
+    results = {"files": len(entries), "edges": graph.edges(), "fixture_s": fixture_s,
+               "graph_build_s": build_s, "flat": evaluate(0.0)}
+    for weight in (float(w) for w in weights.split(",")):
+        results[f"graph_w{weight:g}"] = evaluate(weight)
+
+    for name, row in results.items():
+        if isinstance(row, dict):
+            typer.echo(f"🕸  {name:<12} recall@{k} {row['recall']:.3f}  nDCG@{k} {row['ndcg']:.3f}  "
+                       f"{row['median_ms']:.2f} ms")
+    typer.echo(json.dumps(results, indent=2))
+
+
+# ============================================================
+# Federation: one story across many project indexes
+# ============================================================
+
+@app.command()
+def federation(
+    projects: int = typer.Option(40, help="Project indexes"),
+    size: int = typer.Option(20_000, help="Files in the largest project (others are 10-100% of it)"),
+    queries: int = typer.Option(20, help="Timed warm queries"),
+    limit: int = typer.Option(10, help="Global top-k"),
+):
+    """Warm query latency over every project vs the largest one alone (results checked against a full sort)."""
+    import random
+    import statistics
+    import tempfile
+    from pathlib import Path
+    import numpy as np
+    from codi.logic.embeddings import encode, save_embeddings
+    from codi.logic.federation import rank_project, rank_projects, project_state
+    from codi.logic.index_store import write_index, index_digest
+    from codi.logic.scoring import build_scoring_index
+
+    rng = random.Random(1)
+    dim = encode(["warm up"]).shape[1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        roots = {}
+        for p in range(projects):
+            rows = size if p == 0 else rng.randint(size // 10, size)
+            codi_dir = Path(tmp) / f"service{p:02d}" / ".codi"
+            codi_dir.mkdir(parents=True)
+            entries = synthetic_index_entries(rows, seed=p)
+            vectors = np.random.default_rng(p).standard_normal((rows, dim)).astype(np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            write_index(codi_dir, entries)
+            save_embeddings(codi_dir, entries, vectors)
+            build_scoring_index(codi_dir, entries, index_digest(codi_dir))
+            roots[f"service{p:02d}"] = codi_dir.parent
+        total = sum(len(project_state(root).current().index_data) for root in roots.values())
+        warm = {name: project_state(root).current() for name, root in roots.items()}
+
+        words = [f"term{i}" for i in range(5000)]
+        single_s, federated_s = [], []
+        for q in range(queries):
+            keywords = rng.sample(words, 4)
+            vector = encode([" ".join(keywords)])[0]
+
+            start = time.perf_counter()
+            rank_project("service00", roots["service00"], keywords, vector, limit)
+            single_s.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            matches, errors = rank_projects(keywords, roots, limit)
+            federated_s.append(time.perf_counter() - start)
+
+            assert not errors, errors
+            everything = [m for name, root in roots.items() for m in rank_project(name, root, keywords, vector, limit)]
+            expected = sorted(everything, key=lambda m: -m["score"])[:limit]
+            assert [m["score"] for m in matches] == [m["score"] for m in expected], f"query {q}: merged top-k differs"
+
+        # Unchanged indexes are reused, not reloaded
+        assert all(project_state(root).current() is warm[name] for name, root in roots.items())
+
+    results = {"projects": projects, "files": total, "largest": size, "queries": queries,
+               "single_median_ms": statistics.median(single_s) * 1e3,
+               "federated_median_ms": statistics.median(federated_s) * 1e3}
+    typer.echo(f"🌐 {projects} projects / {total} files: federated {results['federated_median_ms']:.1f} ms, "
+               f"largest alone {results['single_median_ms']:.1f} ms (median of {queries}, top-{limit} verified)")
+    typer.echo(json.dumps(results, indent=2))
+
+
+# ============================================================
+# Task store: `codi task --list` with many saved tasks
+# ============================================================
+
+def legacy_list_tasks(path):
+    """The original list_tasks body: parse all of tasks.json for one line per task."""
+    from codi.logic.task_processor import console
+
+    with path.open() as f:
+        tasks = json.load(f)
+    for task_id, data in tasks.items():
+        console.print(f"[bold yellow]ID:[/bold yellow] {task_id}")
+        console.print(f"  📝 {data.get('description', '')}")
+        best = (data.get("matches") or [{}])[0]
+        if best:
+            console.print(f"  📌 Best match: {best.get('file')} ({best.get('score')})")
+        console.print("")
+
+
+@app.command()
+def tasks(
+    count: int = typer.Option(1000, help="Saved tasks"),
+    size: int = typer.Option(10_000, help="Index entries the matches point into"),
+    matches: int = typer.Option(100, help="Matches per task in the legacy file (it kept every positive score)"),
+):
+    """`codi task --list` and single-task save latency: tasks.json vs .codi/tasks.db."""
+    import contextlib
+    import os
+    import random
+    import tempfile
+    from pathlib import Path
+    from codi.logic.utils import save_json
+
+    entries = synthetic_index_entries(size)
+    rng = random.Random(0)
+
+    def task_matches():
+        rows = rng.sample(range(size), matches)
+        scores = sorted((round(rng.random(), 3) for _ in rows), reverse=True)
+        return [{
+            "file": entries[row]["path"], "score": score,
+            "functions": entries[row]["functions"], "keywords": entries[row]["keywords"],
+            "semantic": entries[row]["semantic"], "related_files": entries[row]["related_files"],
+        } for row, score in zip(rows, scores)]
+
+    legacy = {f"TASK-{i}": {"description": f"story {i}", "keywords": ["term1", "term2"],
+                            "matches": task_matches()} for i in range(count)}
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        os.chdir(tmp)           # the task store lives in ./.codi
+        try:
+            from codi.logic.task_processor import list_tasks, save_task
+            from codi.logic.task_store import TASKS_DB, get_task_store
+
+            legacy_path = Path(".codi") / "tasks.json"
+            save_json(legacy_path, legacy)
+            legacy_bytes = legacy_path.stat().st_size
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(devnull):
+                legacy_list_tasks(legacy_path)
+            legacy_list_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            legacy["TASK-0"]["description"] = "edited"
+            save_json(legacy_path, legacy)
+            legacy_save_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            get_task_store()            # imports tasks.json once
+            migrate_s = time.perf_counter() - start
+            store_bytes = TASKS_DB.stat().st_size + sum(
+                p.stat().st_size for p in TASKS_DB.parent.glob("tasks.db-*"))
+
+            start = time.perf_counter()
+            summaries = list(get_task_store().summaries())
+            read_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(devnull):
+                list_tasks()
+            list_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            save_task("TASK-0", "edited again", ["term1"], task_matches())
+            save_s = time.perf_counter() - start
+
+            assert len(summaries) == count and summaries[0][:2] == ("TASK-0", "edited")
+            get_task_store().close()
+        finally:
+            os.chdir(cwd)
+
+    results = {
+        "tasks": count,
+        "legacy": {"bytes": legacy_bytes, "list_s": legacy_list_s, "save_one_s": legacy_save_s},
+        "store": {"bytes": store_bytes, "read_summaries_s": read_s, "list_s": list_s, "save_one_s": save_s, "migrate_s": migrate_s},
+    }
+    typer.echo(f"🗂  {count} tasks  tasks.json {legacy_bytes / 1e6:.1f} MB: list {legacy_list_s:.2f}s, "
+               f"save one {legacy_save_s:.2f}s  →  tasks.db {store_bytes / 1e6:.1f} MB: "
+               f"list {list_s:.3f}s (read {read_s * 1000:.1f} ms), save one {save_s * 1000:.1f} ms")
+    typer.echo(json.dumps(results, indent=2))
+
+
+# ============================================================
+# Static import graph: extraction + linking speed and accuracy
+# ============================================================
+
+def synthetic_import_repo(files: int, imports: int, seed: int = 0):
+    """
+    {path: text} for a Python + TypeScript tree and the true edges. Python
+    modules import through the package prefix ("shop.pkgN.modM") and
+    relatively; TypeScript through "./x", "../pkgN/x" and the "@/" alias.
+    Every file also imports things outside the project (stdlib, npm).
+    """
+    import random
+
+    rng = random.Random(seed)
+    packages = max(1, files // 40)
+    paths = [f"pkg{i % packages}/mod{i}.{'py' if i % 3 else 'ts'}" for i in range(files)]
+    contents, truth = {}, set()
+
+    for i, path in enumerate(paths):
+        package = i % packages
+        lines = ["import os", "from typing import List"] if path.endswith(".py") else \
+            ["import React from 'react'", "import { z } from 'zod'"]
+        for j in rng.sample(range(files), imports):
+            target = paths[j]
+            if j == i or target.endswith(".py") != path.endswith(".py"):
+                continue
+            target_package, stem = target.split("/")[0], target.split("/")[1].rsplit(".", 1)[0]
+            if path.endswith(".py"):
+                lines.append(f"from .{stem} import run" if j % packages == package
+                             else f"from shop.{target_package}.{stem} import run")
+            elif j % packages == package:
+                lines.append(f"import {{ run }} from './{stem}'")
+            else:
+                lines.append(f"import {{ run }} from '{rng.choice(['@/', '../'])}{target_package}/{stem}'")
+            truth.add((path, target))
+        contents[path] = "\n".join(lines) + "\n"
+    return contents, truth
+
+
+@app.command()
+def imports(
+    files: int = typer.Option(50_000, help="Files in the synthetic tree"),
+    per_file: int = typer.Option(6, help="Project imports drawn per file"),
+):
+    """Time import extraction + linking on a large tree and check every edge against ground truth."""
+    from pathlib import PurePosixPath
+    from codi.logic.imports_graph import import_specs, link_imports
+
+    contents, truth = synthetic_import_repo(files, per_file)
+
+    start = time.perf_counter()
+    entries = [{"path": path, "import_specs": import_specs(text, PurePosixPath(path).suffix)}
+               for path, text in contents.items()]
+    extract_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    edges = link_imports(entries, Path("/nonexistent"))
+    link_s = time.perf_counter() - start
+
+    found = {(entry["path"], target) for entry in entries for target in entry["imports"]}
+    reverse = {(source, entry["path"]) for entry in entries for source in entry["imported_by"]}
+    assert found == reverse, "imported_by is not the reverse of imports"
+    precision = len(found & truth) / max(len(found), 1)
+    recall = len(found & truth) / max(len(truth), 1)
+
+    results = {"files": files, "edges": edges, "true_edges": len(truth), "precision": precision,
+               "recall": recall, "extract_s": extract_s, "link_s": link_s,
+               "files_per_s": files / (extract_s + link_s)}
+    typer.echo(f"🔗 {files} files → {edges} import edges in {extract_s + link_s:.2f}s "
+               f"(extract {extract_s:.2f}s, link {link_s:.2f}s); precision {precision:.3f}, recall {recall:.3f}")
+    typer.echo(json.dumps(results, indent=2))
+
+
+# ============================================================
+# End to end: `codi init` + `codi task` against a stub LLM
+# ============================================================
+
+# Body templates per extension; {w} / {W} are fresh identifiers, {text} a phrase
+LANGUAGE_TEMPLATES = {
+    ".py": synthetic_source_file,
+    ".js": "function {w}({w}, {w}) {{\n  // {text}\n  const {w} = {w}.{w}({w});\n  return {w};\n}}\n",
+    ".jsx": "export function {W}({{ {w} }}) {{\n  // {text}\n  return <div className=\"{w}\">{{{w}}}</div>;\n}}\n",
+    ".ts": "export function {w}({w}: string, {w}?: number): {W} {{\n  // {text}\n  return {w}.{w}({w});\n}}\n",
+    ".tsx": "export const {W} = ({{ {w} }}: {W}Props) => {{\n  // {text}\n  return <{W} {w}={{{w}}} />;\n}};\n",
+    ".go": "// {text}\nfunc {W}({w} string) ({W}, error) {{\n\treturn {w}.{W}({w})\n}}\n",
+    ".java": "    // {text}\n    public {W} {w}(String {w}) {{\n        return {w}.{w}({w});\n    }}\n",
+    ".c": "/* {text} */\nint {w}(const char *{w}, int {w}) {{\n    return {w}({w});\n}}\n",
+    ".cpp": "// {text}\nstd::string {W}::{w}(const std::string& {w}) {{\n    return {w}_.{w}({w});\n}}\n",
+    ".h": "/* {text} */\nint {w}(const char *{w}, int {w});\n",
+    ".md": "## {W}\n\n{text} {text}.\n\n",
+    ".txt": "{text}. {text}.\n",
+    ".json": "  \"{w}\": {{\"{w}\": \"{text}\", \"{w}\": 1}},\n",
+    ".yml": "{w}:\n  {w}: {text}\n  {w}: true\n",
+    ".yaml": "{w}:\n  {w}: {text}\n",
+    ".css": "/* {text} */\n.{w}-{w} {{\n  display: flex;\n}}\n",
+    ".html": "<section id=\"{w}\">\n  <!-- {text} -->\n  <p class=\"{w}\">{text}</p>\n</section>\n",
+}
+
+DEFAULT_MIX = "py:40,ts:20,js:10,go:10,java:5,md:10,json:5"
+
+
+def parse_mix(mix: str):
+    """'py:40,ts:20' → [(".py", 40), (".ts", 20)]; every extension must be in TEXT_EXT."""
+    from codi.logic.utils import TEXT_EXT
+
+    weights = []
+    for part in mix.split(","):
+        ext, _, weight = part.strip().partition(":")
+        ext = "." + ext.lstrip(".").lower()
+        if ext not in TEXT_EXT or ext not in LANGUAGE_TEMPLATES:
+            raise typer.BadParameter(f"{ext} is not an indexed text extension", param_hint="--mix")
+        weights.append((ext, float(weight or 1)))
+    return weights
+
+
+def synthetic_language_file(rng, words, ext: str, functions: int) -> str:
+    template = LANGUAGE_TEMPLATES[ext]
+    if callable(template):
+        return template(rng, words, functions)
+
+    pieces = []
+    for _ in range(functions):
+        body = template.format(w="\0", W="\1", text="\2")
+        for marker, make in (("\0", lambda: "_".join(rng.sample(words, 2))),
+                             ("\1", lambda: "".join(w.title() for w in rng.sample(words, 2))),
+                             ("\2", lambda: " ".join(rng.sample(words, 6)))):
+            while marker in body:
+                body = body.replace(marker, make(), 1)
+        pieces.append(body)
+
+    text = "".join(pieces)
+    if ext == ".json":
+        return "{\n" + text.rstrip(",\n") + "\n}\n"
+    if ext == ".java":
+        return f"public class {''.join(w.title() for w in rng.sample(words, 2))} {{\n{text}}}\n"
+    return text
+
+
+def write_mixed_repo(root, files: int, mix, functions: int, seed: int = 0):
+    """
+    `files` indexable files in the `mix` of extensions (per-package topics
+    as in write_synthetic_repo), plus decoys CODI must skip: files under
+    SKIP_DIRS, SKIP_FILES names and non-text extensions. Returns
+    {"files", "bytes", "decoys", "by_ext"}.
+    """
+    import random
+    from codi.constants import SKIP_DIRS, SKIP_FILES
+
+    rng = random.Random(seed)
+    exts = [ext for ext, _ in mix]
+    packages = max(1, files // 50)
+    topics = [[f"{rng.choice('bcdfgklmnprstv')}{rng.choice('aeiou')}{rng.choice('bcdfgklmnprstv')}"
+               f"{rng.choice('aeiou')}{rng.choice('rnst')}" for _ in range(32)] for _ in range(packages)]
+
+    total_bytes, by_ext = 0, {}
+    for i, ext in enumerate(rng.choices(exts, weights=[w for _, w in mix], k=files)):
+        path = root / f"pkg{i % packages}" / f"module{i:05d}{ext}"
+        path.parent.mkdir(exist_ok=True)
+        total_bytes += path.write_text(synthetic_language_file(rng, topics[i % packages], ext, functions))
+        by_ext[ext] = by_ext.get(ext, 0) + 1
+
+    decoys = 0
+    for name in sorted(SKIP_DIRS - {".codi"}):
+        (root / name).mkdir(exist_ok=True)
+        (root / name / "skipped.js").write_text("function skipped() {}\n")
+        decoys += 1
+    for name in sorted(SKIP_FILES):
+        (root / name).write_text("{}\n")
+        decoys += 1
+    for name in ("logo.png", "data.bin", "archive.zip"):
+        (root / name).write_bytes(bytes(range(256)))
+        decoys += 1
+
+    return {"files": files, "bytes": total_bytes, "decoys": decoys, "by_ext": by_ext}
+
+
+# Syntax the templates above put in every file; never reported as keywords
+TEMPLATE_WORDS = {
+    "import", "from", "class", "self", "none", "return", "raise", "valueerror", "load", "save", "parse",
+    "validate", "send", "json", "requests", "logging", "sqlite", "function", "const", "export", "classname",
+    "string", "number", "props", "func", "error", "public", "char", "void", "display", "flex", "section",
+    "true", "story", "change",
+}
+
+
+def stub_metadata_responder(prompt: str) -> str:
+    """
+    Metadata derived from the prompt itself (most frequent non-syntax
+    words), so rankings are meaningful: per file for a batched index
+    prompt, one object for a single file or a task description.
+    """
+    import re
+    from collections import Counter
+    from codi.logic.stub_llm import default_responder
+
+    def metadata(text):
+        words = Counter(word for word in re.findall(r"[a-z]{4,}", text.lower()) if word not in TEMPLATE_WORDS)
+        data = json.loads(default_responder(text))
+        data["keywords"] = [word for word, _ in words.most_common(8)]
+        data["capabilities"] = [word for word, _ in words.most_common(12)[8:]]
+        return data
+
+    sections = re.split(r"^===== FILE: (.+?) =====$", prompt, flags=re.M)
+    if len(sections) > 1:
+        return json.dumps({path: metadata(body) for path, body in zip(sections[1::2], sections[2::2])})
+    body = re.split(r"^(?:CODE|TEXT):$", prompt, flags=re.M)[-1]
+    return json.dumps(metadata(body))
+
+
+# Runs in the synthetic repo in a fresh interpreter: peak RSS is this phase's alone
+E2E_PROBE = """
+import contextlib, io, json, math, resource, statistics, sys, time
+phase, args = sys.argv[1], json.loads(sys.argv[2])
+out = {}
+with contextlib.redirect_stdout(io.StringIO()):
+    if phase == "init":
+        from codi.logic.file_indexer import index_project
+        start = time.perf_counter()
+        index_project(batch_tokens=args["batch_tokens"])
+        out["seconds"] = time.perf_counter() - start
+    else:
+        from codi.logic import task_processor
+        task_processor.console.quiet = True
+        start = time.perf_counter()
+        rows = len(task_processor.load_index())
+        out["load_index_s"], out["rows"] = time.perf_counter() - start, rows
+        timings = []
+        for i, description in enumerate(args["stories"]):
+            start = time.perf_counter()
+            task_processor.process_task(f"bench-{i}", description)
+            timings.append(time.perf_counter() - start)
+        warm = sorted(timings[1:] or timings)
+        out["first_query_s"] = timings[0]
+        out["query_median_s"] = statistics.median(warm)
+        out["query_p95_s"] = warm[max(math.ceil(0.95 * len(warm)) - 1, 0)]
+out["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(out))
+"""
+
+
+@app.command()
+def e2e(
+    files: int = typer.Option(2_000, help="Indexable files in the synthetic repo"),
+    mix: str = typer.Option(DEFAULT_MIX, help="Language mix, ext:weight (extensions from TEXT_EXT)"),
+    functions: int = typer.Option(8, help="Functions / blocks per file"),
+    latency: float = typer.Option(0.05, help="Stub LLM seconds per request"),
+    error_rate: float = typer.Option(0.0, help="Fraction of stub requests answered with --error-status"),
+    error_status: int = typer.Option(429, help="HTTP status of failed stub requests"),
+    queries: int = typer.Option(20, help="`codi task` queries (the first one is reported separately)"),
+    batch_tokens: int = typer.Option(None, help="Override AI_BATCH_TOKENS for indexing"),
+    rate_limit: float = typer.Option(None, help="Override AI_RATE_LIMIT (requests / second)"),
+    out: Path = typer.Option(None, "--out", "-o", help="Also write the JSON result to this file"),
+):
+    """
+    Full `codi init` + `codi task` run on a synthetic repo against a local
+    stub LLM: throughput, peak RSS, index size, load_index and query latency.
+    """
+    import os
+    import platform
+    import random
+    import tempfile
+    from codi.constants import CODI_VERSION, AI_BATCH_TOKENS, AI_RATE_LIMIT, AI_MAX_IN_FLIGHT
+    from codi.logic.stub_llm import StubLLMServer
+
+    weights = parse_mix(mix)
+    if queries < 1:
+        raise typer.BadParameter("at least one query is needed for latency figures", param_hint="--queries")
+    batch_tokens = AI_BATCH_TOKENS if batch_tokens is None else batch_tokens
+    rate_limit = AI_RATE_LIMIT if rate_limit is None else rate_limit
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubLLMServer(latency=latency, error_rate=error_rate, error_status=error_status,
+                          responder=stub_metadata_responder) as stub:
+        root = Path(tmp)
+        repo = write_mixed_repo(root, files, weights, functions)
+        env = dict(os.environ, AI_URL=stub.url, AI_API_KEY="bench", AI_MODEL="stub", AI_RATE_LIMIT=str(rate_limit))
+
+        def probe(phase, args):
+            done = subprocess.run([sys.executable, "-c", E2E_PROBE, phase, json.dumps(args)],
+                                  cwd=root, env=env, capture_output=True, text=True)
+            if done.returncode:
+                raise RuntimeError(f"{phase} probe failed:\n{done.stderr[-2000:]}")
+            return json.loads(done.stdout.strip().splitlines()[-1])
+
+        typer.echo(f"🏗  {files} files ({repo['bytes'] / 1e6:.1f} MB, {repo['decoys']} decoys) → codi init ...")
+        init = probe("init", {"batch_tokens": batch_tokens})
+        init_requests, init_errors = stub.requests, stub.errors
+
+        codi_dir = root / ".codi"
+        sizes = {path.name: path.stat().st_size for path in codi_dir.iterdir() if path.is_file()}
+        index_bytes = sum(sizes.values())
+
+        # Each story borrows words from one package, like a change to that area
+        rng = random.Random(2)
+        packages = sorted(root.glob("pkg*"))
+        stories = []
+        for i in range(queries):
+            sample = next(rng.choice(packages).iterdir()).read_text()
+            words = sorted(set(word for word in sample.replace("_", " ").split() if word.isalpha() and len(word) > 3))
+            stories.append(f"Story {i}: change how we " + " ".join(rng.sample(words, min(5, len(words)))))
+        query = probe("query", {"stories": stories})
+
+    assert query["rows"] == files, f"indexed {query['rows']} rows, expected {files} (decoys must be skipped)"
+
+    results = {
+        "codi_version": CODI_VERSION,
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {"files": files, "mix": mix, "functions": functions, "latency_s": latency,
+                   "error_rate": error_rate, "queries": queries, "batch_tokens": batch_tokens,
+                   "rate_limit": rate_limit, "max_in_flight": AI_MAX_IN_FLIGHT},
+        "repo": repo,
+        "init": {"seconds": init["seconds"], "files_per_s": files / init["seconds"],
+                 "mb_per_s": repo["bytes"] / 1e6 / init["seconds"], "peak_rss_mb": init["peak_rss_mb"],
+                 "llm_requests": init_requests, "llm_errors": init_errors},
+        "index": {"bytes": index_bytes, "files": sizes},
+        "query": {"load_index_s": query["load_index_s"], "first_s": query["first_query_s"],
+                  "median_s": query["query_median_s"], "p95_s": query["query_p95_s"],
+                  "peak_rss_mb": query["peak_rss_mb"], "llm_requests": stub.requests - init_requests},
+    }
+    typer.echo(f"📈 init {init['seconds']:.1f}s ({files / init['seconds']:.0f} files/s, "
+               f"{init_requests} LLM requests, {init_errors} errors), peak RSS {init['peak_rss_mb']:.0f} MB; "
+               f"index {index_bytes / 1e6:.1f} MB; load_index {query['load_index_s'] * 1e3:.0f} ms; "
+               f"task first {query['first_query_s']:.2f}s, median {query['query_median_s'] * 1e3:.0f} ms, "
+               f"p95 {query['query_p95_s'] * 1e3:.0f} ms")
+    typer.echo(json.dumps(results, indent=2))
+    if out:
+        out.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    app()
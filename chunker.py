@@ -0,0 +1,86 @@
+from typing import List, Dict, Any, Tuple
+
+
+# ============================================================
+# Large-file Chunking
+# ============================================================
+#
+# Files above CODI_CHUNK_THRESHOLD are split at function/class boundaries
+# so each chunk gets its own metadata request and embedding. Adjacent
+# small symbols are merged up to `max_chars`; a single symbol longer than
+# that is split on line boundaries.
+
+def split_into_chunks(content: str, boundaries: List[Tuple[int, str]], max_chars: int) -> List[Dict[str, Any]]:
+    """
+    content     file text
+    boundaries  (char offset, symbol name) of each function/class start
+    returns     [{"name", "start_line", "end_line", "text"}] covering the file
+    """
+
+    # Snap every boundary to the start of its line; text before the first
+    # symbol (imports, constants) becomes "<module>"
+    names = {}
+    for offset, name in sorted(boundaries):
+        names.setdefault(content.rfind("\n", 0, offset) + 1, name)
+    names.setdefault(0, "<module>")
+    line_starts = sorted(names)
+
+    segments = []
+    for i, start in enumerate(line_starts):
+        end = line_starts[i + 1] if i + 1 < len(line_starts) else len(content)
+        if end > start:
+            segments.extend(split_long_segment(content, start, end, names[start], max_chars))
+
+    chunks, current = [], None
+    for start, end, name in segments:
+        if current and end - current["start"] <= max_chars:
+            current["end"] = end
+            current["names"].append(name)
+            continue
+        if current:
+            chunks.append(current)
+        current = {"start": start, "end": end, "names": [name]}
+    if current:
+        chunks.append(current)
+
+    return [
+        {
+            "name": chunk_name(chunk["names"]),
+            "start_line": content.count("\n", 0, chunk["start"]) + 1,
+            "end_line": content.count("\n", 0, max(chunk["end"] - 1, chunk["start"])) + 1,
+            "text": content[chunk["start"]:chunk["end"]],
+        }
+        for chunk in chunks
+    ]
+
+
+def split_long_segment(content: str, start: int, end: int, name: str, max_chars: int) -> List[Tuple[int, int, str]]:
+    """Cut one oversized symbol into <= max_chars pieces at newlines."""
+    pieces = []
+    while end - start > max_chars:
+        cut = content.rfind("\n", start, start + max_chars)
+        cut = cut + 1 if cut > start else start + max_chars
+        pieces.append((start, cut, name))
+        start = cut
+    pieces.append((start, end, name))
+    return pieces
+
+
+def chunk_name(names: List[str]) -> str:
+    unique = list(dict.fromkeys(names))
+    return unique[0] if len(unique) == 1 else f"{unique[0]}..{unique[-1]}"
+
+
+def merge_metadata(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """File-level semantic object: union of chunk lists, first-seen order."""
+    merged: Dict[str, List[Any]] = {}
+    for part in parts:
+        for field, values in part.items():
+            if not isinstance(values, list):
+                continue
+            bucket = merged.setdefault(field, [])
+            for value in values:
+                if value not in bucket:
+                    bucket.append(value)
+    merged.setdefault("keywords", [])
+    return merged
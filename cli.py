@@ -1,12 +1,40 @@
+from pathlib import Path
+from typing import List, Optional
 import typer
 from rich.console import Console
-from codi.constants import CODI_VERSION
+from codi.constants import (
+    CODI_VERSION, AI_BATCH_TOKENS, CODI_EXTRACTOR, CODI_SERVE_HOST, CODI_SERVE_PORT, CODI_CONTEXT_TOKENS,
+)
 from codi.logic.ai_keywords import MissingAPIKeyError
 
 app = typer.Typer(help="CODI - Project Code Intelligence CLI")
 console = Console()
 
 
+# ----------------------------------------------------------
+# --profile / --trace (codi init, codi task)
+# ----------------------------------------------------------
+def start_profile(profile: bool, trace: Optional[Path]):
+    if profile or trace:
+        from codi.logic.profiler import profiler
+        profiler.enable()
+
+
+def report_profile(profile: bool, trace: Optional[Path], output: Console = console):
+    """Stage summary table (--profile) and/or trace file (--trace: .jsonl, else Chrome trace)."""
+    if not (profile or trace):
+        return
+    from codi.logic.profiler import profiler
+
+    if profile:
+        output.print("")
+        for table in profiler.summary_tables():
+            output.print(table)
+    if trace:
+        profiler.write_trace(trace)
+        output.print(f"📁 Trace: {trace}")
+
+
 # ----------------------------------------------------------
 # codi version
 # ----------------------------------------------------------
@@ -20,12 +48,29 @@ def version():
 # codi init
 # ----------------------------------------------------------
 @app.command()
-def init():
-    """Index all project files → generate .codi/index.json"""
+def init(
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the LLM response cache"),
+    export_json: bool = typer.Option(False, "--export-json", help="Also write legacy .codi/index.json"),
+    batch_tokens: int = typer.Option(
+        AI_BATCH_TOKENS, "--batch-tokens",
+        help="Pack small files into one LLM request up to this many tokens (0 = one file per request)"
+    ),
+    extractor: str = typer.Option(
+        CODI_EXTRACTOR, "--extractor", help="Metadata extractor: llm (AI_URL) or local (offline)"
+    ),
+    profile: bool = typer.Option(False, "--profile", help="Print per-stage timings and counters"),
+    trace: Path = typer.Option(None, "--trace", help="Write a trace (.jsonl = JSON lines, else Chrome trace JSON)")
+):
+    """Index all project files → generate .codi/index.jsonl"""
+    if no_cache:
+        from codi.logic.llm_cache import set_enabled
+        set_enabled(False)
+
+    start_profile(profile, trace)
     try:
         with console.status("[bold green]Indexing project files...", spinner="dots"):
             from codi.logic.file_indexer import index_project
-            index_project()
+            index_project(export_json=export_json, batch_tokens=batch_tokens, extractor=extractor)
 
         console.print("[bold green]✓ Indexing completed successfully!")
 
@@ -37,37 +82,79 @@ def init():
         console.print(f"[bold red]❌ Unexpected error:[/bold red] {str(e)}")
         raise typer.Exit(code=1)
 
+    finally:
+        report_profile(profile, trace)
+
 
 
 
 # ----------------------------------------------------------
 # codi task command
 # ----------------------------------------------------------
-from codi.logic.task_processor import (
-    list_tasks,
-    run_existing_task,
-    create_or_update_task,
-)
 @app.command()
 def task(
     list: bool = typer.Option(False, "--list", help="List all saved tasks"),
     id: str = typer.Option(None, "--id", "-i", help="Task ID"),
-    description: str = typer.Option(None, "--desc", "-d", help="Task description")
+    description: str = typer.Option(None, "--desc", "-d", help="Task description"),
+    batch: Path = typer.Option(None, "--batch", help="Score every story in a JSON Lines file ({\"id\", \"desc\"} per line)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the LLM response cache"),
+    extractor: str = typer.Option(CODI_EXTRACTOR, "--extractor", help="Keyword extractor: llm (AI_URL) or local (offline)"),
+    project: List[str] = typer.Option(None, "--project", "-p", help="Score across this registered project (repeatable)"),
+    all_projects: bool = typer.Option(False, "--all-projects", help="Score across every registered project"),
+    profile: bool = typer.Option(False, "--profile", help="Print per-stage timings and counters"),
+    trace: Path = typer.Option(None, "--trace", help="Write a trace (.jsonl = JSON lines, else Chrome trace JSON)")
 ):
-    # LIST tasks
-    if list:
-        list_tasks()
-        return
+    # Imported here so `codi version` / `codi update` never load it
+    from codi.logic.task_processor import (
+        list_tasks,
+        run_existing_task,
+        create_or_update_task,
+        process_batch,
+        set_extractor,
+    )
 
-    # RUN existing task
-    if id and not description:
-        run_existing_task(id)
-        return
+    try:
+        set_extractor(extractor)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--extractor")
 
-    # CREATE or UPDATE a task
-    if id and description:
-        create_or_update_task(id, description)
-        return
+    projects = None
+    if project or all_projects:
+        from codi.logic.federation import resolve_projects
+        try:
+            projects = resolve_projects([] if all_projects else project)
+        except ValueError as e:
+            raise typer.BadParameter(str(e), param_hint="--project")
+        if not projects:
+            raise typer.BadParameter("No projects registered (see `codi projects add`)", param_hint="--all-projects")
+
+    if no_cache:
+        from codi.logic.llm_cache import set_enabled
+        set_enabled(False)
+
+    start_profile(profile, trace)
+    try:
+        # LIST tasks
+        if list:
+            list_tasks()
+            return
+
+        # BATCH of stories
+        if batch:
+            process_batch(batch)
+            return
+
+        # RUN existing task
+        if id and not description:
+            run_existing_task(id, projects)
+            return
+
+        # CREATE or UPDATE a task
+        if id and description:
+            create_or_update_task(id, description, projects)
+            return
+    finally:
+        report_profile(profile, trace)
 
     # INVALID usage
     console.print(
@@ -76,7 +163,204 @@ def task(
         "  codi task --list\n"
         "  codi task --id add-email --desc \"Add email validation\"\n"
         "  codi task --id add-email\n"
+        "  codi task --batch stories.jsonl\n"
+        "  codi task --id add-email --desc \"Add email validation\" --project billing --project auth\n"
+    )
+
+
+# ----------------------------------------------------------
+# codi projects (registry for codi task --project)
+# ----------------------------------------------------------
+projects_app = typer.Typer(help="Register indexed projects for codi task --project / --all-projects")
+app.add_typer(projects_app, name="projects")
+
+
+@projects_app.command("add")
+def projects_add(
+    name: str = typer.Argument(..., help="Project name (match paths become NAME:path)"),
+    path: Path = typer.Argument(Path("."), help="Project root containing .codi")
+):
+    """Register (or re-point) a project"""
+    from codi.logic.federation import register_project
+
+    try:
+        root = register_project(name, path)
+    except ValueError as e:
+        console.print(f"[bold red]❌ {e}[/bold red]")
+        raise typer.Exit(code=1)
+    console.print(f"[bold green]✓ Registered[/bold green] {name} → {root}")
+
+
+@projects_app.command("list")
+def projects_list():
+    """Show registered projects"""
+    from codi.logic.federation import load_projects, registry_path
+    from codi.logic.index_store import has_index
+
+    projects = load_projects()
+    if not projects:
+        console.print(f"[yellow]No projects registered[/yellow] ({registry_path()})")
+        return
+    for name, root in sorted(projects.items()):
+        state = "" if has_index(Path(root) / ".codi") else " [red](no index)[/red]"
+        console.print(f"  [bold]{name}[/bold] → {root}{state}")
+
+
+@projects_app.command("remove")
+def projects_remove(name: str = typer.Argument(..., help="Project name")):
+    """Unregister a project (its index is left alone)"""
+    from codi.logic.federation import unregister_project
+
+    if not unregister_project(name):
+        console.print(f"[bold red]❌ Unknown project:[/bold red] {name}")
+        raise typer.Exit(code=1)
+    console.print(f"[bold green]✓ Removed[/bold green] {name}")
+
+
+# ----------------------------------------------------------
+# codi context
+# ----------------------------------------------------------
+@app.command()
+def context(
+    id: str = typer.Option(..., "--id", "-i", help="Task ID"),
+    budget: int = typer.Option(CODI_CONTEXT_TOKENS, "--budget", "-b", help="Token budget (estimated as bytes / 4)"),
+    out: Path = typer.Option(None, "--out", "-o", help="Write to a file instead of stdout"),
+    related: bool = typer.Option(True, "--related/--no-related", help="Fill leftover budget with related files"),
+    profile: bool = typer.Option(False, "--profile", help="Print per-stage timings and counters"),
+    trace: Path = typer.Option(None, "--trace", help="Write a trace (.jsonl = JSON lines, else Chrome trace JSON)")
+):
+    """Stream a saved task's best-matching code, packed to a token budget"""
+    import sys
+    from codi.logic.context import plan_context, iter_context
+    from codi.logic.federation import PROJECT_SEPARATOR, load_projects
+    from codi.logic.index_store import IndexReader
+    from codi.logic.task_store import get_task_store
+
+    # stdout carries the context; everything else goes to stderr
+    status = Console(stderr=True)
+
+    reader = IndexReader.open(Path(".codi"))
+    if reader is None:
+        status.print("[bold red]❌ No index found. Run `codi init` first.[/bold red]")
+        raise typer.Exit(code=1)
+
+    saved = get_task_store().get(id)
+    if saved is None:
+        status.print(f"[bold red]❌ Task not found:[/bold red] {id}")
+        raise typer.Exit(code=1)
+
+    # A federated task's "<project>:<path>" matches are read from the registered projects
+    projects = {}
+    federated = {match["file"].partition(PROJECT_SEPARATOR)[0] for match in saved["matches"]
+                 if PROJECT_SEPARATOR in match["file"] and match["file"] not in reader}
+    registered = load_projects() if federated else {}
+    for name in sorted(federated):
+        project_reader = IndexReader.open(Path(registered[name]) / ".codi") if name in registered else None
+        if project_reader is None:
+            status.print(f"[bold red]❌ Task {id} matched project {name!r}, which is not registered "
+                         f"or has no index (see `codi projects list`)[/bold red]")
+            for opened, _ in projects.values():
+                opened.close()
+            reader.close()
+            raise typer.Exit(code=1)
+        projects[name] = (project_reader, Path(registered[name]))
+
+    start_profile(profile, trace)
+    try:
+        plan = plan_context(saved, reader, Path("."), budget, related, projects)
+        stream = out.open("wb") if out else sys.stdout.buffer
+        try:
+            for piece in iter_context(id, saved, plan):
+                stream.write(piece)
+        finally:
+            if out:
+                stream.close()
+            else:
+                stream.flush()
+
+        tokens = sum(item["tokens"] for item in plan)
+        sections = sum(len(item["sections"]) for item in plan)
+        status.print(f"[green]📦 {len(plan)} files, {sections} sections, ~{tokens} / {budget} tokens[/green]"
+                     + (f" → {out}" if out else ""))
+    finally:
+        reader.close()
+        for project_reader, _ in projects.values():
+            project_reader.close()
+        report_profile(profile, trace, status)
+
+
+# ----------------------------------------------------------
+# codi watch
+# ----------------------------------------------------------
+@app.command()
+def watch(
+    poll: bool = typer.Option(False, "--poll", help="Poll instead of using inotify"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the LLM response cache"),
+    batch_tokens: int = typer.Option(
+        AI_BATCH_TOKENS, "--batch-tokens",
+        help="Pack small files into one LLM request up to this many tokens (0 = one file per request)"
+    ),
+    extractor: str = typer.Option(
+        CODI_EXTRACTOR, "--extractor", help="Metadata extractor: llm (AI_URL) or local (offline)"
     )
+):
+    """Keep .codi/index.jsonl up to date as files change"""
+    from codi.logic.file_indexer import index_project, get_extractor
+    from codi.logic.watcher import watch_project
+
+    try:
+        get_extractor(extractor)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--extractor")
+
+    if no_cache:
+        from codi.logic.llm_cache import set_enabled
+        set_enabled(False)
+
+    try:
+        watch_project(
+            lambda touched: index_project(batch_tokens=batch_tokens, touched=touched, extractor=extractor),
+            poll=poll,
+        )
+
+    except MissingAPIKeyError as e:
+        console.print(f"[bold red]❌ ERROR:[/bold red] {str(e)}")
+        raise typer.Exit(code=1)
+
+    except KeyboardInterrupt:
+        console.print("\n[bold]👋 Stopped watching[/bold]")
+
+
+# ----------------------------------------------------------
+# codi serve
+# ----------------------------------------------------------
+@app.command()
+def serve(
+    host: str = typer.Option(CODI_SERVE_HOST, "--host", help="Interface to listen on"),
+    port: int = typer.Option(CODI_SERVE_PORT, "--port", help="Port (0 = any free port)")
+):
+    """Keep the model + index warm and answer queries over localhost HTTP"""
+    from codi.logic.daemon import CodiDaemon
+    from codi.logic.index_store import has_index
+
+    codi_dir = Path(".codi")
+    if not has_index(codi_dir):
+        console.print("[bold red]❌ No index found. Run `codi init` first.[/bold red]")
+        raise typer.Exit(code=1)
+
+    daemon = CodiDaemon(codi_dir, host, port)
+    with console.status("[bold green]Loading model and index...", spinner="dots"):
+        daemon.warm_up()
+
+    console.print(f"[bold green]🚀 CODI serving on {daemon.url}[/bold green] (Ctrl+C to stop)")
+
+    # `kill` shuts down as cleanly as Ctrl+C (removes .codi/serve.json)
+    import signal
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        console.print("\n[bold]👋 CODI daemon stopped[/bold]")
 
 
 # ----------------------------------------------------------
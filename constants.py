@@ -6,6 +6,70 @@ AI_API_KEY = os.getenv("AI_API_KEY")
 AI_MODEL = os.getenv("AI_MODEL", "llama-3.1-sonar-small-128k")  # default fallback model
 AI_URL = os.getenv("AI_URL", "https://api.perplexity.ai/chat/completions")  # default provider URL
 
+# LLM request concurrency / throttling (per provider host)
+AI_MAX_IN_FLIGHT = int(os.getenv("AI_MAX_IN_FLIGHT", "8"))      # concurrent requests
+AI_RATE_LIMIT = float(os.getenv("AI_RATE_LIMIT", "5"))          # requests / second
+AI_RATE_BURST = int(os.getenv("AI_RATE_BURST", "10"))           # token bucket capacity
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "5"))          # retries on 429 / 5xx
+
+# Batched indexing prompts: pack small files into one request (0 = off)
+AI_BATCH_TOKENS = int(os.getenv("AI_BATCH_TOKENS", "0"))        # est. tokens per request
+
+# Metadata / keyword extractor: "llm" (AI_URL) or "local" (offline, no network)
+CODI_EXTRACTOR = os.getenv("CODI_EXTRACTOR", "llm")
+
+# Ingestion pipeline: parallel scan → read/parse workers → bounded queue → LLM
+CODI_SCAN_WORKERS = int(os.getenv("CODI_SCAN_WORKERS", "8"))    # directory scanners
+CODI_READ_WORKERS = int(os.getenv("CODI_READ_WORKERS", "4"))    # read + parse workers
+CODI_INGEST_QUEUE = int(os.getenv("CODI_INGEST_QUEUE", "64"))   # parsed batches in flight
+
+# Large files are split at function/class boundaries and extracted per chunk
+CODI_CHUNK_THRESHOLD = int(os.getenv("CODI_CHUNK_THRESHOLD", "24000"))  # chars
+CODI_CHUNK_MAX_CHARS = int(os.getenv("CODI_CHUNK_MAX_CHARS", "12000"))  # chars per chunk
+
+# Approximate nearest-neighbour (IVF) shortlist for large indexes
+CODI_ANN = os.getenv("CODI_ANN", "auto")                          # auto | on | off
+CODI_ANN_MIN_FILES = int(os.getenv("CODI_ANN_MIN_FILES", "20000"))  # "auto" threshold
+CODI_ANN_SHORTLIST = int(os.getenv("CODI_ANN_SHORTLIST", "1000"))  # candidates rescored
+CODI_ANN_NPROBE = int(os.getenv("CODI_ANN_NPROBE", "16"))          # inverted lists probed
+
+# Re-ranking along related_files (graph.py; weight 0 = flat ranking)
+CODI_GRAPH_WEIGHT = float(os.getenv("CODI_GRAPH_WEIGHT", "1.0"))   # score gained per unit of mass
+CODI_GRAPH_SEEDS = int(os.getenv("CODI_GRAPH_SEEDS", "10"))        # top matches that spread score
+CODI_GRAPH_HOPS = int(os.getenv("CODI_GRAPH_HOPS", "2"))           # hops along related_files
+CODI_GRAPH_ALPHA = float(os.getenv("CODI_GRAPH_ALPHA", "0.5"))     # mass kept back at each hop
+
+# Embedding stage (sentence-transformers on CPU)
+CODI_EMBED_BATCH = int(os.getenv("CODI_EMBED_BATCH", "64"))       # texts per model.encode batch
+CODI_EMBED_THREADS = int(os.getenv("CODI_EMBED_THREADS", "0"))    # torch CPU threads (0 = torch default)
+CODI_EMBED_DTYPE = os.getenv("CODI_EMBED_DTYPE", "float32")       # stored vectors: float32 | float16 | int8
+
+# Disk-backed LLM response cache (.codi/cache/llm.sqlite)
+CODI_CACHE_MAX_MB = int(os.getenv("CODI_CACHE_MAX_MB", "512"))
+CODI_CACHE_MAX_AGE_DAYS = int(os.getenv("CODI_CACHE_MAX_AGE_DAYS", "30"))
+
+# Saved tasks (.codi/tasks.db) keep only the best matches, as index references
+CODI_TASK_TOP_K = int(os.getenv("CODI_TASK_TOP_K", "20"))
+
+# `codi context` (a task's matched code packed for an agent prompt)
+CODI_CONTEXT_TOKENS = int(os.getenv("CODI_CONTEXT_TOKENS", "100000"))   # budget, est. bytes / 4
+
+# Federated queries across registered projects (`codi projects`, `codi task --project`)
+CODI_PROJECTS = os.getenv("CODI_PROJECTS", os.path.join("~", ".codi", "projects.json"))   # registry
+CODI_FEDERATION_WORKERS = int(os.getenv("CODI_FEDERATION_WORKERS", "16"))  # projects scored at once
+
+# `codi serve` daemon (the chosen port is published in .codi/serve.json)
+CODI_SERVE_HOST = os.getenv("CODI_SERVE_HOST", "127.0.0.1")
+CODI_SERVE_PORT = int(os.getenv("CODI_SERVE_PORT", "0"))          # 0 = any free port
+
+# `--profile` / `--trace` (stage timings of one `codi init` / `codi task` run)
+CODI_PROFILE_MAX_EVENTS = int(os.getenv("CODI_PROFILE_MAX_EVENTS", "500000"))  # spans kept for --trace
+
+# `codi watch`
+CODI_WATCH_DEBOUNCE = float(os.getenv("CODI_WATCH_DEBOUNCE", "0.5"))   # quiet seconds before re-indexing
+CODI_WATCH_MAX_DELAY = float(os.getenv("CODI_WATCH_MAX_DELAY", "5"))   # max seconds a burst is held back
+CODI_WATCH_POLL = float(os.getenv("CODI_WATCH_POLL", "2"))             # polling fallback interval
+
 
 SKIP_DIRS = {
     # Codi
@@ -0,0 +1,258 @@
+import mmap
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from codi.logic.index_store import IndexReader
+from codi.logic.federation import PROJECT_SEPARATOR
+from codi.logic.local_extractor import split_identifier
+from codi.logic.profiler import profiler
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+#
+# `codi context --id <task>` packs the code a saved task matched into one
+# prompt-sized text:
+#
+#   1. the task's matches (best first), then — with `related` — the
+#      related_files of those matches fill whatever budget is left
+#   2. a file that fits its share of the budget goes in whole; a bigger one
+#      contributes line ranges recorded at index time: the matched chunk,
+#      then symbols whose names share words with the task keywords, then
+#      the remaining symbols in file order
+#   3. only the selected byte ranges are read (mmap) and written out as
+#      they are read
+#
+# A federated task (`codi task --project`) matched "<project>:<path>" files:
+# those are read through the registered project's own index and root.
+#
+# Tokens are estimated like everywhere else in CODI (bytes / 4).
+
+FILE_SHARE = 4          # one file takes at most 1/FILE_SHARE of the budget
+
+SECTION_HEADER = "===== FILE: {path}{where} =====\n"
+HEADER_TOKENS = 25      # estimated cost of one section header
+
+
+# ============================================================
+# Line → Byte Offsets
+# ============================================================
+
+class LineLocator:
+    """
+    Byte offset of line starts in a mapped file, found by scanning newlines
+    lazily — only up to the highest line asked for.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.starts = [0]
+
+    def offset(self, line: int) -> int:
+        """Byte offset where 1-based `line` starts (file size past the last line)."""
+        while len(self.starts) < line:
+            newline = self.view.find(b"\n", self.starts[-1])
+            if newline < 0:
+                return len(self.view)
+            self.starts.append(newline + 1)
+        return self.starts[line - 1]
+
+    def span(self, start_line: int, end_line: int) -> Tuple[int, int]:
+        return self.offset(start_line), self.offset(end_line + 1)
+
+
+def open_view(path: Path):
+    """Read-only mmap of a file (None for missing or empty files)."""
+    try:
+        with path.open("rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+# ============================================================
+# Planning
+# ============================================================
+
+def keyword_words(keywords: List[str]) -> Set[str]:
+    return {word for keyword in keywords for word in split_identifier(keyword.replace(" ", "_"))}
+
+
+def split_project(file: str, reader: IndexReader, projects: Dict[str, Tuple[IndexReader, Path]]) -> Tuple[Optional[str], str]:
+    """(project, path in its index) for a "<project>:<path>" match, else (None, file)."""
+    if file not in reader:
+        name, separator, path = file.partition(PROJECT_SEPARATOR)
+        if separator and name in projects:
+            return name, path
+    return None, file
+
+
+def candidate_files(task: Dict[str, Any], reader: IndexReader, root: Path, related: bool,
+                    projects: Optional[Dict[str, Tuple[IndexReader, Path]]] = None
+                    ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], str, Path]]:
+    """
+    (index entry, match, display path, file to read) in packing order;
+    related files get a match without score. `projects` maps a federated
+    task's project names to (reader, root).
+    """
+    projects = projects or {}
+    seen = set()
+    entries = []
+    for match in task["matches"]:
+        project, path = split_project(match["file"], reader, projects)
+        source_reader, source_root = projects[project] if project else (reader, root)
+        entry = source_reader.get(path)
+        if entry is not None and match["file"] not in seen:
+            seen.add(match["file"])
+            entries.append((entry, project, source_reader, source_root))
+            yield entry, match, match["file"], source_root / path
+
+    if not related:
+        return
+    for entry, project, source_reader, source_root in entries:
+        prefix = f"{project}{PROJECT_SEPARATOR}" if project else ""
+        for path in entry.get("related_files", []):
+            if prefix + path in seen or path not in source_reader:
+                continue
+            seen.add(prefix + path)
+            yield source_reader.get(path), {"file": prefix + path, "related": prefix + entry["path"]}, \
+                prefix + path, source_root / path
+
+
+def ranked_ranges(entry: Dict[str, Any], match: Dict[str, Any], words: Set[str]) -> List[Tuple[int, int, str]]:
+    """(start line, end line, label) in the order a partial file should take them."""
+    ranges = []
+    chunk = match.get("chunk")
+    if chunk:
+        ranges.append((chunk["start_line"], chunk["end_line"], chunk["name"]))
+
+    symbols = entry.get("symbols", [])
+    overlap = [len(words.intersection(split_identifier(symbol["name"]))) for symbol in symbols]
+    order = sorted(range(len(symbols)), key=lambda i: (-overlap[i], symbols[i]["start_line"]))
+    ranges.extend((symbols[i]["start_line"], symbols[i]["end_line"], symbols[i]["name"]) for i in order)
+    return ranges
+
+
+def select_ranges(view, ranges: List[Tuple[int, int, str]], budget: int) -> List[Tuple[int, int, int, int, str]]:
+    """
+    Take ranges in order while they fit `budget` tokens, skipping ones
+    already covered (e.g. a method inside a selected class). Returns
+    (start byte, end byte, start line, end line, label) in file order,
+    overlapping or nearly adjacent ranges merged.
+    """
+    locator = LineLocator(view)
+    selected = []
+    used = 0
+
+    for start_line, end_line, label in ranges:
+        if any(s <= start_line and end_line <= e for _, _, s, e, _ in selected):
+            continue
+        start, end = locator.span(start_line, end_line)
+        cost = HEADER_TOKENS + (end - start) // 4
+        if end <= start or used + cost > budget:
+            continue
+        selected.append((start, end, start_line, end_line, label))
+        used += cost
+
+    # Join neighbours whose gap costs less than the header it saves
+    merged = []
+    for section in sorted(selected):
+        if merged and section[0] - merged[-1][1] <= HEADER_TOKENS * 4:
+            start, end, start_line, end_line, label = merged[-1]
+            if section[1] > end:
+                first = label.split("..")[0]
+                end, end_line, label = section[1], section[3], f"{first}..{section[4]}"
+            merged[-1] = (start, end, start_line, end_line, label)
+        else:
+            merged.append(section)
+    return merged
+
+
+def head_range(view, budget: int) -> List[Tuple[int, int, int, int, str]]:
+    """The first lines of a file with no usable symbols, up to `budget` tokens."""
+    end = view.rfind(b"\n", 0, max(budget - HEADER_TOKENS, 0) * 4) + 1
+    if not end:
+        return []
+    return [(0, end, 1, view[:end].count(b"\n"), "head")]
+
+
+def plan_context(task: Dict[str, Any], reader: IndexReader, root: Path, budget: int,
+                 related: bool = True, projects: Optional[Dict[str, Tuple[IndexReader, Path]]] = None
+                 ) -> List[Dict[str, Any]]:
+    """
+    Files to emit, in order: {"path", "source", "score", "related",
+    "sections", "tokens"}; sections as returned by select_ranges, or one
+    (0, size, None, None, None) for a whole file.
+    """
+    words = keyword_words(task.get("keywords", []))
+    share = max(budget // FILE_SHARE, 1)
+    plan, used = [], 0
+
+    with profiler.span("context.plan", budget=budget):
+        for entry, match, label, path in candidate_files(task, reader, root, related, projects):
+            remaining = budget - used
+            if remaining <= HEADER_TOKENS:
+                break
+
+            try:
+                size = path.stat().st_size
+            except OSError:
+                continue
+            if not size:
+                continue
+
+            whole = HEADER_TOKENS + size // 4
+            if whole <= min(remaining, share):
+                sections, tokens = [(0, size, None, None, None)], whole
+            else:
+                view = open_view(path)
+                if view is None:
+                    continue
+                with view:
+                    sections = select_ranges(view, ranked_ranges(entry, match, words), min(remaining, share)) \
+                        or head_range(view, min(remaining, share))
+                if not sections:
+                    continue
+                tokens = sum(HEADER_TOKENS + (end - start) // 4 for start, end, _, _, _ in sections)
+
+            plan.append({"path": label, "source": path, "score": match.get("score"), "related": match.get("related"),
+                         "sections": sections, "tokens": tokens})
+            used += tokens
+
+    return plan
+
+
+# ============================================================
+# Streaming Output
+# ============================================================
+
+def section_header(item: Dict[str, Any], start_line: Optional[int], end_line: Optional[int],
+                   label: Optional[str]) -> str:
+    where = f" L{start_line}-{end_line} ({label})" if label is not None else ""
+    if item.get("score") is not None:
+        where += f" score={item['score']}"
+    elif item.get("related"):
+        where += f" related_to={item['related']}"
+    return SECTION_HEADER.format(path=item["path"], where=where)
+
+
+def iter_context(task_id: str, task: Dict[str, Any], plan: List[Dict[str, Any]]) -> Iterator[bytes]:
+    """The packed context, one piece at a time (selected byte ranges only)."""
+    tokens = sum(item["tokens"] for item in plan)
+    yield (f"# Task {task_id}: {task.get('description', '')}\n"
+           f"# Keywords: {', '.join(task.get('keywords', []))}\n"
+           f"# {len(plan)} files, ~{tokens} tokens\n\n").encode()
+
+    with profiler.span("context.emit", files=len(plan)):
+        for item in plan:
+            view = open_view(item["source"])
+            if view is None:
+                continue
+            with view:
+                for start, end, start_line, end_line, label in item["sections"]:
+                    end = min(end, len(view))
+                    yield section_header(item, start_line, end_line, label).encode()
+                    piece = view[start:end]
+                    yield piece if piece.endswith(b"\n") else piece + b"\n"
+                    yield b"\n"
@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import typer
+
+from codi.constants import CODI_VERSION, CODI_TASK_TOP_K
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+#
+# `codi serve` keeps the embedding model, the index (memory-mapped, rows
+# parsed on demand) and vectors warm and answers over localhost HTTP:
+#
+#   GET  /health                      {"version", "pid", "files", "reloads"}
+#   GET  /file?path=src/a.py          index entry for one path
+#   POST /query {"keywords" | "description", "limit"}   top matches, not stored
+#   POST /task  {"id", "description", "keywords", "limit"}   score + save to tasks.db
+#
+# .codi/serve.json {"host", "port", "pid"} tells clients where it listens.
+
+PORT_FILE = "serve.json"
+
+# Files whose mtime change triggers a reload (index store, legacy index,
+# vectors, ANN index)
+WATCHED_FILES = ("index.meta.json", "index.json", "embeddings.json",
+                 "chunk_embeddings.json", "ann.npz")
+
+HEALTH_TIMEOUT = 0.3        # seconds; a dead port file must not slow `codi task`
+REQUEST_TIMEOUT = 60
+RELOAD_RETRY = 1.0          # seconds between attempts while `codi init` is mid-write
+
+
+# ============================================================
+# Client
+# ============================================================
+
+def daemon_url(codi_dir: Path) -> Optional[str]:
+    """Base URL of a live daemon for this project, or None."""
+    try:
+        with (codi_dir / PORT_FILE).open() as f:
+            info = json.load(f)
+        url = f"http://{info['host']}:{info['port']}"
+        with urllib.request.urlopen(url + "/health", timeout=HEALTH_TIMEOUT) as response:
+            health = json.load(response)
+    except (OSError, ValueError, KeyError):
+        return None
+
+    return url if health.get("pid") == info.get("pid") else None
+
+
+def daemon_request(url: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """GET (no payload) or POST JSON; raises OSError on any transport failure."""
+    data = None if payload is None else json.dumps(payload).encode()
+    request = urllib.request.Request(url + path, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+        return json.load(response)
+
+
+# ============================================================
+# Hot-reloading Index State
+# ============================================================
+
+class IndexState:
+    """
+    The current WarmIndex, swapped for a new one when any watched file
+    changes. While `codi init` is between writing the index and its vectors
+    the old index keeps being served. Also used per project by federated
+    queries (federation.py), with `announce` off.
+    """
+
+    def __init__(self, codi_dir: Path, announce: bool = True):
+        self.codi_dir = codi_dir
+        self.announce = announce
+        self.signature: Optional[Tuple] = None
+        self.warm = None
+        self.reloads = 0
+        self.next_attempt = 0.0
+        self.lock = threading.Lock()
+
+    def current_signature(self) -> Tuple:
+        signature = []
+        for name in WATCHED_FILES:
+            try:
+                signature.append((name, (self.codi_dir / name).stat().st_mtime_ns))
+            except FileNotFoundError:
+                pass
+        return tuple(signature)
+
+    def current(self):
+        signature = self.current_signature()
+        if signature != self.signature and time.monotonic() >= self.next_attempt:
+            with self.lock:
+                if signature != self.signature:
+                    self.reload(signature)
+        return self.warm
+
+    def reload(self, signature: Tuple):
+        from codi.logic.index_store import IndexReader, load_entries
+        from codi.logic.task_processor import WarmIndex
+
+        reader = IndexReader.open(self.codi_dir)
+        index_data = reader if reader is not None else load_entries(self.codi_dir)
+        warm = WarmIndex.load(index_data, stored_only=self.warm is not None, codi_dir=self.codi_dir)
+        if warm is None:
+            self.next_attempt = time.monotonic() + RELOAD_RETRY
+            return
+
+        self.warm = warm
+        self.signature = signature
+        self.reloads += 1
+        if self.announce:
+            typer.echo(f"🔄 Index loaded: {len(warm.index_data)} files")
+
+
+# ============================================================
+# HTTP Server
+# ============================================================
+
+class CodiDaemon:
+    def __init__(self, codi_dir: Path, host: str, port: int):
+        self.codi_dir = codi_dir
+        self.state = IndexState(codi_dir)
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def warm_up(self):
+        """Load index + vectors and the embedding model before the first query."""
+        from codi.logic.embeddings import encode
+
+        self.state.current()
+        encode(["warm up"])
+
+    def publish(self):
+        host, port = self.server.server_address[:2]
+        tmp = self.codi_dir / (PORT_FILE + ".tmp")
+        tmp.write_text(json.dumps({"host": host, "port": port, "pid": os.getpid()}))
+        tmp.replace(self.codi_dir / PORT_FILE)
+
+    def unpublish(self):
+        path = self.codi_dir / PORT_FILE
+        try:
+            if json.loads(path.read_text()).get("pid") == os.getpid():
+                path.unlink()
+        except (OSError, ValueError):
+            pass
+
+    def serve_forever(self):
+        self.publish()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.unpublish()
+            self.server.server_close()
+
+    # --------------------------------------------------------
+    # Handlers
+    # --------------------------------------------------------
+
+    def health(self, query, body):
+        warm = self.state.warm
+        return 200, {
+            "version": CODI_VERSION,
+            "pid": os.getpid(),
+            "files": len(warm.index_data) if warm else 0,
+            "reloads": self.state.reloads,
+        }
+
+    def file(self, query, body):
+        warm = self.state.current()
+        path = query.get("path", [""])[0]
+        row = warm.rows.get(path)
+        if row is None:
+            return 404, {"error": f"not indexed: {path}"}
+        return 200, warm.index_data[row]
+
+    def query(self, query, body):
+        keywords = self.keywords(body)
+        matches = self.rank(keywords, int(body.get("limit", 10)))
+        return 200, {"keywords": keywords, "matches": matches}
+
+    def task(self, query, body):
+        from codi.logic.task_processor import save_task
+
+        if not body.get("id") or not body.get("description"):
+            return 400, {"error": "`id` and `description` are required"}
+
+        keywords = self.keywords(body)
+        matches = self.rank(keywords, CODI_TASK_TOP_K)
+        save_task(body["id"], body["description"], keywords, matches)
+        return 200, {"keywords": keywords, "matches": matches[:int(body.get("limit", 5))]}
+
+    def keywords(self, body):
+        if "keywords" in body:
+            return body["keywords"]
+        from codi.logic.task_processor import extract_keywords_from_ai
+        return extract_keywords_from_ai(body.get("description", ""))
+
+    def rank(self, keywords, limit=None):
+        from codi.logic.task_processor import rank_files
+        return rank_files(keywords, self.state.current(), limit)
+
+    def _handler(self):
+        daemon = self
+        routes = {
+            ("GET", "/health"): daemon.health,
+            ("GET", "/file"): daemon.file,
+            ("POST", "/query"): daemon.query,
+            ("POST", "/task"): daemon.task,
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def dispatch(self, method: str):
+                url = urlparse(self.path)
+                route = routes.get((method, url.path.rstrip("/")))
+                if route is None:
+                    self.send_error(404)
+                    return
+
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                    status, payload = route(parse_qs(url.query), body)
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self.dispatch("GET")
+
+            def do_POST(self):
+                self.dispatch("POST")
+
+        return Handler
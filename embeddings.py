@@ -0,0 +1,306 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from codi.logic.profiler import profiler, profiled
+from codi.logic.index_store import IndexReader
+from codi.constants import CODI_EMBED_BATCH, CODI_EMBED_THREADS, CODI_EMBED_DTYPE
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+EMBEDDINGS_NAME = "embeddings"                 # .codi/embeddings.npy + .json
+CHUNK_EMBEDDINGS_NAME = "chunk_embeddings"     # .codi/chunk_embeddings.npy + .json
+
+# On-disk vector formats; int8 adds <name>.scale.npy (one float32 per row).
+# Loaded matrices are always float32.
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+_model = None
+_model_lock = threading.Lock()
+
+
+# ============================================================
+# Lazy Model Access
+# ============================================================
+
+def get_model():
+    """
+    Load the SentenceTransformer on first use. torch / sentence_transformers
+    are only imported here, so commands that never embed start instantly.
+    """
+    global _model
+    with _model_lock:
+        if _model is None:
+            with profiler.span("embed.model_load"):
+                from sentence_transformers import SentenceTransformer
+                if CODI_EMBED_THREADS > 0:
+                    import torch
+                    torch.set_num_threads(CODI_EMBED_THREADS)
+                _model = SentenceTransformer(MODEL_NAME)
+        return _model
+
+
+# ============================================================
+# Embedding Text
+# ============================================================
+
+def semantic_fields(semantic):
+    """Merge semantic metadata fields into one large list of strings."""
+    return (
+        semantic.get("keywords", []) +
+        semantic.get("capabilities", []) +
+        semantic.get("side_effects", []) +
+        semantic.get("inputs", []) +
+        semantic.get("outputs", []) +
+        semantic.get("risks", []) +
+        semantic.get("patterns", [])
+    )
+
+
+def file_embedding_text(entry: Dict[str, Any]) -> str:
+    """The text a file is embedded from: semantic fields + function names."""
+    return " ".join(semantic_fields(entry.get("semantic", {})) + entry.get("functions", []))
+
+
+# ============================================================
+# Encoding
+# ============================================================
+
+def encode(texts: List[str], batch_size: int = CODI_EMBED_BATCH) -> np.ndarray:
+    """
+    Encode texts → L2-normalised float32 matrix, so cosine == dot product.
+    Texts are sorted by length and encoded `batch_size` at a time, so each
+    batch pads to similar lengths; rows come back in input order.
+    """
+    model = get_model()
+    vectors = np.zeros((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    batch_size = max(batch_size, 1)
+
+    with profiler.span("embed.encode", texts=len(texts)):
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            vectors[rows] = model.encode(
+                [texts[i] for i in rows], batch_size=batch_size,
+                convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False,
+            )
+    return vectors
+
+
+def embed_rows(items, reuse: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    items: (reuse key, entry) per matrix row. Rows whose key is in `reuse`
+    are copied; the rest are encoded in one call. The model is only loaded
+    when something actually needs encoding.
+    """
+    pending_rows, pending_texts, copied = [], [], []
+    for row, (key, entry) in enumerate(items):
+        vector = reuse.get(key)
+        if vector is not None:
+            copied.append((row, vector))
+            continue
+
+        text = file_embedding_text(entry)
+        if text:
+            pending_rows.append(row)
+            pending_texts.append(text)
+
+    encoded = encode(pending_texts) if pending_texts else None
+    if encoded is not None:
+        dim = encoded.shape[1]
+    elif copied:
+        dim = len(copied[0][1])
+    else:
+        dim = get_model().get_sentence_embedding_dimension()
+
+    matrix = np.zeros((len(items), dim), dtype=np.float32)
+    for row, vector in copied:
+        matrix[row] = vector
+    if encoded is not None:
+        matrix[pending_rows] = encoded
+    return matrix
+
+
+def compute_file_embeddings(entries: List[Dict[str, Any]],
+                            reuse: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+    """
+    One row per index entry (same order). Rows for paths in `reuse` are
+    copied instead of re-encoded; files with no semantic text get a zero row.
+    """
+    return embed_rows([(entry["path"], entry) for entry in entries], reuse or {})
+
+
+# ============================================================
+# Chunk Embeddings (large files split by chunker.py)
+# ============================================================
+
+def chunked_entries(entries: List[Dict[str, Any]]):
+    """(row, entry) for entries with chunks; an IndexReader parses just those rows."""
+    if isinstance(entries, IndexReader) and entries.chunked is not None:
+        return [(row, entries[row]) for row in entries.chunked]
+    return [(row, entry) for row, entry in enumerate(entries) if entry.get("chunks")]
+
+
+def iter_chunks(entries: List[Dict[str, Any]]):
+    """Yield (file row, chunk key, chunk) in chunk-matrix row order."""
+    for row, entry in chunked_entries(entries):
+        for i, chunk in enumerate(entry["chunks"]):
+            yield row, f"{entry['path']}#{i}", chunk
+
+
+def chunk_owners(entries: List[Dict[str, Any]]) -> np.ndarray:
+    """File row owning each chunk row."""
+    return np.fromiter((row for row, _, _ in iter_chunks(entries)), dtype=np.int64)
+
+
+def compute_chunk_embeddings(entries: List[Dict[str, Any]],
+                             reuse: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+    """One row per chunk; rows keyed "path#i" in `reuse` are copied."""
+    return embed_rows([(key, chunk) for _, key, chunk in iter_chunks(entries)], reuse or {})
+
+
+# ============================================================
+# Storage (.codi/<name>.npy + <name>.json)
+# ============================================================
+
+def paths_digest(entries: List[Dict[str, Any]]) -> str:
+    """Fingerprint of the index row order, used to detect a stale matrix."""
+    paths = entries.paths if isinstance(entries, IndexReader) else (entry["path"] for entry in entries)
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(path.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def chunks_digest(entries: List[Dict[str, Any]]) -> str:
+    """Fingerprint of the chunk row order."""
+    h = hashlib.sha256()
+    for _, key, chunk in iter_chunks(entries):
+        h.update(f"{key}:{chunk.get('start_line')}-{chunk.get('end_line')}".encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def quantize(matrix: np.ndarray, dtype: str):
+    """(stored array, per-row scales or None) for one of STORAGE_DTYPES."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dtype == "float16":
+        return matrix.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(matrix).max(axis=1, initial=0.0) / 127
+        scales[scales == 0] = 1
+        return np.round(matrix / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    return matrix, None
+
+
+def dequantize(stored: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    if scales is not None:
+        return stored.astype(np.float32) * scales[:, None]
+    return stored.astype(np.float32, copy=False)
+
+
+def save_array(path: Path, array: np.ndarray):
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        np.save(f, array)
+    tmp.replace(path)
+
+
+@profiled("embed.save")
+def save_matrix(codi_dir: Path, name: str, matrix: np.ndarray, digest: str,
+                dtype: str = CODI_EMBED_DTYPE):
+    """Persist a matrix (stored as `dtype`) + its meta (model, shape, row digest) atomically."""
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"CODI_EMBED_DTYPE must be one of {', '.join(STORAGE_DTYPES)}, not {dtype!r}")
+
+    stored, scales = quantize(matrix, dtype)
+    save_array(codi_dir / f"{name}.npy", stored)
+    if scales is not None:
+        save_array(codi_dir / f"{name}.scale.npy", scales)
+    else:
+        (codi_dir / f"{name}.scale.npy").unlink(missing_ok=True)
+
+    meta = {
+        "model": MODEL_NAME,
+        "rows": int(stored.shape[0]),
+        "dim": int(stored.shape[1]),
+        "dtype": dtype,
+        "paths": digest,
+    }
+    (codi_dir / f"{name}.json").write_text(json.dumps(meta))
+
+
+@profiled("embed.load")
+def load_matrix(codi_dir: Path, name: str, digest: str, rows: int) -> Optional[np.ndarray]:
+    """
+    A stored matrix as float32 — memory-mapped when stored as float32,
+    decoded otherwise; None if missing or built for other rows.
+    """
+    matrix_path = codi_dir / f"{name}.npy"
+    meta_path = codi_dir / f"{name}.json"
+
+    if not matrix_path.exists() or not meta_path.exists():
+        return None
+
+    try:
+        meta = json.loads(meta_path.read_text())
+        dtype = meta.get("dtype", "float32")
+        if dtype == "float32":
+            matrix = np.load(matrix_path, mmap_mode="r")
+        else:
+            scales = np.load(codi_dir / f"{name}.scale.npy") if dtype == "int8" else None
+            matrix = dequantize(np.load(matrix_path), scales)
+    except Exception:
+        return None
+
+    if meta.get("model") != MODEL_NAME or meta.get("paths") != digest:
+        return None
+    if matrix.shape[0] != rows:
+        return None
+
+    return matrix
+
+
+def save_embeddings(codi_dir: Path, entries: List[Dict[str, Any]], matrix: np.ndarray):
+    """Persist the file matrix (row i ↔ index entry i)."""
+    save_matrix(codi_dir, EMBEDDINGS_NAME, matrix, paths_digest(entries))
+
+
+def load_embeddings(codi_dir: Path, entries: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+    return load_matrix(codi_dir, EMBEDDINGS_NAME, paths_digest(entries), len(entries))
+
+
+def save_chunk_embeddings(codi_dir: Path, entries: List[Dict[str, Any]], matrix: np.ndarray):
+    """Persist the chunk matrix (row order of iter_chunks)."""
+    save_matrix(codi_dir, CHUNK_EMBEDDINGS_NAME, matrix, chunks_digest(entries))
+
+
+def load_chunk_embeddings(codi_dir: Path, entries: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+    chunked = chunked_entries(entries)
+    rows = sum(len(entry["chunks"]) for _, entry in chunked)
+    return load_matrix(codi_dir, CHUNK_EMBEDDINGS_NAME, chunks_digest(entries), rows)
+
+
+def embeddings_by_path(codi_dir: Path, entries: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Previous run's file + chunk vectors keyed by path / "path#i" (incremental re-indexing)."""
+    vectors = {}
+
+    matrix = load_embeddings(codi_dir, entries)
+    if matrix is not None:
+        vectors.update((entry["path"], np.array(matrix[row])) for row, entry in enumerate(entries))
+
+    chunk_matrix = load_chunk_embeddings(codi_dir, entries)
+    if chunk_matrix is not None:
+        vectors.update((key, np.array(chunk_matrix[i])) for i, (_, key, _) in enumerate(iter_chunks(entries)))
+
+    return vectors
@@ -0,0 +1,146 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from codi.constants import CODI_PROJECTS, CODI_FEDERATION_WORKERS
+from codi.logic.daemon import IndexState
+from codi.logic.index_store import has_index
+from codi.logic.profiler import profiler
+from codi.logic.utils import load_json, save_json
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+#
+# CODI_PROJECTS (default ~/.codi/projects.json) registers indexed projects:
+#
+#   {"billing": "/src/billing", "auth": "/src/auth", ...}
+#
+# `codi task --project billing --project auth` (or --all-projects) scores a
+# story against each project's index in parallel and keeps one global top
+# k. Match paths become "<project>:<path>".
+
+PROJECT_SEPARATOR = ":"
+
+
+# ============================================================
+# Registry
+# ============================================================
+
+def registry_path() -> Path:
+    return Path(CODI_PROJECTS).expanduser()
+
+
+def load_projects() -> Dict[str, str]:
+    """Registered projects, name → absolute root."""
+    return load_json(registry_path())
+
+
+def register_project(name: str, root: Path) -> Path:
+    """Add or update a project; its root must already have a CODI index."""
+    if not name or PROJECT_SEPARATOR in name:
+        raise ValueError(f"Project name must be non-empty and not contain {PROJECT_SEPARATOR!r}")
+    root = root.expanduser().resolve()
+    if not has_index(root / ".codi"):
+        raise ValueError(f"No index in {root} — run `codi init` there first")
+
+    projects = load_projects()
+    projects[name] = str(root)
+    registry_path().parent.mkdir(parents=True, exist_ok=True)
+    save_json(registry_path(), projects)
+    return root
+
+
+def unregister_project(name: str) -> bool:
+    projects = load_projects()
+    if projects.pop(name, None) is None:
+        return False
+    save_json(registry_path(), projects)
+    return True
+
+
+def resolve_projects(names: List[str]) -> Dict[str, Path]:
+    """name → root for `names` (every registered project when empty)."""
+    projects = load_projects()
+    unknown = [name for name in names if name not in projects]
+    if unknown:
+        raise ValueError(f"Unknown project(s): {', '.join(unknown)} (see `codi projects list`)")
+    return {name: Path(projects[name]) for name in (names or projects)}
+
+
+# ============================================================
+# Warm Project Indexes
+# ============================================================
+#
+# One IndexState per project root for the life of the process: a project
+# whose index files are unchanged keeps its memory-mapped WarmIndex, a
+# re-indexed one is reloaded on its next query.
+
+_states: Dict[Path, IndexState] = {}
+_states_lock = threading.Lock()
+
+
+def project_state(root: Path) -> IndexState:
+    with _states_lock:
+        if root not in _states:
+            _states[root] = IndexState(root / ".codi", announce=False)
+        return _states[root]
+
+
+# ============================================================
+# Fan-out Query
+# ============================================================
+
+def prefixed(project: str, match: Dict[str, Any]) -> Dict[str, Any]:
+    """A project's match with project-qualified paths."""
+    match = dict(match, project=project, file=f"{project}{PROJECT_SEPARATOR}{match['file']}")
+    match["related_files"] = [f"{project}{PROJECT_SEPARATOR}{path}" for path in match.get("related_files", [])]
+    return match
+
+
+def rank_project(project: str, root: Path, task_keywords: List[str], task_vector, limit: int) -> List[Dict[str, Any]]:
+    from codi.logic.task_processor import rank_files
+
+    with profiler.span("federation.project", project=project):
+        warm = project_state(root).current()
+        if warm is None or not len(warm.index_data):
+            return []
+        return [prefixed(project, match) for match in rank_files(task_keywords, warm, limit, task_vector)]
+
+
+def rank_projects(task_keywords: List[str], projects: Dict[str, Path], limit: int,
+                  workers: int = CODI_FEDERATION_WORKERS) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Global top `limit` over every project (best first, ties in project
+    order) and {project: error} for projects that could not be scored.
+    The task is encoded once; each project is ranked by its own worker.
+    """
+    from codi.logic.embeddings import encode
+
+    if not task_keywords or not projects:
+        return [], {}
+
+    task_vector = encode([" ".join(task_keywords)])[0]
+    names = list(projects)
+    errors: Dict[str, str] = {}
+
+    def run(name: str) -> List[Dict[str, Any]]:
+        try:
+            return rank_project(name, projects[name], task_keywords, task_vector, limit)
+        except Exception as e:
+            errors[name] = str(e)
+            return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as pool:
+        per_project = list(pool.map(run, names))
+
+    # Each list is already best-first: a k-way merge, not a full sort
+    ranked = heapq.merge(*(
+        [(-match["score"], order, i, match) for i, match in enumerate(matches)]
+        for order, matches in enumerate(per_project)
+    ))
+    return [match for _, _, _, match in itertools.islice(ranked, limit)], errors
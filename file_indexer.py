@@ -1,13 +1,50 @@
 import os
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
-import requests
+from typing import List, Dict, Any, Iterator, Optional, Set
 import typer
 
-from codi.logic.utils import is_text_file
-from codi.constants import SKIP_DIRS, SKIP_FILES
+from codi.logic.manifest import (
+    load_manifest,
+    save_manifest,
+    make_record,
+    is_stat_unchanged,
+    is_content_unchanged,
+)
+from codi.logic.llm_client import post_chat, usage
+from codi.logic.llm_cache import cached_completion, cache_summary, cache_lookup, cache_store
+from codi.logic.embeddings import (
+    compute_file_embeddings,
+    compute_chunk_embeddings,
+    embeddings_by_path,
+    save_embeddings,
+    load_embeddings,
+    save_chunk_embeddings,
+    paths_digest,
+)
+from codi.logic.chunker import split_into_chunks, merge_metadata
+from codi.logic.symbols import extract_symbols, symbol_names, public_symbol
+from codi.logic.ingest import PipelineStats, scan_project, run_pipeline, is_indexable
+from codi.logic.local_extractor import LOCAL_EXTRACTOR_VERSION, analyse, corpus_frequencies
+from codi.logic.profiler import profiler
+from codi.logic.ann import build_ann_index
+from codi.logic.scoring import build_scoring_index
+from codi.logic.graph import build_relation_graph
+from codi.logic.imports_graph import IMPORTS_FILE, import_specs, link_imports, save_import_graph
+from codi.logic.keyword_index import KeywordIndex, entries_digest
+from codi.logic.index_store import ENTRIES_FILE, LEGACY_FILE, load_entries, write_index, index_digest
+from codi.constants import (
+    AI_MAX_IN_FLIGHT,
+    AI_BATCH_TOKENS,
+    CODI_CHUNK_THRESHOLD,
+    CODI_CHUNK_MAX_CHARS,
+    CODI_SCAN_WORKERS,
+    CODI_READ_WORKERS,
+    CODI_INGEST_QUEUE,
+    CODI_EXTRACTOR,
+)
 
 
 # ============================================================
@@ -23,113 +60,510 @@ class MissingAPIKeyError(Exception):
 # Main Indexer
 # ============================================================
 
-def index_project():
+# Bump whenever build_keyword_prompt changes so cached metadata is re-extracted.
+PROMPT_VERSION = "1"
+
+
+def index_project(export_json: bool = False, batch_tokens: int = AI_BATCH_TOKENS,
+                  touched: Optional[Set[str]] = None, extractor: str = CODI_EXTRACTOR):
     """
-    Index all project text files:
-    - Extract semantic metadata (AI)
+    Incrementally index all project text files:
+    - Reuse metadata for files unchanged since the last run (manifest)
+    - Extract semantic metadata only for new/changed files, with the AI
+      model (small files packed batch_tokens per request when
+      batch_tokens > 0) or the offline "local" extractor
     - Extract functions/classes
-    - Detect related files via keyword similarity
+    - Split large files into function/class chunks with their own metadata
+    - Detect related files via keyword similarity (inverted keyword index)
+    - Link imports / requires / includes into a dependency graph (saved
+      to .codi/imports.json before extraction starts)
+    - Embed each file once (.codi/embeddings.npy)
+    - Stream entries into .codi/index.jsonl (index.json only with export_json)
+
+    `touched` (from `codi watch`): only these relative paths can have
+    changed, so the tree is not scanned and other files are not stat'ed.
     """
 
     root = Path(".").resolve()
     codi_folder = root / ".codi"
-    index_path = codi_folder / "index.json"
+    index_path = codi_folder / ENTRIES_FILE
+    manifest_path = codi_folder / "manifest.json"
+    keywords_path = codi_folder / "keywords.json"
 
     codi_folder.mkdir(exist_ok=True)
     typer.echo("🔍 CODI: Indexing project...\n")
 
-    files_data = collect_files_data(root)
-    create_file_relationships(files_data)
-    save_index(index_path, files_data)
+    extractor = get_extractor(extractor)
+    model = extractor.manifest_key()        # switching extractor / model re-extracts
+    usage.reset()
+    with profiler.span("manifest.load"):
+        manifest = load_manifest(manifest_path)
+    previous_entries = load_entries(codi_folder)
+    previous = {entry["path"]: entry for entry in previous_entries}
+
+    stats = PipelineStats()
+    if touched is None:
+        paths = scan_project(root, CODI_SCAN_WORKERS, stats)
+    else:
+        kept = {Path(path) for path in previous if path not in touched}
+        paths = sorted(kept | {Path(path) for path in touched if is_indexable(root, Path(path))})
+
+    def check(rel: Path):
+        """
+        Manifest check: (rel, record, reusable, import specs) — hashes only
+        if stat changed; specs (None when reusable) come from the same read.
+        """
+        key = str(rel)
+        file_path = root / rel
+        record = manifest.get(key)
+
+        if touched is not None and key not in touched and key in previous and record:
+            stats.stage("check").add()
+            return rel, record, True, None
+
+        if key in previous and is_stat_unchanged(record, file_path, PROMPT_VERSION, model):
+            stats.stage("check").add()
+            return rel, record, True, None
+
+        data = file_path.read_bytes()
+        stats.stage("check").add(1, len(data))
+        reusable = key in previous and is_content_unchanged(record, data, PROMPT_VERSION, model)
+        specs = None if reusable else import_specs(data.decode("utf-8", errors="ignore"), rel.suffix)
+        return rel, make_record(file_path, data, PROMPT_VERSION, model), reusable, specs
+
+    files_data = []
+    new_manifest = {}
+    to_extract = []
+    new_specs = {}
+
+    with profiler.span("manifest.check", files=len(paths)), \
+            ThreadPoolExecutor(max_workers=max(CODI_READ_WORKERS, 1)) as pool:
+        for rel, record, reusable, specs in pool.map(check, paths):
+            new_manifest[str(rel)] = record
+            if reusable:
+                files_data.append(previous[str(rel)])
+            else:
+                to_extract.append(rel)
+                new_specs[str(rel)] = specs
+
+    reused = len(files_data)
+    reused_paths = {entry["path"] for entry in files_data}
+    removed = len(set(previous) - set(new_manifest))
+
+    # Nothing new, changed or removed: keep every artifact as it is
+    unchanged = not to_extract and not removed and not export_json \
+        and all("import_specs" in entry for entry in files_data) and (codi_folder / IMPORTS_FILE).exists()
+    if unchanged and load_embeddings(codi_folder, previous_entries) is not None:
+        save_manifest(manifest_path, new_manifest)
+        typer.echo("✅ CODI: Index already up to date")
+        return
+
+    # Dependency graph first: it needs no metadata, so it is saved before the LLM pass
+    with profiler.span("imports.link", files=len(new_manifest)):
+        for entry in files_data:
+            if "import_specs" not in entry:         # indexed before imports were recorded
+                entry["import_specs"] = import_specs(
+                    (root / entry["path"]).read_text(errors="ignore"), Path(entry["path"]).suffix
+                )
+        links = sorted(
+            [{"path": entry["path"], "import_specs": entry["import_specs"]} for entry in files_data] +
+            [{"path": path, "import_specs": specs} for path, specs in new_specs.items()],
+            key=lambda link: link["path"],
+        )
+        edges = link_imports(links, root)
+        save_import_graph(codi_folder, links)
+    typer.echo(f"🔗 Import graph: {edges} edges")
+
+    with profiler.span("extract", files=len(to_extract)):
+        files_data.extend(extractor.collect(root, to_extract, batch_tokens, stats))
+    files_data.sort(key=lambda entry: entry["path"])
+
+    links = {link["path"]: link for link in links}
+    for entry in files_data:
+        link = links[entry["path"]]
+        entry["import_specs"], entry["imports"], entry["imported_by"] = \
+            link["import_specs"], link["imports"], link["imported_by"]
+
+    with profiler.span("relationships", files=len(files_data)):
+        keyword_index = KeywordIndex.load(keywords_path)
+        if keyword_index is None or keyword_index.digest != entries_digest(previous_entries):
+            keyword_index = create_file_relationships(files_data)
+        else:
+            changed = {str(rel) for rel in to_extract} | (set(previous) - set(new_manifest))
+            update_file_relationships(files_data, keyword_index, previous, changed)
+
+    keyword_index.digest = entries_digest(files_data)
+    save_index(codi_folder, files_data, export_json)
+    with profiler.span("keywords.save"):
+        keyword_index.save(keywords_path)
+    digest = index_digest(codi_folder)
+    with profiler.span("scoring.build"):
+        build_scoring_index(codi_folder, files_data, digest)
+    with profiler.span("graph.build"):
+        build_relation_graph(codi_folder, files_data, digest)
+
+    typer.echo("🧠 Computing embeddings...")
+    previous_vectors = embeddings_by_path(codi_folder, previous_entries)
+    reuse = {
+        key: vector for key, vector in previous_vectors.items()
+        if key.split("#", 1)[0] in reused_paths
+    }
+    vectors = compute_file_embeddings(files_data, reuse)
+    save_embeddings(codi_folder, files_data, vectors)
+    save_chunk_embeddings(codi_folder, files_data, compute_chunk_embeddings(files_data, reuse))
+    with profiler.span("ann.build"):
+        build_ann_index(codi_folder, vectors, paths_digest(files_data))
+
+    with profiler.span("manifest.save"):
+        save_manifest(manifest_path, new_manifest)
 
     typer.echo("\n✅ CODI: Indexing completed!")
+    if cache_summary():
+        typer.echo(cache_summary())
+    if usage.requests:
+        typer.echo(usage.summary(len(to_extract)))
+    typer.echo(f"♻️  Reused: {reused}  🔄 Re-extracted: {len(to_extract)}  🗑  Removed: {removed}")
+    typer.echo(stats.summary())
     typer.echo(f"📁 Saved: {index_path}")
+    if export_json:
+        typer.echo(f"📁 Exported: {codi_folder / LEGACY_FILE}")
+
+
+# ============================================================
+# Metadata Extractors
+# ============================================================
+#
+# An extractor turns paths into index entries (same `semantic` schema) via
+# collect(root, paths, batch_tokens, stats); manifest_key() is recorded per
+# file so that switching extractor or model re-extracts.
+
+LOCAL_BATCH = 32        # files per read → analyse unit
+
+
+class LLMExtractor:
+    """Metadata from the OpenAI-compatible model at AI_URL (the default)."""
+
+    def manifest_key(self) -> Optional[str]:
+        return os.getenv("AI_MODEL")
+
+    def collect(self, root: Path, paths: List[Path], batch_tokens: int,
+                stats: PipelineStats) -> List[Dict[str, Any]]:
+        return collect_files_data(root, paths, batch_tokens, stats)
+
+
+class LocalExtractor:
+    """
+    Offline metadata (local_extractor.py): identifiers, comments, imports
+    and TF-IDF keywords. Files are analysed as they are read; keywords are
+    picked once every file's terms are known.
+    """
+
+    def manifest_key(self) -> str:
+        return f"local:{LOCAL_EXTRACTOR_VERSION}"
+
+    def collect(self, root: Path, paths: List[Path], batch_tokens: int,
+                stats: PipelineStats) -> List[Dict[str, Any]]:
+        if not paths:
+            return []
+
+        batches = [paths[i:i + LOCAL_BATCH] for i in range(0, len(paths), LOCAL_BATCH)]
+        analysed = run_pipeline(
+            batches,
+            read=lambda batch: read_batch(root, batch, stats),
+            process=lambda parsed: [self.analyse(item, stats) for item in parsed],
+            readers=CODI_READ_WORKERS,
+            workers=1,                  # pure Python: more threads only contend for the GIL
+            queue_size=CODI_INGEST_QUEUE,
+        )
+        items = [item for batch in analysed for item in batch]
+        with profiler.span("extract.frequencies", files=len(items)):
+            frequencies = corpus_frequencies(root / ".codi", [item["terms"] for item in items])
+
+        entries = []
+        for item in items:
+            typer.echo(f"📄 Processed: {item['path']}" + (" (chunked)" if "chunks" in item else ""))
+            entries.append(self.entry(item, frequencies))
+        return entries
+
+    def analyse(self, item: Dict[str, Any], stats: PipelineStats) -> Dict[str, Any]:
+        """Parsed file → terms + keyword-less metadata (the file text is dropped here)."""
+        stats.stage("extract").begin()
+        suffix = Path(item["path"]).suffix
+        with profiler.span("extract.local"):
+            result = dict(analyse(item["content"], suffix, item["symbols"]),
+                          path=item["path"], symbols=item["symbols"], import_specs=item["import_specs"])
+
+            if "chunks" in item:
+                result["chunks"] = []
+                for chunk in item["chunks"]:
+                    symbols = [s for s in item["symbols"] if chunk["start_line"] <= s["start_line"] <= chunk["end_line"]]
+                    result["chunks"].append((chunk, analyse(chunk["text"], suffix, symbols)))
+
+        stats.stage("extract").add(1)
+        return result
+
+    def entry(self, item: Dict[str, Any], frequencies) -> Dict[str, Any]:
+        if "chunks" not in item:
+            metadata = dict(keywords=frequencies.keywords(item["terms"]), **item["semantic"])
+            return make_entry(item["path"], item["symbols"], metadata, item["import_specs"])
+
+        chunks = [
+            chunk_entry(chunk, dict(keywords=frequencies.keywords(analysis["terms"]), **analysis["semantic"]))
+            for chunk, analysis in item["chunks"]
+        ]
+        entry = make_entry(item["path"], item["symbols"], merge_metadata([chunk["semantic"] for chunk in chunks]),
+                           item["import_specs"])
+        entry["chunks"] = chunks
+        return entry
+
+
+EXTRACTORS = {
+    "llm": LLMExtractor,
+    "local": LocalExtractor,
+}
+
+
+def get_extractor(name: str):
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor {name!r} (choose from: {', '.join(EXTRACTORS)})")
+    return EXTRACTORS[name]()
 
 
 # ============================================================
 # Indexing Steps
 # ============================================================
 
-def collect_files_data(root: Path) -> List[Dict[str, Any]]:
-    """Walk the directory and extract static + AI metadata."""
-    
-    files_data = []
+def iter_project_files(root: Path) -> Iterator[Path]:
+    """
+    Yield indexable text files (relative to root), honouring SKIP_DIRS /
+    SKIP_FILES / .gitignore. The tree is scanned in parallel.
+    """
+
+    yield from scan_project(root, CODI_SCAN_WORKERS)
+
+
+def collect_files_data(root: Path, paths: Optional[List[Path]] = None,
+                       batch_tokens: int = 0, stats: Optional[PipelineStats] = None) -> List[Dict[str, Any]]:
+    """
+    Extract static + AI metadata for `paths` (default: walk the whole tree).
+
+    Pipelined: CODI_READ_WORKERS threads read + parse files into a queue of
+    at most CODI_INGEST_QUEUE batches, while up to AI_MAX_IN_FLIGHT threads
+    run the LLM requests. Output keeps the order of `paths`. With
+    batch_tokens > 0, small files share a request.
+    """
+
+    if paths is None:
+        paths = list(iter_project_files(root))
+
+    if not paths:
+        return []
+
+    stats = stats or PipelineStats()
+    batches = plan_batches(root, paths, batch_tokens) if batch_tokens > 0 else [[rel] for rel in paths]
+
+    results = run_pipeline(
+        batches,
+        read=lambda batch: read_batch(root, batch, stats),
+        process=lambda parsed: extract_batch_entries(parsed, stats),
+        readers=CODI_READ_WORKERS,
+        workers=min(AI_MAX_IN_FLIGHT, len(batches)),
+        queue_size=CODI_INGEST_QUEUE,
+    )
+    return [entry for entries in results for entry in entries]
+
+
+def plan_batches(root: Path, paths: List[Path], budget: int) -> List[List[Path]]:
+    """
+    Group consecutive small files until their estimated tokens reach
+    `budget`. Files bigger than half the budget (or chunked) go alone.
+    """
+
+    batches, current, used = [], [], 0
+
+    for rel in paths:
+        size = (root / rel).stat().st_size
+        tokens = size // 4
+        if tokens > budget // 2 or size > CODI_CHUNK_THRESHOLD:
+            batches.append([rel])
+            continue
+
+        if current and used + tokens > budget:
+            batches.append(current)
+            current, used = [], 0
+
+        current.append(rel)
+        used += tokens
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def read_batch(root: Path, batch: List[Path], stats: PipelineStats) -> List[Dict[str, Any]]:
+    """Ingestion stage: read + parse files (I/O and regex only, no network)."""
+
+    parsed = []
+    for rel in batch:
+        with profiler.span("read"):
+            data = (root / rel).read_bytes()
+            content = data.decode("utf-8", errors="ignore")
+        with profiler.span("parse.symbols"):
+            symbols = extract_symbols(content, rel.suffix)
+        with profiler.span("parse.imports"):
+            specs = import_specs(content, rel.suffix)
+        item = {"path": str(rel), "content": content, "symbols": [public_symbol(s) for s in symbols],
+                "import_specs": specs}
+
+        if len(content) > CODI_CHUNK_THRESHOLD:
+            with profiler.span("parse.chunks"):
+                boundaries = [(symbol["offset"], symbol["name"]) for symbol in symbols]
+                item["chunks"] = [
+                    dict(chunk, functions=symbol_names(
+                        [s for s in symbols if chunk["start_line"] <= s["start_line"] <= chunk["end_line"]]
+                    ))
+                    for chunk in split_into_chunks(content, boundaries, CODI_CHUNK_MAX_CHARS)
+                ]
+
+        parsed.append(item)
+        stats.stage("read").add(1, len(data))
+
+    return parsed
+
+
+def extract_batch_entries(parsed: List[Dict[str, Any]], stats: PipelineStats) -> List[Dict[str, Any]]:
+    """Extraction stage: LLM metadata for one parsed batch → index entries."""
+
+    stats.stage("extract").begin()
+
+    if len(parsed) == 1 and "chunks" in parsed[0]:
+        typer.echo(f"📄 Processed: {parsed[0]['path']} (chunked)")
+        with profiler.span("extract.llm", files=1, chunks=len(parsed[0]["chunks"])):
+            entries = [build_chunked_entry(parsed[0])]
+        stats.stage("extract").add(1)
+        return entries
+
+    contents = {item["path"]: item["content"] for item in parsed}
+    with profiler.span("extract.llm", files=len(parsed)):
+        if len(parsed) == 1:
+            metadata = {path: extract_keywords_from_ai(content) for path, content in contents.items()}
+        else:
+            metadata = extract_keywords_batch(contents)
+
+    entries = []
+    for item in parsed:
+        typer.echo(f"📄 Processed: {item['path']}")
+        entries.append(make_entry(item["path"], item["symbols"], metadata[item["path"]], item["import_specs"]))
+
+    stats.stage("extract").add(len(entries))
+    return entries
 
-    for path, dirs, files in os.walk(root):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
 
-        for filename in files:
-            if filename in SKIP_FILES:
-                continue
+def build_chunked_entry(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Large file: extract + store metadata per function/class chunk (bounded
+    request size), then aggregate the chunks into the file-level record.
+    """
 
-            file_path = Path(path) / filename
-            if not is_text_file(file_path):
-                continue
+    chunks = [chunk_entry(chunk, extract_keywords_from_ai(chunk["text"])) for chunk in item["chunks"]]
 
-            rel = file_path.relative_to(root)
-            typer.echo(f"📄 Processing: {rel}")
+    entry = make_entry(item["path"], item["symbols"], merge_metadata([chunk["semantic"] for chunk in chunks]),
+                       item["import_specs"])
+    entry["chunks"] = chunks
+    return entry
 
-            content = file_path.read_text(errors="ignore")
 
-            metadata = extract_keywords_from_ai(content)
+def chunk_entry(chunk: Dict[str, Any], metadata: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": chunk["name"],
+        "start_line": chunk["start_line"],
+        "end_line": chunk["end_line"],
+        "semantic": metadata,
+        "keywords": metadata.get("keywords", []),
+        "functions": chunk["functions"],
+    }
 
-            files_data.append({
-                "path": str(rel),
-                "semantic": metadata,              # NEW FULL METADATA OBJECT
-                "keywords": metadata.get("keywords", []),
-                "functions": extract_functions(content),
-                "related_files": []
-            })
 
-    return files_data
+def make_entry(path: str, symbols: List[Dict[str, Any]], metadata: Dict[str, Any],
+               specs: Optional[List[str]] = None) -> Dict[str, Any]:
+    return {
+        "path": path,
+        "semantic": metadata,              # NEW FULL METADATA OBJECT
+        "keywords": metadata.get("keywords", []),
+        "functions": symbol_names(symbols),
+        "symbols": symbols,                # [{"name", "kind", "start_line", "end_line"}]
+        "related_files": [],
+        "import_specs": specs or [],       # raw import targets (imports_graph.py)
+        "imports": [],                     # indexed paths this file imports
+        "imported_by": [],                 # indexed paths importing this file
+    }
 
 
 # ============================================================
 # File Relationship Builder
 # ============================================================
 
-def create_file_relationships(files_data: List[Dict[str, Any]]):
-    """Calculate file → related files using keyword similarity."""
+def create_file_relationships(files_data: List[Dict[str, Any]]) -> KeywordIndex:
+    """
+    Calculate file → related files using keyword similarity. Only pairs
+    that share a keyword (same posting list) are ever compared.
+    """
+
+    keyword_index = KeywordIndex.from_entries(files_data)
+    position = {file["path"]: i for i, file in enumerate(files_data)}
 
     for file in files_data:
-        for other in files_data:
-            if file["path"] == other["path"]:
-                continue
+        related = keyword_index.related(file["path"], file["keywords"])
+        file["related_files"] = sorted(related, key=position.__getitem__)
 
-            shared = len(set(file["keywords"]) & set(other["keywords"]))
-            if shared >= 2:
-                file["related_files"].append(other["path"])
+    return keyword_index
 
 
-def save_index(path: Path, data: List[Dict[str, Any]]):
-    """Save index.json cleanly."""
-    with path.open("w") as f:
-        json.dump(data, f, indent=2)
+def update_file_relationships(files_data: List[Dict[str, Any]], keyword_index: KeywordIndex,
+                              previous: Dict[str, Dict[str, Any]], changed: Set[str]):
+    """
+    Incrementally patch the keyword index for new/changed/removed paths and
+    recompute `related_files` only for files sharing a keyword with them.
+    Every other entry keeps the related_files it was loaded with.
+    """
 
+    current = {file["path"]: file for file in files_data}
+    affected = set(changed)
 
-# ============================================================
-# Function Extraction
-# ============================================================
+    for path in changed:
+        old = previous.get(path)
+        if old:
+            affected |= keyword_index.neighbours(old["keywords"])
+            keyword_index.remove(path, old["keywords"])
 
-def extract_functions(content: str) -> List[str]:
-    """Extract function, class, and method names for JS/Python/Java."""
+        new = current.get(path)
+        if new:
+            keyword_index.add(path, new["keywords"])
+            affected |= keyword_index.neighbours(new["keywords"])
 
-    patterns = [
-        r"\bfunction\s+([a-zA-Z_][a-zA-Z0-9_]*)",
-        r"([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*\([^)]*\)\s*=>",
-        r"\bexport function\s+([a-zA-Z_][a-zA-Z0-9_]*)",
-        r"\bclass\s+([A-Za-z_][A-Za-z0-9_]*)",
-        r"\bdef\s+([a-zA-Z_][a-zA-Z0-9_]*)",
-        r"(?:public|private|protected)\s+[a-zA-Z<>]+\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\("
-    ]
+    position = {file["path"]: i for i, file in enumerate(files_data)}
 
-    extracted = set()
+    for path in affected:
+        file = current.get(path)
+        if file is None:
+            continue
+        related = keyword_index.related(path, file["keywords"])
+        file["related_files"] = sorted(related, key=position.__getitem__)
 
-    for pattern in patterns:
-        for match in re.findall(pattern, content):
-            extracted.add(match if isinstance(match, str) else match[-1])
 
-    return list(extracted)
+def save_index(codi_folder: Path, data: List[Dict[str, Any]], export_json: bool = False):
+    """Stream entries to index.jsonl (atomic replace so a crash keeps the old index)."""
+    write_index(codi_folder, data, export_json)
+
+
+# ============================================================
+# Function Extraction
+# ============================================================
+
+def extract_functions(content: str, suffix: str = "") -> List[str]:
+    """Extract function, class, and method names (see symbols.py)."""
+    return symbol_names(extract_symbols(content, suffix))
 
 
 # ============================================================
@@ -140,11 +574,52 @@ def extract_keywords_from_ai(content: str) -> Dict[str, Any]:
     """Query AI model and extract structured metadata."""
     
     api_key, model, url = validate_ai_env()
-    prompt = build_keyword_prompt(content)
-    response = call_ai_api(api_key, model, url, prompt)
 
     # Return structured object (not just keywords)
-    return safe_json_extract_object(response)
+    return cached_completion(
+        model, url, f"index:{PROMPT_VERSION}", content,
+        complete=lambda: call_ai_api(api_key, model, url, build_keyword_prompt(content)),
+        parse=safe_json_extract_object,
+    )
+
+
+def extract_keywords_batch(contents: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Extract metadata for several files with one request. Cached files are
+    skipped; files missing from an unparseable batched answer fall back to
+    per-file requests.
+    """
+
+    api_key, model, url = validate_ai_env()
+    template = f"index:{PROMPT_VERSION}"
+
+    results, pending = {}, {}
+    for path, content in contents.items():
+        cached = cache_lookup(model, url, template, content)
+        if cached is not None:
+            results[path] = cached
+        else:
+            pending[path] = content
+
+    if len(pending) > 1:
+        response = call_ai_api(api_key, model, url, build_batch_keyword_prompt(pending))
+        batched = safe_json_extract_object(response)
+
+        for path, content in pending.items():
+            metadata = batched.get(path)
+            if isinstance(metadata, dict) and isinstance(metadata.get("keywords"), list):
+                results[path] = metadata
+                cache_store(model, url, template, content, json.dumps(metadata), metadata)
+
+    # Already looked up (and missed) above: request directly, don't count a second miss
+    for path, content in pending.items():
+        if path not in results:
+            profiler.count("llm.batch_fallbacks")
+            raw = call_ai_api(api_key, model, url, build_keyword_prompt(content))
+            results[path] = safe_json_extract_object(raw)
+            cache_store(model, url, template, content, raw, results[path])
+
+    return results
 
 
 def validate_ai_env():
@@ -206,28 +681,58 @@ CODE:
 """
 
 
-# ============================================================
-# AI Call
-# ============================================================
+def build_batch_keyword_prompt(contents: Dict[str, str]) -> str:
+    """Same metadata contract as build_keyword_prompt, for several files at once."""
 
-def call_ai_api(api_key: str, model: str, url: str, prompt: str) -> str:
-    """Send request to LLM and retrieve content."""
+    files = "\n".join(
+        f"===== FILE: {path} =====\n{content}\n"
+        for path, content in contents.items()
+    )
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
+    return f"""
+You are an expert software architect. Analyze EACH of the following files and extract **deep semantic metadata** per file.
 
-    payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.2
-    }
+🎯 GOAL  
+Describe WHAT each file does — not the syntax or framework.
+
+📌 OUTPUT (JSON ONLY)
+Return ONE JSON object whose keys are the exact file paths below, each value having EXACTLY this structure:
+
+{{
+  "<file path>": {{
+    "keywords": [],
+    "capabilities": [],
+    "side_effects": [],
+    "inputs": [],
+    "outputs": [],
+    "risks": [],
+    "patterns": [],
+    "data_entities": [],
+    "external_dependencies": []
+  }}
+}}
+
+⚠ RULES
+- ❌ No library/framework names (React, Express, Django, etc)
+- ❌ No trivial syntax terms (function, const, import, class, etc)
+- ✔ Use meaningful business logic verbs
+- ✔ Capture intent, behavior, purpose, domain actions
+- ✔ Analyze every file independently; include every path
+
+--------------------
+FILES:
+{files}
+--------------------
+"""
 
-    res = requests.post(url, headers=headers, json=payload, timeout=30)
-    res.raise_for_status()
 
-    return res.json()["choices"][0]["message"]["content"]
+# ============================================================
+# AI Call
+# ============================================================
+
+def call_ai_api(api_key: str, model: str, url: str, prompt: str) -> str:
+    """Send request to LLM and retrieve content (pooled, rate limited, retried)."""
+    return post_chat(api_key, model, url, prompt, temperature=0.2)
 
 
 # ============================================================
@@ -242,11 +747,13 @@ def safe_json_extract_object(text: str) -> Dict[str, Any]:
 
     match = re.search(r"\{[\s\S]*\}", text)
     if not match:
+        profiler.count("llm.json_parse_failures")
         return {"keywords": []}  # fallback
 
     try:
         return json.loads(match.group(0))
     except Exception:
+        profiler.count("llm.json_parse_failures")
         return {"keywords": []}  # fallback
 
 
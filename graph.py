@@ -0,0 +1,195 @@
+import math
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from codi.constants import CODI_GRAPH_WEIGHT, CODI_GRAPH_SEEDS, CODI_GRAPH_HOPS, CODI_GRAPH_ALPHA
+from codi.logic.scoring import round_like_python, top_matches
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+#
+# .codi/graph.npz   `related_files` plus static import edges (`imports` and
+#                   `imported_by`, imports_graph.py) as a CSR adjacency over
+#                   index rows, written by `codi init` and keyed by the index
+#                   store digest
+#
+# Re-ranking: the top CODI_GRAPH_SEEDS matches spread their scores along
+# related_files for CODI_GRAPH_HOPS hops (personalized PageRank truncated
+# to a few hops: each hop passes on 1 - CODI_GRAPH_ALPHA of the mass). A
+# node splits its mass over its out-edges by weight: the summed IDF of the
+# keywords the two files share, so a link through rare, specific keywords
+# carries more than one through words half the project uses. An import (in
+# either direction) weighs as much as sharing a keyword no other file has.
+# Every file's score then gains CODI_GRAPH_WEIGHT × the mass it received, so
+# a file tied to several strong matches surfaces even when it matches the
+# task words poorly.
+
+GRAPH_FILE = "graph.npz"
+
+MIN_MASS = 1e-4         # frontier nodes carrying less than this stop spreading
+
+
+# ============================================================
+# CSR Adjacency
+# ============================================================
+
+class RelationGraph:
+    """
+    Directed file graph over index rows: the neighbours of row r are
+    indices[indptr[r]:indptr[r + 1]], with transition weights (summing to
+    1 per row) in the same positions of `weights`.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray, digest: str = ""):
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.digest = digest
+        self.degrees = np.diff(indptr)
+
+    @classmethod
+    def from_entries(cls, entries: List[Dict[str, Any]], digest: str = "") -> "RelationGraph":
+        rows = {entry["path"]: row for row, entry in enumerate(entries)}
+        keywords = [{k.lower() for k in entry.get("keywords", [])} for entry in entries]
+        frequency = Counter(k for row in keywords for k in row)
+        idf = {k: math.log((1 + len(entries)) / count) for k, count in frequency.items()}
+
+        import_weight = math.log(1 + len(entries))
+
+        indptr = np.zeros(len(entries) + 1, dtype=np.int64)
+        indices, weights = [], []
+        for row, entry in enumerate(entries):
+            edges: Dict[int, float] = {}
+            for path in entry.get("related_files", []):
+                if path in rows:
+                    n = rows[path]
+                    edges[n] = sum(idf[k] for k in keywords[row] & keywords[n]) or 1.0
+            for path in entry.get("imports", []) + entry.get("imported_by", []):
+                if path in rows and path != entry["path"]:
+                    edges[rows[path]] = edges.get(rows[path], 0.0) + import_weight
+
+            total = sum(edges.values())
+            indices.extend(edges)
+            weights.extend(w / total for w in edges.values())
+            indptr[row + 1] = indptr[row] + len(edges)
+
+        return cls(indptr, np.array(indices, dtype=np.int32), np.array(weights, dtype=np.float32), digest)
+
+    def __len__(self) -> int:
+        return len(self.degrees)
+
+    def edges(self) -> int:
+        return len(self.indices)
+
+    # --------------------------------------------------------
+    # Propagation
+    # --------------------------------------------------------
+
+    def spread(self, seeds: np.ndarray, mass: np.ndarray, hops: int = CODI_GRAPH_HOPS,
+               alpha: float = CODI_GRAPH_ALPHA) -> np.ndarray:
+        """
+        Mass each row receives from `seeds` (rows) within `hops` hops,
+        excluding the seeds' own starting mass. Only the frontier's edges
+        are touched, so the cost depends on the seeds' neighbourhood, not
+        on the size of the graph.
+        """
+        received = np.zeros(len(self))
+        nodes = np.asarray(seeds, dtype=np.int64)
+        mass = np.asarray(mass, dtype=np.float64)
+
+        for _ in range(hops):
+            degrees = self.degrees[nodes]
+            keep = (degrees > 0) & (mass >= MIN_MASS)
+            nodes, mass, degrees = nodes[keep], mass[keep], degrees[keep]
+            if not len(nodes):
+                break
+
+            # Gather every out-edge of the frontier in one shot
+            total = int(degrees.sum())
+            edges = np.repeat(self.indptr[nodes] - np.cumsum(degrees) + degrees, degrees) + np.arange(total)
+            targets = self.indices[edges]
+            shares = np.repeat((1 - alpha) * mass, degrees) * self.weights[edges]
+
+            nodes, inverse = np.unique(targets, return_inverse=True)
+            mass = np.bincount(inverse, weights=shares, minlength=len(nodes))
+            received[nodes] += mass
+
+        return received
+
+    def rerank(self, rows: np.ndarray, scores: np.ndarray, seeds: int = CODI_GRAPH_SEEDS,
+               weight: float = CODI_GRAPH_WEIGHT) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (rows, scores) with graph mass added. `rows` is every row in order,
+        or an ANN shortlist: then neighbours outside it are appended with
+        the graph part as their score.
+        """
+        if weight <= 0 or not self.edges():
+            return rows, scores
+
+        top = top_matches(scores, seeds)
+        if not len(top):
+            return rows, scores
+        received = self.spread(rows[top], scores[top])
+
+        scores = np.array(scores, dtype=np.float64)
+        if len(rows) == len(self):
+            touched = np.flatnonzero(received)
+            boost = received[touched]
+        else:
+            extra = np.setdiff1d(np.flatnonzero(received), rows, assume_unique=True)
+            rows = np.concatenate([rows, extra])
+            scores = np.concatenate([scores, np.zeros(len(extra))])
+            boost = received[rows]
+            touched = np.flatnonzero(boost)
+            boost = boost[touched]
+
+        # Only the scores that changed are re-rounded
+        scores[touched] = round_like_python(scores[touched] + weight * boost, 3)
+        return rows, scores
+
+    # --------------------------------------------------------
+    # Storage
+    # --------------------------------------------------------
+
+    def save(self, path: Path):
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(f, indptr=self.indptr, indices=self.indices, weights=self.weights,
+                     digest=np.array(self.digest))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["RelationGraph"]:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                return cls(data["indptr"], data["indices"], data["weights"], str(data["digest"]))
+        except Exception:
+            return None
+
+
+# ============================================================
+# Index Lifecycle (.codi/graph.npz)
+# ============================================================
+
+def build_relation_graph(codi_dir: Path, entries: List[Dict[str, Any]], digest: Optional[str]):
+    """Save the related_files adjacency during `codi init`."""
+    path = codi_dir / GRAPH_FILE
+    if not digest:
+        path.unlink(missing_ok=True)
+        return
+    RelationGraph.from_entries(entries, digest).save(path)
+
+
+def load_relation_graph(codi_dir: Path, entries: List[Dict[str, Any]], digest: Optional[str]) -> RelationGraph:
+    """The saved adjacency when it belongs to this index, else built now."""
+    graph = RelationGraph.load(codi_dir / GRAPH_FILE) if digest else None
+    if graph is None or graph.digest != digest or len(graph) != len(entries):
+        return RelationGraph.from_entries(entries)
+    return graph
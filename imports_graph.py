@@ -0,0 +1,345 @@
+import json
+import posixpath
+import re
+import sys
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+#
+# Static dependency graph, independent of any LLM metadata:
+#
+#   read (ingest)     import_specs(content, suffix) → entry["import_specs"]
+#                     (the raw import / require / include targets)
+#   link (codi init)  resolve every spec against the indexed paths →
+#                     entry["imports"] (forward) and entry["imported_by"]
+#                     (reverse), both sorted index paths
+#
+# Specs are kept in the index so re-linking after files are added or
+# removed needs no re-read. Unresolvable targets (stdlib, packages from a
+# registry) are dropped at link time.
+#
+# .codi/imports.json   {path: {"imports": [...], "imported_by": [...]}},
+#                      linked and saved before metadata extraction starts,
+#                      so the dependency graph is on disk while the LLM pass
+#                      runs (and if it fails)
+
+IMPORTS_FILE = "imports.json"
+
+PY_FROM = re.compile(r"^[ \t]*from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+(\([^)]*\)|[^\n#;]+)", re.M)
+PY_IMPORT = re.compile(r"^[ \t]*import[ \t]+([\w. \t,]+)", re.M)
+JS_IMPORT = re.compile(
+    r"""(?:\bfrom[ \t]*|\brequire\([ \t]*|\bimport\([ \t]*|^[ \t]*import[ \t]+)['"]([^'"\n]{1,200})['"]""", re.M
+)
+JAVA_IMPORT = re.compile(r"^[ \t]*import[ \t]+(?:static[ \t]+)?([\w.]+)[ \t]*;", re.M)
+GO_IMPORT_BLOCK = re.compile(r"^import[ \t]*\(([^)]*)\)", re.M)
+GO_IMPORT = re.compile(r"""^import[ \t]+(?:[\w.]+[ \t]+)?"([^"\n]+)\"""", re.M)
+GO_QUOTED = re.compile(r'"([^"\n]+)"')
+C_INCLUDE = re.compile(r"""^[ \t]*#[ \t]*include[ \t]*[<"]([^>"\n]+)[>"]""", re.M)
+
+FAMILIES = {
+    ".py": "py",
+    ".js": "js", ".jsx": "js", ".ts": "js", ".tsx": "js",
+    ".java": "java",
+    ".go": "go",
+    ".c": "c", ".cpp": "c", ".h": "c",
+}
+
+# Absolute Python imports resolve from the project root, from learned source
+# roots ("src" in `src/app/db.py` imported as `app.db`) or through learned
+# package prefixes ("codi.logic" in `from codi.logic.utils import x` for a
+# flat checkout). A root or prefix is accepted only once it resolves at least
+# this many distinct project modules — one hit could be a third-party name
+# (`rich.console`) that happens to match a project file.
+PY_PREFIX_MIN_MODULES = 2
+
+PY_STDLIB = frozenset(getattr(sys, "stdlib_module_names", ()))   # never project modules
+
+JS_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx")
+JS_ALIASES = ("@/", "~/")         # common "src root" aliases
+
+
+# ============================================================
+# Extraction (one regex pass per file)
+# ============================================================
+
+def import_specs(content: str, suffix: str) -> List[str]:
+    """Raw import targets of one file, in first-seen order."""
+    family = FAMILIES.get(suffix.lower())
+    if family == "py":
+        specs = python_specs(content)
+    elif family == "js":
+        specs = JS_IMPORT.findall(content)
+    elif family == "java":
+        specs = [spec for spec in JAVA_IMPORT.findall(content) if not spec.endswith(".")]
+    elif family == "go":
+        specs = GO_IMPORT.findall(content) + [
+            spec for block in GO_IMPORT_BLOCK.findall(content) for spec in GO_QUOTED.findall(block)
+        ]
+    elif family == "c":
+        specs = C_INCLUDE.findall(content)
+    else:
+        return []
+    return list(dict.fromkeys(spec.strip() for spec in specs if spec.strip()))
+
+
+def python_specs(content: str) -> List[str]:
+    """
+    Dotted modules; `from m import a` yields "m" and "m.a" (a may be a
+    submodule), `from . import a` yields ".a".
+    """
+    specs = []
+    for module, names in PY_FROM.findall(content):
+        if module.strip("."):
+            specs.append(module)
+        joint = "" if module.endswith(".") else "."
+        for name in names.strip("()").split(","):
+            name = name.split()[0] if name.split() else ""
+            if name.isidentifier():
+                specs.append(f"{module}{joint}{name}")
+    for modules in PY_IMPORT.findall(content):
+        for module in modules.split(","):
+            module = module.split()[0] if module.split() else ""
+            if module:
+                specs.append(module)
+    return specs
+
+
+# ============================================================
+# Resolution
+# ============================================================
+
+class PathResolver:
+    """
+    Lookups over the indexed paths: exact path, and per language family
+    the trailing components of every module ("a/b/c.h" answers "c.h",
+    "b/c.h" and "a/b/c.h"), so imports resolve without knowing source
+    roots. Python modules are looked up from the project root and the
+    source roots learned from the project's own imports instead.
+    """
+
+    def __init__(self, paths: List[str], go_module: Optional[str] = None):
+        self.paths = set(paths)
+        self.go_module = go_module
+        self.modules: Dict[Tuple[str, Tuple[str, ...]], List[str]] = {}
+        self.go_dirs: Dict[Tuple[str, ...], List[str]] = {}
+        self.py_modules: Dict[Tuple[str, ...], str] = {}    # dotted module from the project root → path
+        self.py_roots: List[Tuple[str, ...]] = [()]
+        self.py_prefixes: Set[Tuple[str, ...]] = set()
+        self.unresolved: Set[Tuple[str, str]] = set()   # absolute specs known to miss (stdlib, packages)
+
+        for path in sorted(paths):
+            stem, ext = posixpath.splitext(path)
+            family = FAMILIES.get(ext.lower())
+            if family is None:
+                continue
+            if family == "go":
+                self.go_dirs.setdefault(tuple(posixpath.dirname(path).split("/")), []).append(path)
+                continue
+
+            parts = (path if family == "c" else stem).split("/")
+            if family == "py":
+                if parts[-1] == "__init__":
+                    parts = parts[:-1]
+                if parts:
+                    self.py_modules.setdefault(tuple(parts), path)
+                continue
+            if family == "js" and parts[-1] == "index" and len(parts) > 1:
+                self.add(family, parts[:-1], path)
+            self.add(family, parts, path)
+
+    def add(self, family: str, parts: List[str], path: str):
+        for i in range(len(parts)):
+            self.modules.setdefault((family, tuple(parts[i:])), []).append(path)
+
+    def nearest(self, candidates: List[str], importer: str) -> Optional[str]:
+        """Unique candidate, else the one sharing the longest directory prefix with the importer."""
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        importer_parts = importer.split("/")
+
+        def shared(path):
+            count = 0
+            for a, b in zip(path.split("/")[:-1], importer_parts[:-1]):
+                if a != b:
+                    break
+                count += 1
+            return count
+        return max(candidates, key=lambda path: (shared(path), -len(path)))
+
+    def lookup(self, family: str, parts: List[str], importer: str) -> Optional[str]:
+        return self.nearest(self.modules.get((family, tuple(parts)), []), importer)
+
+    def first_file(self, *candidates: str) -> Optional[str]:
+        for candidate in candidates:
+            candidate = posixpath.normpath(candidate)
+            if candidate in self.paths:
+                return candidate
+        return None
+
+    # --------------------------------------------------------
+    # Per language family
+    # --------------------------------------------------------
+
+    def resolve(self, importer: str, spec: str, family: Optional[str] = None) -> List[str]:
+        family = family or FAMILIES.get(posixpath.splitext(importer)[1].lower())
+        if family is None or (family, spec) in self.unresolved:
+            return []
+        if family == "go":
+            found = self.resolve_go(spec)
+        else:
+            found = getattr(self, f"resolve_{family}")(importer, spec)
+            found = [found] if found and found != importer else []
+
+        # A miss on a non-relative spec is a miss from every importer
+        if not found and not spec.startswith(".") and family != "c":
+            self.unresolved.add((family, spec))
+        return found
+
+    def learn_py_layout(self, specs: List[str]):
+        """Accept source roots, then package prefixes, that resolve enough distinct modules."""
+        absolute = [tuple(spec.split(".")) for spec in set(specs)
+                    if not spec.startswith(".") and spec.split(".")[0] not in PY_STDLIB]
+
+        # Source roots: the directories in front of a module that an import names in full
+        placed: Dict[Tuple[str, ...], List[Tuple[Tuple[str, ...], str]]] = {}
+        for module, path in self.py_modules.items():
+            for i in range(1, len(module)):
+                placed.setdefault(module[i:], []).append((module[:i], path))
+        roots: Dict[Tuple[str, ...], Set[str]] = {}
+        for parts in absolute:
+            if parts not in self.py_modules:
+                for root, path in placed.get(parts, []):
+                    roots.setdefault(root, set()).add(path)
+        self.py_roots = [()] + sorted((root for root, targets in roots.items()
+                                       if len(targets) >= PY_PREFIX_MIN_MODULES), key=lambda root: (len(root), root))
+
+        hits: Dict[Tuple[str, ...], Set[str]] = {}
+        for parts in absolute:
+            if self.py_module(parts):
+                continue
+            for i in range(1, len(parts)):
+                target = self.py_module(parts[i:])
+                if target:
+                    hits.setdefault(parts[:i], set()).add(target)
+        self.py_prefixes = {prefix for prefix, targets in hits.items() if len(targets) >= PY_PREFIX_MIN_MODULES}
+
+    def py_module(self, parts) -> Optional[str]:
+        """Path of a dotted module under the project root or a learned source root."""
+        for root in self.py_roots:
+            path = self.py_modules.get(root + tuple(parts))
+            if path:
+                return path
+        return None
+
+    def resolve_py(self, importer: str, spec: str) -> Optional[str]:
+        dots = len(spec) - len(spec.lstrip("."))
+        parts = [part for part in spec[dots:].split(".") if part]
+        if not dots:
+            if not parts or parts[0] in PY_STDLIB:
+                return None
+            found = self.py_module(parts)
+            for i in range(1, len(parts)):
+                if found:
+                    break
+                if tuple(parts[:i]) in self.py_prefixes:
+                    found = self.py_module(parts[i:])
+            return found
+
+        base = posixpath.dirname(importer)
+        for _ in range(dots - 1):
+            base = posixpath.dirname(base)
+        target = posixpath.join(base, *parts) if parts else base
+        return self.first_file(target + ".py", posixpath.join(target, "__init__.py"))
+
+    def resolve_js(self, importer: str, spec: str) -> Optional[str]:
+        if spec.startswith("."):
+            target = posixpath.join(posixpath.dirname(importer), spec)
+            return self.first_file(
+                target, *(target + ext for ext in JS_EXTENSIONS),
+                *(posixpath.join(target, "index" + ext) for ext in JS_EXTENSIONS),
+            )
+        for alias in JS_ALIASES:
+            if spec.startswith(alias):
+                stem, ext = posixpath.splitext(spec[len(alias):])
+                return self.lookup("js", (stem if ext in JS_EXTENSIONS else spec[len(alias):]).split("/"), importer)
+        return None     # a package from the registry
+
+    def resolve_java(self, importer: str, spec: str) -> Optional[str]:
+        parts = spec.split(".")
+        return self.lookup("java", parts, importer) or self.lookup("java", parts[:-1], importer)
+
+    def resolve_c(self, importer: str, spec: str) -> Optional[str]:
+        local = self.first_file(posixpath.join(posixpath.dirname(importer), spec), spec)
+        return local or self.lookup("c", posixpath.normpath(spec).split("/"), importer)
+
+    def resolve_go(self, spec: str) -> List[str]:
+        """Go imports a package: every file of the matching directory."""
+        if self.go_module and (spec == self.go_module or spec.startswith(self.go_module + "/")):
+            return self.go_dirs.get(tuple(spec[len(self.go_module):].lstrip("/").split("/")), [])
+        parts = spec.split("/")
+        if "." not in parts[0]:
+            return []   # standard library
+        for i in range(1, len(parts)):
+            if tuple(parts[i:]) in self.go_dirs:
+                return self.go_dirs[tuple(parts[i:])]
+        return []
+
+
+def go_module_name(root: Path) -> Optional[str]:
+    """`module` path from root/go.mod, if the project has one."""
+    try:
+        text = (root / "go.mod").read_text(errors="ignore")
+    except OSError:
+        return None
+    match = re.search(r"^module[ \t]+(\S+)", text, re.M)
+    return match.group(1) if match else None
+
+
+# ============================================================
+# Linking (codi init)
+# ============================================================
+
+def link_imports(files_data: List[Dict[str, Any]], root: Path) -> int:
+    """
+    Resolve every entry's import_specs to indexed paths; set "imports" and
+    "imported_by" on all entries. Returns the number of edges.
+    """
+    resolver = PathResolver([entry["path"] for entry in files_data], go_module_name(root))
+    resolver.learn_py_layout([
+        spec for entry in files_data if entry["path"].endswith(".py") for spec in entry.get("import_specs", [])
+    ])
+    imported_by: Dict[str, List[str]] = {entry["path"]: [] for entry in files_data}
+
+    edges = 0
+    for entry in files_data:
+        family = FAMILIES.get(posixpath.splitext(entry["path"])[1].lower())
+        targets = set()
+        for spec in entry.get("import_specs", []) if family else []:
+            targets.update(resolver.resolve(entry["path"], spec, family))
+        targets.discard(entry["path"])
+        entry["imports"] = sorted(targets)
+        for target in entry["imports"]:
+            imported_by[target].append(entry["path"])
+        edges += len(targets)
+
+    for entry in files_data:
+        entry["imported_by"] = sorted(imported_by[entry["path"]])
+    return edges
+
+
+def save_import_graph(codi_dir: Path, entries: List[Dict[str, Any]]):
+    """Write the linked graph atomically (entries as set up by link_imports)."""
+    path = codi_dir / IMPORTS_FILE
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w") as f:
+        json.dump({
+            entry["path"]: {"imports": entry["imports"], "imported_by": entry["imported_by"]}
+            for entry in entries
+        }, f)
+    tmp.replace(path)
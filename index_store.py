@@ -0,0 +1,235 @@
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional
+
+from codi.logic.profiler import profiled
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+#
+# .codi/index.jsonl       one compact JSON entry per line, index row order
+# .codi/index.meta.json   {"version", "rows", "size", "digest", "paths", "offsets", "chunked"}
+#                         offsets[i] = byte offset of row i (random access)
+#                         digest = sha256 of index.jsonl (keys derived caches)
+#                         chunked = rows that have "chunks" (absent in older stores)
+# .codi/index.json        optional legacy export (`codi init --export-json`)
+
+STORE_VERSION = 1
+
+ENTRIES_FILE = "index.jsonl"
+META_FILE = "index.meta.json"
+LEGACY_FILE = "index.json"
+
+
+# ============================================================
+# Streaming Writer
+# ============================================================
+
+class IndexWriter:
+    """
+    Append entries one line at a time; nothing is visible to readers until
+    commit() atomically swaps in the new files.
+
+    with IndexWriter(codi_dir) as writer:
+        for entry in entries:
+            writer.append(entry)
+    """
+
+    def __init__(self, codi_dir: Path):
+        self.codi_dir = codi_dir
+        self.tmp_entries = codi_dir / (ENTRIES_FILE + ".tmp")
+        self.file = self.tmp_entries.open("wb")
+        self.paths: List[str] = []
+        self.offsets: List[int] = []
+        self.chunked: List[int] = []
+        self.hash = hashlib.sha256()
+
+    def append(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+        if entry.get("chunks"):
+            self.chunked.append(len(self.paths))
+        self.paths.append(entry["path"])
+        self.offsets.append(self.file.tell())
+        self.file.write(line)
+        self.hash.update(line)
+
+    def commit(self):
+        size = self.file.tell()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+        tmp_meta = self.codi_dir / (META_FILE + ".tmp")
+        with tmp_meta.open("w") as f:
+            json.dump({
+                "version": STORE_VERSION,
+                "rows": len(self.paths),
+                "size": size,
+                "digest": self.hash.hexdigest(),
+                "paths": self.paths,
+                "offsets": self.offsets,
+                "chunked": self.chunked,
+            }, f, separators=(",", ":"))
+
+        # Entries first: a crash in between leaves a size mismatch that
+        # readers detect, never a half-written file.
+        self.tmp_entries.replace(self.codi_dir / ENTRIES_FILE)
+        tmp_meta.replace(self.codi_dir / META_FILE)
+
+    def abort(self):
+        self.file.close()
+        self.tmp_entries.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+# ============================================================
+# Reader (streaming + random access by path)
+# ============================================================
+
+class IndexReader:
+    """
+    Also usable as a read-only list of entries (len, reader[row]) that
+    parses only the rows actually looked at — scoring a query needs the
+    top matches, not the whole index.
+    """
+
+    def __init__(self, codi_dir: Path, meta: Dict[str, Any]):
+        self.entries_path = codi_dir / ENTRIES_FILE
+        self.paths: List[str] = meta["paths"]
+        self.offsets: List[int] = meta["offsets"]
+        self.chunked: Optional[List[int]] = meta.get("chunked")
+        self.digest: Optional[str] = meta.get("digest")
+        self.rows = {path: row for row, path in enumerate(self.paths)}
+        self._mmap = None
+
+    @classmethod
+    def open(cls, codi_dir: Path) -> Optional["IndexReader"]:
+        """None if there is no store or it is incomplete / from another version."""
+        meta_path = codi_dir / META_FILE
+        entries_path = codi_dir / ENTRIES_FILE
+        if not meta_path.exists() or not entries_path.exists():
+            return None
+
+        try:
+            with meta_path.open() as f:
+                meta = json.load(f)
+        except Exception:
+            return None
+
+        if meta.get("version") != STORE_VERSION or entries_path.stat().st_size != meta.get("size"):
+            return None
+
+        return cls(codi_dir, meta)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.rows
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        if not -len(self.paths) <= row < len(self.paths):
+            raise IndexError(row)
+        return self.get_row(row % len(self.paths))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Stream entries in row order without holding the file in memory."""
+        with self.entries_path.open("rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def _view(self):
+        if self._mmap is None:
+            with self.entries_path.open("rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def get_row(self, row: int) -> Dict[str, Any]:
+        view = self._view()
+        start = self.offsets[row]
+        end = self.offsets[row + 1] if row + 1 < len(self.offsets) else len(view)
+        return json.loads(view[start:end])
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        row = self.rows.get(path)
+        return None if row is None else self.get_row(row)
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+@profiled("index.save")
+def write_index(codi_dir: Path, entries: List[Dict[str, Any]], export_json: bool = False):
+    """Stream entries into the store; optionally also write legacy index.json."""
+    with IndexWriter(codi_dir) as writer:
+        for entry in entries:
+            writer.append(entry)
+
+    legacy = codi_dir / LEGACY_FILE
+    if export_json:
+        export_legacy_json(codi_dir, legacy)
+    else:
+        legacy.unlink(missing_ok=True)      # don't leave a stale copy behind
+
+
+def export_legacy_json(codi_dir: Path, path: Path):
+    """Write index.json from the store, one entry at a time."""
+    reader = IndexReader.open(codi_dir)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w") as f:
+        f.write("[\n")
+        for row, entry in enumerate(reader):
+            if row:
+                f.write(",\n")
+            f.write(json.dumps(entry, indent=2))
+        f.write("\n]\n")
+    tmp.replace(path)
+
+
+def has_index(codi_dir: Path) -> bool:
+    return IndexReader.open(codi_dir) is not None or (codi_dir / LEGACY_FILE).exists()
+
+
+def index_digest(codi_dir: Path) -> Optional[str]:
+    """Content digest of the current store (None for a legacy index.json)."""
+    reader = IndexReader.open(codi_dir)
+    return reader.digest if reader is not None else None
+
+
+@profiled("index.load")
+def load_entries(codi_dir: Path) -> List[Dict[str, Any]]:
+    """All entries from the store, falling back to a legacy index.json."""
+    reader = IndexReader.open(codi_dir)
+    if reader is not None:
+        return reader.load_all()
+
+    legacy = codi_dir / LEGACY_FILE
+    if not legacy.exists():
+        return []
+    try:
+        with legacy.open() as f:
+            return json.load(f)
+    except Exception:
+        return []
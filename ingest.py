@@ -0,0 +1,251 @@
+import fnmatch
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from codi.logic.utils import is_text_file
+from codi.logic.profiler import profiled
+from codi.constants import SKIP_DIRS, SKIP_FILES
+
+
+# ============================================================
+# Stage Throughput
+# ============================================================
+
+class StageStats:
+    """Files / bytes through one pipeline stage, timed first → last item."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.files = 0
+        self.bytes = 0
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def begin(self):
+        with self.lock:
+            if self.start is None:
+                self.start = time.perf_counter()
+
+    def add(self, files: int = 1, nbytes: int = 0):
+        with self.lock:
+            now = time.perf_counter()
+            if self.start is None:
+                self.start = now
+            self.end = now
+            self.files += files
+            self.bytes += nbytes
+
+    def summary(self) -> str:
+        elapsed = max((self.end or 0) - (self.start or 0), 1e-9)
+        line = f"  {self.name:<8} {self.files:>7} files  {elapsed:7.2f}s  {self.files / elapsed:8.1f} files/s"
+        if self.bytes:
+            line += f"  {self.bytes / elapsed / 1e6:7.2f} MB/s"
+        return line
+
+
+class PipelineStats:
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {}
+        self.lock = threading.Lock()
+
+    def stage(self, name: str) -> StageStats:
+        """The named stage, created on first use (callers may be pool workers)."""
+        with self.lock:
+            if name not in self.stages:
+                self.stages[name] = StageStats(name)
+            return self.stages[name]
+
+    def summary(self) -> str:
+        lines = ["📊 Ingestion throughput:"]
+        lines.extend(stage.summary() for stage in self.stages.values() if stage.files)
+        return "\n".join(lines)
+
+
+# ============================================================
+# .gitignore Matching
+# ============================================================
+
+class GitIgnoreRule:
+    def __init__(self, base: str, line: str):
+        self.base = base                        # directory of the .gitignore (rel, "" = root)
+        self.negate = line.startswith("!")
+        line = line[1:] if self.negate else line
+        self.dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        self.anchored = "/" in line             # "a/b" or "/a" match from base only
+        self.pattern = line.lstrip("/")
+
+    def matches(self, rel: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel.startswith(self.base + "/"):
+                return False
+            rel = rel[len(self.base) + 1:]
+
+        if self.anchored:
+            return fnmatch.fnmatchcase(rel, self.pattern) or \
+                fnmatch.fnmatchcase(rel, self.pattern.replace("**/", ""))
+        return fnmatch.fnmatchcase(rel.rsplit("/", 1)[-1], self.pattern)
+
+
+def load_gitignore(directory: Path, base: str) -> List[GitIgnoreRule]:
+    path = directory / ".gitignore"
+    if not path.is_file():
+        return []
+    rules = []
+    for line in path.read_text(errors="ignore").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            rules.append(GitIgnoreRule(base, line))
+    return rules
+
+
+def is_ignored(rules: Tuple[GitIgnoreRule, ...], rel: str, is_dir: bool) -> bool:
+    """Last matching rule wins, as in git."""
+    ignored = False
+    for rule in rules:
+        if rule.matches(rel, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+def is_indexable(root: Path, rel: Path) -> bool:
+    """Would scan_project yield `rel`? (single paths reported by `codi watch`)"""
+    parts = rel.parts
+    if not parts or rel.name in SKIP_FILES or not is_text_file(rel):
+        return False
+    if any(part in SKIP_DIRS for part in parts[:-1]):
+        return False
+
+    rules: Tuple[GitIgnoreRule, ...] = ()
+    for depth in range(len(parts)):
+        base = "/".join(parts[:depth])
+        rules += tuple(load_gitignore(root / base, base))
+        if is_ignored(rules, "/".join(parts[:depth + 1]), depth < len(parts) - 1):
+            return False
+
+    return (root / rel).is_file()
+
+
+# ============================================================
+# Parallel Directory Scanner
+# ============================================================
+
+@profiled("walk")
+def scan_project(root: Path, workers: int, stats: Optional[PipelineStats] = None) -> List[Path]:
+    """
+    Walk the tree with `workers` threads (one os.scandir per task), honouring
+    SKIP_DIRS / SKIP_FILES / TEXT_EXT and nested .gitignore files. Returns
+    relative paths, sorted so downstream order is deterministic.
+    """
+
+    stage = stats.stage("scan") if stats else None
+    found: List[Path] = []
+
+    def scan_dir(rel_dir: str, rules: Tuple[GitIgnoreRule, ...]):
+        directory = root / rel_dir
+        rules = rules + tuple(load_gitignore(directory, rel_dir))
+        files, subdirs = [], []
+
+        with os.scandir(directory) as it:
+            for item in it:
+                rel = f"{rel_dir}/{item.name}" if rel_dir else item.name
+
+                if item.is_dir(follow_symlinks=False):
+                    if item.name not in SKIP_DIRS and not is_ignored(rules, rel, True):
+                        subdirs.append((rel, rules))
+                    continue
+
+                if item.name in SKIP_FILES or not is_text_file(Path(item.name)):
+                    continue
+                if not is_ignored(rules, rel, False):
+                    files.append(Path(rel))
+
+        if stage:
+            stage.add(len(files))
+        return files, subdirs
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        pending = {pool.submit(scan_dir, "", ())}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                found.extend(files)
+                pending |= {pool.submit(scan_dir, rel, rules) for rel, rules in subdirs}
+
+    found.sort()
+    return found
+
+
+# ============================================================
+# Bounded Read → Process Pipeline
+# ============================================================
+
+_STOP = object()
+
+
+def run_pipeline(units: List[Any], read: Callable[[Any], Any], process: Callable[[Any], Any],
+                 readers: int, workers: int, queue_size: int) -> List[Any]:
+    """
+    `readers` threads run read(unit) and push into a queue of at most
+    `queue_size` items; `workers` threads pop and run process(data).
+    Readers block when the queue is full, so memory stays flat however far
+    ahead I/O is of the slow stage. Results keep the order of `units`; the
+    first exception from either stage is re-raised.
+    """
+
+    workers = max(workers, 1)
+    items: "queue.Queue" = queue.Queue(maxsize=max(queue_size, 1))
+    results: List[Any] = [None] * len(units)
+    errors: List[BaseException] = []
+    failed = threading.Event()
+
+    def read_one(i: int):
+        if failed.is_set():
+            return
+        try:
+            items.put((i, read(units[i])))
+        except BaseException as e:
+            errors.append(e)
+            failed.set()
+
+    def produce():
+        try:
+            with ThreadPoolExecutor(max_workers=max(readers, 1)) as pool:
+                list(pool.map(read_one, range(len(units))))
+        finally:
+            for _ in range(workers):
+                items.put(_STOP)
+
+    def consume():
+        while True:
+            item = items.get()
+            if item is _STOP:
+                return
+            if failed.is_set():
+                continue                        # drain so readers never block forever
+            i, data = item
+            try:
+                results[i] = process(data)
+            except BaseException as e:
+                errors.append(e)
+                failed.set()
+
+    threads = [threading.Thread(target=produce, daemon=True)]
+    threads += [threading.Thread(target=consume, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return results
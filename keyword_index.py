@@ -0,0 +1,97 @@
+import hashlib
+import json
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional, Set
+
+
+# ============================================================
+# Inverted Keyword Index (keyword → posting list of paths)
+# ============================================================
+
+KEYWORD_INDEX_VERSION = 1
+
+# Two files are related when they share at least this many keywords
+MIN_SHARED_KEYWORDS = 2
+
+
+def entries_digest(files_data: List[Dict[str, Any]]) -> str:
+    """Fingerprint of (path, keywords) pairs the postings were built from."""
+    h = hashlib.sha256()
+    for file in sorted(files_data, key=lambda f: f["path"]):
+        h.update(file["path"].encode())
+        for keyword in sorted(set(file["keywords"])):
+            h.update(b"\0" + keyword.encode())
+        h.update(b"\1")
+    return h.hexdigest()
+
+
+class KeywordIndex:
+    def __init__(self, postings: Optional[Dict[str, Set[str]]] = None, digest: str = ""):
+        self.postings: Dict[str, Set[str]] = postings or {}
+        self.digest = digest            # entries_digest() of the index it matches
+
+    @classmethod
+    def from_entries(cls, files_data: List[Dict[str, Any]]) -> "KeywordIndex":
+        index = cls()
+        for file in files_data:
+            index.add(file["path"], file["keywords"])
+        return index
+
+    def add(self, path: str, keywords: Iterable[str]):
+        for keyword in set(keywords):
+            self.postings.setdefault(keyword, set()).add(path)
+
+    def remove(self, path: str, keywords: Iterable[str]):
+        for keyword in set(keywords):
+            posting = self.postings.get(keyword)
+            if posting is None:
+                continue
+            posting.discard(path)
+            if not posting:
+                del self.postings[keyword]
+
+    def neighbours(self, keywords: Iterable[str]) -> Set[str]:
+        """Every path sharing at least one keyword."""
+        found = set()
+        for keyword in set(keywords):
+            found |= self.postings.get(keyword, set())
+        return found
+
+    def related(self, path: str, keywords: Iterable[str]) -> List[str]:
+        """Paths sharing >= MIN_SHARED_KEYWORDS keywords with `path` (unordered)."""
+        shared = Counter()
+        for keyword in set(keywords):
+            shared.update(self.postings.get(keyword, ()))
+
+        return [
+            other for other, count in shared.items()
+            if count >= MIN_SHARED_KEYWORDS and other != path
+        ]
+
+    # --------------------------------------------------------
+    # Storage (.codi/keywords.json)
+    # --------------------------------------------------------
+
+    def save(self, path: Path):
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w") as f:
+            json.dump({
+                "version": KEYWORD_INDEX_VERSION,
+                "digest": self.digest,
+                "postings": {k: sorted(v) for k, v in self.postings.items()},
+            }, f)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["KeywordIndex"]:
+        if not path.exists():
+            return None
+        try:
+            with path.open() as f:
+                data = json.load(f)
+        except Exception:
+            return None
+        if data.get("version") != KEYWORD_INDEX_VERSION:
+            return None
+        return cls({k: set(v) for k, v in data.get("postings", {}).items()}, data.get("digest", ""))
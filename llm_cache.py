@@ -0,0 +1,181 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from codi.logic.profiler import profiler
+from codi.constants import CODI_CACHE_MAX_MB, CODI_CACHE_MAX_AGE_DAYS
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+
+CACHE_PATH = Path(".codi/cache/llm.sqlite")
+
+# safe_json_extract_object's fallback — usually a bad completion, so it is
+# never cached and the next run asks again.
+FALLBACK = {"keywords": []}
+
+EVICT_EVERY = 256       # puts between eviction passes
+
+
+# ============================================================
+# Disk-backed LLM Response Cache
+# ============================================================
+
+class LLMCache:
+    """
+    SQLite cache of completions keyed by hash(model, URL, prompt template
+    version, content). Stores the raw completion and the parsed JSON;
+    evicts by age, then least-recently-used until under the size cap.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, max_age: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                raw TEXT NOT NULL,
+                parsed TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self.evict()
+
+    @staticmethod
+    def key(model: str, url: str, template: str, content: str) -> str:
+        h = hashlib.sha256()
+        for part in (model, url, template, content):
+            h.update(part.encode("utf-8", errors="ignore"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            row = self.db.execute("SELECT parsed FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                profiler.count("llm.cache_misses")
+                return None
+
+            self.hits += 1
+            profiler.count("llm.cache_hits")
+            self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            return json.loads(row[0])
+
+    def put(self, key: str, raw: str, parsed: Any):
+        parsed_json = json.dumps(parsed)
+        now = time.time()
+
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, raw, parsed_json, len(raw) + len(parsed_json), now, now),
+            )
+            self.db.commit()
+            self.puts += 1
+            due = self.puts % EVICT_EVERY == 0
+
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop entries older than max_age, then LRU entries beyond max_bytes."""
+        with self.lock:
+            self.db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.max_age,))
+
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                doomed, freed = [], 0
+                for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                    if freed >= excess:
+                        break
+                    doomed.append((key,))
+                    freed += size
+                self.db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+            self.db.commit()
+
+    def summary(self) -> str:
+        return f"💾 LLM cache: {self.hits} hits, {self.misses} misses"
+
+
+# ============================================================
+# Module-level Access
+# ============================================================
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+_enabled = True
+
+
+def set_enabled(enabled: bool):
+    """`--no-cache`: bypass the cache for reads and writes."""
+    global _enabled
+    _enabled = enabled
+
+
+def get_cache() -> Optional[LLMCache]:
+    """The process-wide cache, or None when disabled (`--no-cache`)."""
+    global _cache
+    if not _enabled:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(CACHE_PATH, CODI_CACHE_MAX_MB * 1024 * 1024,
+                              CODI_CACHE_MAX_AGE_DAYS * 86400)
+        return _cache
+
+
+def cache_lookup(model: str, url: str, template: str, content: str) -> Optional[Any]:
+    cache = get_cache()
+    if cache is None:
+        return None
+    return cache.get(LLMCache.key(model, url, template, content))
+
+
+def cache_store(model: str, url: str, template: str, content: str, raw: str, parsed: Any):
+    cache = get_cache()
+    if cache is None or parsed == FALLBACK:
+        return
+    cache.put(LLMCache.key(model, url, template, content), raw, parsed)
+
+
+def cached_completion(model: str, url: str, template: str, content: str,
+                      complete: Callable[[], str], parse: Callable[[str], Any]) -> Any:
+    """
+    Return the parsed completion for `content`, calling `complete()` (the
+    network request) only on a cache miss.
+    """
+    parsed = cache_lookup(model, url, template, content)
+    if parsed is not None:
+        return parsed
+
+    raw = complete()
+    parsed = parse(raw)
+    cache_store(model, url, template, content, raw, parsed)
+    return parsed
+
+
+def cache_summary() -> Optional[str]:
+    """Hit/miss line for the end of a run (None if the cache was never used)."""
+    return _cache.summary() if _cache is not None else None
@@ -0,0 +1,211 @@
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from codi.logic.profiler import profiler
+from codi.constants import (
+    AI_MAX_IN_FLIGHT,
+    AI_RATE_LIMIT,
+    AI_RATE_BURST,
+    AI_MAX_RETRIES,
+)
+
+
+# ============================================================
+# Rate Limiting
+# ============================================================
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, up to `capacity` burst."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until one token is available."""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(url: str) -> TokenBucket:
+    """One bucket per provider host, shared by every thread."""
+    host = urlparse(url).netloc
+    with _buckets_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(AI_RATE_LIMIT, AI_RATE_BURST)
+        return _buckets[host]
+
+
+# ============================================================
+# Pooled HTTP Session
+# ============================================================
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Shared keep-alive session sized for AI_MAX_IN_FLIGHT connections.
+    `requests` is imported lazily to keep CLI startup fast.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(AI_MAX_IN_FLIGHT, 1))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+# ============================================================
+# Usage Accounting
+# ============================================================
+
+class UsageStats:
+    """Requests / retries / billed tokens across every thread of a run."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start counting a new run (`codi watch` indexes many times per process)."""
+        with self.lock:
+            self.requests = 0
+            self.retries = 0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+
+    def record(self, prompt: str, content: str, usage: Optional[Dict[str, int]]):
+        usage = usage or {}
+        # Providers that omit `usage` get a rough chars/4 estimate
+        prompt_tokens = usage.get("prompt_tokens", estimate_tokens(prompt))
+        completion_tokens = usage.get("completion_tokens", estimate_tokens(content))
+        with self.lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+        profiler.count("llm.requests")
+        profiler.count("llm.prompt_tokens", prompt_tokens)
+        profiler.count("llm.completion_tokens", completion_tokens)
+
+    def record_retry(self):
+        with self.lock:
+            self.retries += 1
+        profiler.count("llm.retries")
+
+    def summary(self, files: int) -> str:
+        files = max(files, 1)
+        tokens = self.prompt_tokens + self.completion_tokens
+        return (
+            f"📨 LLM requests: {self.requests} ({self.requests / files:.2f}/file, "
+            f"{self.retries} retries)  🔤 Tokens: {tokens} ({tokens / files:.0f}/file)"
+        )
+
+
+usage = UsageStats()
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+# ============================================================
+# Chat Completions
+# ============================================================
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Exponential backoff with jitter; honours a numeric Retry-After header."""
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return min(2 ** attempt, 30) * 0.5 * (1 + random.random())
+
+
+def post_chat(api_key: str, model: str, url: str, prompt: str,
+              temperature: float = 0.2, timeout: int = 30) -> str:
+    """
+    Send one OpenAI-compatible chat completion and return the message content.
+    Rate limited per provider, retried on 429/5xx and connection errors.
+    """
+
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature
+    }
+
+    import requests
+
+    session = get_session()
+    bucket = get_bucket(url)
+
+    for attempt in range(AI_MAX_RETRIES + 1):
+        with profiler.span("llm.rate_limit"):
+            bucket.acquire()
+        last_try = attempt == AI_MAX_RETRIES
+
+        try:
+            with profiler.span("llm.request", attempt=attempt) as span:
+                res = session.post(url, headers=headers, json=payload, timeout=timeout)
+                span.set(status=res.status_code)
+        except (requests.ConnectionError, requests.Timeout):
+            if last_try:
+                raise
+            usage.record_retry()
+            with profiler.span("llm.backoff"):
+                time.sleep(backoff_delay(attempt))
+            continue
+
+        if res.status_code in RETRY_STATUS and not last_try:
+            usage.record_retry()
+            with profiler.span("llm.backoff"):
+                time.sleep(backoff_delay(attempt, res.headers.get("Retry-After")))
+            continue
+
+        res.raise_for_status()
+        body = res.json()
+        content = body["choices"][0]["message"]["content"]
+        usage.record(prompt, content, body.get("usage"))
+        return content
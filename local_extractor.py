@@ -0,0 +1,309 @@
+import json
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+#
+# Offline replacement for the metadata prompt: the same `semantic` fields,
+# derived from identifiers, comments/docstrings, imports and a TF-IDF
+# weighting over the project. No network, no model.
+#
+# .codi/local_terms.json   {"version", "docs", "df"} document frequencies
+#                          from the last full extraction
+
+# Bump whenever the output changes so the manifest re-extracts every file.
+LOCAL_EXTRACTOR_VERSION = "1"
+
+TERMS_FILE = "local_terms.json"
+
+KEYWORDS_PER_FILE = 12
+LIST_LIMIT = 8                  # every other field
+SYMBOL_WEIGHT = 3               # a word in a function/class name counts this often
+
+WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,63}")
+SUBWORD = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+")
+
+STOPWORDS = frozenset("""
+    about above after again against all also and any are because been before being below between both
+    but can cannot could did does doing down during each few for from further had has have having her
+    here hers herself him himself his how into its itself just more most must myself nor not now off
+    once only other our ours out over own same she should some such than that the their theirs them
+    themselves then there these they this those through too under until very was were what when where
+    which while who whom why will with would you your yours yourself yet use used uses using get set
+    abstract and args arguments assert async await bool boolean break byte case catch char class cls
+    const constructor continue def default del delete elif else enum except export extends extern
+    false final finally float for func function global goto implements import include instanceof int
+    interface kwargs lambda len let long map nil none nonlocal null number object package param params
+    pass print private protected public raise range require return self short signed sizeof static str
+    string struct super switch synchronized this throw throws todo true try type typedef typeof undefined
+    union unsigned var void volatile while yield tmp temp val value values data item items obj result res
+    ret err error errors index idx num count list dict key keys arr array fixme xxx the file files line
+    lines name names new old foo bar baz
+""".split())
+
+VERBS = frozenset("""
+    add apply assign authenticate authorize build calculate call cancel check clean clear close collect
+    compare compile compute configure connect convert copy create decode decrypt delete deserialize
+    detect dispatch download emit encode encrypt ensure enqueue evaluate execute export extract fetch
+    filter find flush format generate handle hash import index init initialize insert install invalidate
+    invoke join list load lock log login logout map match merge migrate normalize notify open parse
+    patch ping poll post prepare process publish push put query read receive refresh register reload
+    remove render replace request reset resolve restore retry run save schedule score search send
+    serialize serve sort split start stop store stream submit subscribe sync track transform translate
+    trigger unlock unregister update upload upsert validate verify watch wrap write
+""".split())
+
+IMPORT_PATTERNS = {
+    ".py": re.compile(r"^[ \t]*(?:from[ \t]+([\w.]+)[ \t]+import|import[ \t]+([\w.]+))", re.M),
+    ".js": re.compile(r"""(?:\bfrom[ \t]*|\brequire\([ \t]*|^[ \t]*import[ \t]+)['"]([^'"\n]{1,200})['"]""", re.M),
+    ".java": re.compile(r"^[ \t]*import[ \t]+(?:static[ \t]+)?([\w.]+)", re.M),
+    ".go": re.compile(r"""^[ \t]*(?:import[ \t]+)?(?:[\w.]+[ \t]+)?"([\w./-]+)"[ \t]*$""", re.M),
+    ".c": re.compile(r"""^[ \t]*#[ \t]*include[ \t]*[<"]([^>"\n]+)[>"]""", re.M),
+}
+for _suffix in (".ts", ".tsx", ".jsx"):
+    IMPORT_PATTERNS[_suffix] = IMPORT_PATTERNS[".js"]
+for _suffix in (".cpp", ".h"):
+    IMPORT_PATTERNS[_suffix] = IMPORT_PATTERNS[".c"]
+
+PARAMETERS = re.compile(r"\b(?:def|function|func)[ \t]+\w+[ \t]*\(([^)]{0,300})\)")
+RETURNS = re.compile(r"\breturn[ \t]+([A-Za-z_][\w.]{0,63})")
+
+# label → alternatives. Each alternative starts with a literal (so `re`
+# can skip ahead to it instead of trying every position); one starting
+# with a letter must also start a word. Secrets are matched lower-cased.
+SIDE_EFFECTS = [
+    ("writes files", [r"open\([^)\n]{0,200}['\"][wax]b?\+?['\"]", r"\.write_text\(", r"\.write_bytes\(",
+                      r"writeFile", r"fs\.write", r"fwrite\(", r"os\.remove\(", r"unlink\("]),
+    ("reads files", [r"open\(", r"\.read_text\(", r"\.read_bytes\(", r"readFile", r"fs\.read", r"fopen\("]),
+    ("network requests", [r"requests\.\w+\(", r"fetch\(", r"axios", r"urllib", r"http\.get\b", r"http\.post\b",
+                          r"http\.request\b", r"XMLHttpRequest", r"HttpClient\b", r"socket\b"]),
+    ("database access", [r"SELECT\s+[\w*]", r"INSERT\s+INTO\b", r"UPDATE\s+\w+\s+SET\b", r"DELETE\s+FROM\b",
+                         r"\.execute\(", r"cursor\(", r"sqlite3\b"]),
+    ("logging", [r"logging\.", r"logger\.", r"console\.(?:log|warn|error)\(", r"print\(", r"System\.out\.",
+                 r"fmt\.Print", r"printf\("]),
+    ("reads environment", [r"os\.environ", r"getenv\(", r"process\.env"]),
+    ("spawns processes", [r"subprocess\.", r"child_process", r"os\.system\(", r"exec\.Command", r"Runtime\.getRuntime"]),
+    ("mutates global state", [r"\n[ \t]*global[ \t]+\w"]),
+]
+
+RISKS = [
+    ("dynamic code execution", [r"eval\(", r"exec\(", r"new Function\("]),
+    ("shell injection", [r"shell\s*=\s*True", r"os\.system\(", r"child_process\.exec\("]),
+    ("sql built from strings", [r"\.execute\(\s*f['\"]", r"SELECT\b[^\n]{0,120}['\"]\s*\+",
+                                r"INSERT\b[^\n]{0,120}['\"]\s*\+", r"UPDATE\b[^\n]{0,120}['\"]\s*\+",
+                                r"DELETE\b[^\n]{0,120}['\"]\s*\+"]),
+    ("hardcoded secrets", [rf"{word}\s*[:=]\s*['\"][^'\"\s]{{6,}}['\"]"
+                           for word in ("password", "passwd", "secret", "api_key", "apikey", "token")]),
+    ("swallowed exceptions", [r"except\s*:", r"except\s+Exception\s*:\s*pass\b", r"catch\s*\([^)\n]{0,80}\)\s*\{\s*\}"]),
+    ("unsafe deserialization", [r"pickle\.loads?\(", r"yaml\.load\((?![^)]*Loader)"]),
+    ("disabled tls verification", [r"verify\s*=\s*False", r"rejectUnauthorized\s*:\s*false"]),
+    ("unfinished code", [r"TODO\b", r"FIXME\b", r"XXX\b", r"HACK\b"]),
+]
+
+SOURCE_PATTERNS = [
+    ("asynchronous", [r"async\b", r"await\b", r"Promise\b", r"goroutine\b", r"go\s+func\b"]),
+    ("multithreading", [r"threading\b", r"Thread\(", r"Lock\(", r"sync\.Mutex\b", r"Executor\b"]),
+    ("decorator", [r"\n[ \t]*@[A-Za-z_]"]),
+]
+
+LOWERCASE_CHECKS = {"hardcoded secrets"}
+
+# identifier word → design / implementation pattern
+WORD_PATTERNS = {
+    "cache": "caching", "cached": "caching", "memo": "caching", "memoize": "caching",
+    "retry": "retry", "retries": "retry", "backoff": "retry",
+    "queue": "queueing", "enqueue": "queueing", "dequeue": "queueing",
+    "singleton": "singleton", "factory": "factory", "builder": "builder", "adapter": "adapter",
+    "observer": "observer", "listener": "observer", "subscribe": "observer", "emit": "observer",
+    "handler": "event handling", "middleware": "middleware", "strategy": "strategy",
+    "visitor": "visitor", "proxy": "proxy", "pool": "pooling", "batch": "batching",
+    "stream": "streaming", "iterator": "iteration", "generator": "iteration",
+    "parser": "parsing", "parse": "parsing", "validator": "validation", "validate": "validation",
+    "serialize": "serialization", "serializer": "serialization", "router": "routing", "route": "routing",
+    "migration": "migrations", "schema": "schema definition", "test": "testing", "mock": "testing",
+}
+
+COMPILED = {
+    field: [(label, [re.compile(pattern) for pattern in alternatives]) for label, alternatives in checks]
+    for field, checks in (("side_effects", SIDE_EFFECTS), ("risks", RISKS), ("patterns", SOURCE_PATTERNS))
+}
+
+
+# ============================================================
+# Text → Terms
+# ============================================================
+
+@lru_cache(maxsize=1 << 16)
+def split_identifier(identifier: str) -> tuple:
+    """parseHTTPResponse / parse_http_response → ("parse", "http", "response"), stopwords dropped."""
+    words = (word.lower() for part in identifier.split("_") for word in SUBWORD.findall(part))
+    return tuple(word for word in words if len(word) > 2 and word not in STOPWORDS)
+
+
+def phrase(identifier: str) -> str:
+    return " ".join(split_identifier(identifier))
+
+
+def count_terms(content: str, symbols: Iterable[Dict[str, Any]]) -> Counter:
+    """Term frequencies over identifiers and comment/docstring words, symbol names boosted."""
+    terms = Counter()
+    for identifier, n in Counter(WORD.findall(content)).items():
+        for word in split_identifier(identifier):
+            terms[word] += n
+    for symbol in symbols:
+        for word in split_identifier(symbol["name"]):
+            terms[word] += SYMBOL_WEIGHT
+    return terms
+
+
+def has_evidence(content: str, alternatives: List[re.Pattern]) -> bool:
+    for regex in alternatives:
+        for match in regex.finditer(content):
+            start = match.start()
+            if start == 0 or not content[start].isalpha() or not is_word_char(content[start - 1]):
+                return True
+    return False
+
+
+def is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def first(values: Iterable[str], limit: int = LIST_LIMIT) -> List[str]:
+    """Distinct non-empty values in first-seen order."""
+    return [value for value in dict.fromkeys(v for v in values if v)][:limit]
+
+
+# ============================================================
+# Per-file Analysis
+# ============================================================
+
+def analyse(content: str, suffix: str, symbols: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Everything but `keywords` (those need corpus statistics): returns
+    {"terms": Counter, "semantic": {...}} for one file or chunk.
+    """
+    names = [symbol["name"] for symbol in symbols]
+    words = [split_identifier(name) for name in names]
+
+    capabilities = first(" ".join(w) for w in words if len(w) > 1 and w[0] in VERBS)
+    entities = first(
+        phrase(symbol["name"]) for symbol in symbols if symbol.get("kind") == "class"
+    )
+
+    parameters = Counter()
+    for params in PARAMETERS.findall(content):
+        for param in params.split(","):
+            name = re.split(r"[:=\s]", param.strip().lstrip("*&."), 1)[0]
+            parameters[phrase(name)] += 1
+    returned = Counter(phrase(name.rsplit(".", 1)[-1]) for name in RETURNS.findall(content))
+
+    pattern = IMPORT_PATTERNS.get(suffix.lower())
+    imports = []
+    if pattern is not None:
+        for match in pattern.finditer(content):
+            module = next(group for group in match.groups() if group)
+            if not module.startswith("."):
+                imports.append(module)
+
+    terms = count_terms(content, symbols)
+    lowered = content.lower()
+    found = {
+        field: [label for label, alternatives in checks
+                if has_evidence(lowered if label in LOWERCASE_CHECKS else content, alternatives)]
+        for field, checks in COMPILED.items()
+    }
+
+    return {
+        "terms": terms,
+        "semantic": {
+            "capabilities": capabilities,
+            "side_effects": found["side_effects"],
+            "inputs": first(name for name, _ in parameters.most_common()),
+            "outputs": first(name for name, _ in returned.most_common()),
+            "risks": found["risks"],
+            "patterns": first(found["patterns"] + [WORD_PATTERNS[w] for w in terms if w in WORD_PATTERNS]),
+            "data_entities": entities,
+            "external_dependencies": first(imports),
+        },
+    }
+
+
+# ============================================================
+# Corpus Statistics (TF-IDF)
+# ============================================================
+
+class DocumentFrequencies:
+    def __init__(self, docs: int = 0, df: Optional[Counter] = None):
+        self.docs = docs
+        self.df = df if df is not None else Counter()
+
+    def add(self, terms: Iterable[str]):
+        self.docs += 1
+        self.df.update(set(terms))
+
+    def merged(self, other: "DocumentFrequencies") -> "DocumentFrequencies":
+        return DocumentFrequencies(self.docs + other.docs, self.df + other.df)
+
+    def keywords(self, terms: Counter, limit: int = KEYWORDS_PER_FILE) -> List[str]:
+        """Top terms by (1 + log tf) · smoothed idf; ties by term for stable output."""
+        docs = self.docs
+        weighted = [
+            (-(1 + math.log(count)) * (math.log((1 + docs) / (1 + self.df.get(term, 0))) + 1), term)
+            for term, count in terms.items()
+        ]
+        weighted.sort()
+        return [term for _, term in weighted[:limit]]
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["DocumentFrequencies"]:
+        try:
+            with path.open() as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != LOCAL_EXTRACTOR_VERSION:
+            return None
+        return cls(data["docs"], Counter(data["df"]))
+
+    def save(self, path: Path):
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w") as f:
+            json.dump({"version": LOCAL_EXTRACTOR_VERSION, "docs": self.docs, "df": self.df},
+                      f, separators=(",", ":"))
+        tmp.replace(path)
+
+
+def corpus_frequencies(codi_dir: Path, analysed: List[Counter]) -> DocumentFrequencies:
+    """
+    Frequencies for this run's files. A run re-extracting at least as many
+    files as the saved corpus replaces it; a smaller (incremental) run is
+    weighed against the saved corpus plus its own files, without saving.
+    """
+    current = DocumentFrequencies()
+    for terms in analysed:
+        current.add(terms)
+
+    path = codi_dir / TERMS_FILE
+    saved = DocumentFrequencies.load(path)
+    if saved is None or current.docs >= saved.docs:
+        current.save(path)
+        return current
+    return saved.merged(current)
+
+
+# ============================================================
+# Task Descriptions
+# ============================================================
+
+def task_keywords(description: str, limit: int = 10) -> List[str]:
+    """Keywords of a free-text task, in order of appearance."""
+    return first((word for identifier in WORD.findall(description)
+                  for word in split_identifier(identifier)), limit)
@@ -0,0 +1,81 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+# ============================================================
+# Manifest Storage
+# ============================================================
+
+MANIFEST_VERSION = 1
+
+
+def load_manifest(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Load .codi/manifest.json → {path: record}. Empty if missing/corrupt."""
+    if not path.exists():
+        return {}
+
+    try:
+        with path.open() as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+
+    return data.get("files", {})
+
+
+def save_manifest(path: Path, files: Dict[str, Dict[str, Any]]):
+    """Write the manifest atomically so an interrupted run never corrupts it."""
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f)
+    tmp.replace(path)
+
+
+# ============================================================
+# Fingerprints
+# ============================================================
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_record(file_path: Path, data: bytes, prompt_version: str, model: Optional[str]) -> Dict[str, Any]:
+    """Build a manifest record for a file whose bytes were just read."""
+    stat = file_path.stat()
+    return {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "sha256": hash_bytes(data),
+        "prompt_version": prompt_version,
+        "model": model,
+    }
+
+
+def is_stat_unchanged(record: Optional[Dict[str, Any]], file_path: Path,
+                      prompt_version: str, model: Optional[str]) -> bool:
+    """
+    Cheap check: same size + mtime + prompt/model version means the
+    previous extraction is still valid without reading the file.
+    """
+    if not record:
+        return False
+    if record.get("prompt_version") != prompt_version or record.get("model") != model:
+        return False
+
+    stat = file_path.stat()
+    return record.get("size") == stat.st_size and record.get("mtime") == stat.st_mtime_ns
+
+
+def is_content_unchanged(record: Optional[Dict[str, Any]], data: bytes,
+                         prompt_version: str, model: Optional[str]) -> bool:
+    """Slow check used when stat changed (touch, checkout): compare hashes."""
+    if not record:
+        return False
+    if record.get("prompt_version") != prompt_version or record.get("model") != model:
+        return False
+    return record.get("sha256") == hash_bytes(data)
@@ -0,0 +1,228 @@
+import json
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from codi.constants import CODI_PROFILE_MAX_EVENTS
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+#
+# `--profile` turns the process-wide `profiler` on. Instrumented code calls
+# profiler.span("stage") / profiler.count("counter") unconditionally; while
+# profiling is off a span is a shared no-op context and a count is one
+# attribute check.
+#
+# Stage names are dotted ("llm.request", "index.save") so related stages
+# sort together in the summary table.
+
+
+# ============================================================
+# Spans
+# ============================================================
+
+class StageTiming:
+    """Calls / total / min / max seconds of one named stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.calls += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+
+class Span:
+    """One timed region; `set(**args)` attaches details shown in the trace."""
+
+    def __init__(self, profiler: "Profiler", name: str, args: Dict[str, Any]):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.profiler.add(self.name, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+
+class NullSpan:
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = nullcontext(NullSpan())
+
+
+# ============================================================
+# Profiler
+# ============================================================
+
+class Profiler:
+    """
+    Stage timings and counters for one run, from every thread. The first
+    CODI_PROFILE_MAX_EVENTS spans are also kept as trace events; the
+    per-stage aggregates cover every span.
+    """
+
+    def __init__(self, max_events: int = CODI_PROFILE_MAX_EVENTS):
+        self.enabled = False
+        self.max_events = max_events
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.origin = time.perf_counter()
+            self.started = time.time()
+            self.stages: Dict[str, StageTiming] = {}
+            self.counters: Dict[str, float] = {}
+            self.events: List[tuple] = []
+            self.dropped = 0
+
+    def enable(self):
+        """Start a fresh profile (wall time is measured from here)."""
+        self.reset()
+        self.enabled = True
+
+    def span(self, name: str, **args):
+        """`with profiler.span("read", path=...) as span:` — a no-op when disabled."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    def add(self, name: str, start: float, seconds: float, args: Optional[Dict[str, Any]] = None):
+        """Record a span measured elsewhere (perf_counter start, duration in seconds)."""
+        with self.lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = StageTiming(name)
+            stage.add(seconds)
+
+            if len(self.events) < self.max_events:
+                self.events.append((name, start, seconds, threading.get_ident(), args or {}))
+            else:
+                self.dropped += 1
+
+    def count(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def wall(self) -> float:
+        return time.perf_counter() - self.origin
+
+    # --------------------------------------------------------
+    # Summary (`--profile`)
+    # --------------------------------------------------------
+
+    def summary_tables(self):
+        """rich Tables: per-stage timings, then counters. Stages can overlap (threads, nesting)."""
+        from rich.table import Table
+
+        wall = max(self.wall(), 1e-9)
+        stages = Table(title=f"⏱  Profile ({wall:.2f}s wall)", title_justify="left")
+        for column in ("Stage", "Calls", "Total s", "Mean ms", "Min ms", "Max ms", "% wall"):
+            stages.add_column(column, justify="left" if column == "Stage" else "right")
+
+        with self.lock:
+            timings = sorted(self.stages.values(), key=lambda stage: stage.name)
+            counters = sorted(self.counters.items())
+
+        for stage in timings:
+            stages.add_row(
+                stage.name, str(stage.calls), f"{stage.total:.3f}",
+                f"{stage.total / stage.calls * 1e3:.2f}", f"{stage.min * 1e3:.2f}", f"{stage.max * 1e3:.2f}",
+                f"{stage.total / wall * 100:.1f}",
+            )
+
+        tables = [stages]
+        if counters:
+            table = Table(title="🔢 Counters", title_justify="left")
+            table.add_column("Counter")
+            table.add_column("Value", justify="right")
+            for name, value in counters:
+                table.add_row(name, f"{value:g}")
+            tables.append(table)
+        return tables
+
+    # --------------------------------------------------------
+    # Trace (`--trace`)
+    # --------------------------------------------------------
+
+    def write_trace(self, path: Path):
+        """
+        *.jsonl → one JSON object per span, then one per counter.
+        Anything else → Chrome trace format (chrome://tracing, Perfetto).
+        """
+        with self.lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+            dropped = self.dropped
+
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("w") as f:
+            if path.suffix == ".jsonl":
+                for name, start, seconds, thread, args in events:
+                    f.write(json.dumps({"span": name, "start_s": round(start - self.origin, 6),
+                                        "duration_s": round(seconds, 6), "thread": thread, **args}) + "\n")
+                for name, value in sorted(counters.items()):
+                    f.write(json.dumps({"counter": name, "value": value}) + "\n")
+                if dropped:
+                    f.write(json.dumps({"counter": "profile.dropped_events", "value": dropped}) + "\n")
+            else:
+                json.dump(self.chrome_trace(events, counters, dropped), f)
+        tmp.replace(path)
+
+    def chrome_trace(self, events, counters: Dict[str, float], dropped: int) -> Dict[str, Any]:
+        threads = {}
+        trace = []
+        for name, start, seconds, thread, args in events:
+            tid = threads.setdefault(thread, len(threads))
+            trace.append({"name": name, "cat": name.split(".", 1)[0], "ph": "X", "pid": 1, "tid": tid,
+                          "ts": round((start - self.origin) * 1e6, 1), "dur": round(seconds * 1e6, 1),
+                          "args": args})
+
+        end = round(self.wall() * 1e6, 1)
+        for name, value in counters.items():
+            trace.append({"name": name, "ph": "C", "pid": 1, "tid": 0, "ts": end, "args": {"value": value}})
+
+        return {"traceEvents": trace, "displayTimeUnit": "ms",
+                "otherData": {"started": self.started, "dropped_events": dropped}}
+
+
+profiler = Profiler()
+
+
+def profiled(name: str):
+    """Decorator: time every call of the function as stage `name`."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return fn(*args, **kwargs)
+            with profiler.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
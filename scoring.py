@@ -0,0 +1,225 @@
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+import numpy as np
+
+from codi.logic.embeddings import semantic_fields
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+#
+# .codi/scoring.npz   keyword / function postings + per-file arrays, written
+#                     by `codi init` and keyed by the index store digest
+
+SCORING_FILE = "scoring.npz"
+
+W_SEMANTIC = 0.50
+W_KEYWORD = 0.30
+W_FUNCTION = 0.20
+
+
+def file_features(file_meta: Dict[str, Any]) -> Tuple[bool, Set[str], Set[str]]:
+    """(has semantic text, lowered keywords, lowered function names) of one entry."""
+    semantic = file_meta.get("semantic", {})
+    functions = file_meta.get("functions", [])
+
+    has_block = bool(functions) or bool(semantic_fields(semantic))
+    file_set = {k.lower() for k in semantic.get("keywords", [])}
+    fn_set = {fn.lower() for fn in functions}
+    return has_block, file_set, fn_set
+
+
+# ============================================================
+# Term → Rows Postings (CSC-style, NumPy only)
+# ============================================================
+
+class TermPostings:
+    """
+    Sparse binary rows × terms matrix stored column-wise: `vocab` is sorted,
+    and the rows holding vocab[t] are indices[indptr[t]:indptr[t + 1]].
+    """
+
+    def __init__(self, vocab: np.ndarray, indptr: np.ndarray, indices: np.ndarray, rows: int):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.indices = indices
+        self.rows = rows
+
+    @classmethod
+    def from_rows(cls, row_terms: List[Set[str]]) -> "TermPostings":
+        columns: Dict[str, List[int]] = {}
+        for row, terms in enumerate(row_terms):
+            for term in terms:
+                columns.setdefault(term, []).append(row)
+
+        terms = sorted(columns)
+        sizes = np.fromiter((len(columns[term]) for term in terms), dtype=np.int64, count=len(terms))
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=indptr[1:])
+        indices = np.fromiter(
+            (row for term in terms for row in columns[term]), dtype=np.int32, count=int(indptr[-1])
+        )
+        vocab = np.array(terms) if terms else np.array([], dtype=str)
+        return cls(vocab, indptr, indices, len(row_terms))
+
+    def ids(self, terms: Set[str]) -> List[int]:
+        if not terms or not self.vocab.size:
+            return []
+        query = np.array(sorted(terms))
+        positions = np.searchsorted(self.vocab, query)
+        found = positions < self.vocab.size
+        found[found] = self.vocab[positions[found]] == query[found]
+        return positions[found].tolist()
+
+    def overlap(self, terms: Set[str]) -> np.ndarray:
+        """|terms ∩ row terms| for every row."""
+        ids = self.ids(terms)
+        if not ids:
+            return np.zeros(self.rows, dtype=np.int64)
+        hits = np.concatenate([self.indices[self.indptr[i]:self.indptr[i + 1]] for i in ids])
+        return np.bincount(hits, minlength=self.rows)
+
+
+# ============================================================
+# Vectorized Hybrid Scoring
+# ============================================================
+
+class ScoringIndex:
+    """
+    compute_score for every file at once: keyword overlap and function
+    matches from postings, the semantic part from precomputed cosine
+    similarities. Scores are bit-identical to compute_score (same float64
+    operation order, same rounding).
+    """
+
+    def __init__(self, has_block: np.ndarray, fn_counts: np.ndarray,
+                 keywords: TermPostings, functions: TermPostings, digest: str = ""):
+        self.has_block = has_block
+        self.fn_counts = fn_counts
+        self.keywords = keywords
+        self.functions = functions
+        self.digest = digest
+
+    @classmethod
+    def build(cls, entries: List[Dict[str, Any]], digest: str = "") -> "ScoringIndex":
+        features = [file_features(entry) for entry in entries]
+        return cls(
+            np.fromiter((f[0] for f in features), dtype=bool, count=len(features)),
+            np.fromiter((max(len(f[2]), 1) for f in features), dtype=np.float64, count=len(features)),
+            TermPostings.from_rows([f[1] for f in features]),
+            TermPostings.from_rows([f[2] for f in features]),
+            digest,
+        )
+
+    def __len__(self) -> int:
+        return len(self.has_block)
+
+    def scores(self, task_keywords: List[str], similarities, rows=None) -> np.ndarray:
+        """
+        Rounded scores aligned with `similarities`; `rows` are the index rows
+        they belong to (default: every row, in order).
+        """
+        similarities = np.asarray(similarities, dtype=np.float32).astype(np.float64)
+        if not task_keywords:
+            return np.zeros(len(similarities))
+
+        task_set = {k.lower() for k in task_keywords}
+        keyword_score = self.keywords.overlap(task_set) / float(max(len(task_set), 1))
+        function_score = self.functions.overlap(task_set) / self.fn_counts
+        has_block = self.has_block
+
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+            keyword_score, function_score, has_block = keyword_score[rows], function_score[rows], has_block[rows]
+
+        final = W_SEMANTIC * similarities + W_KEYWORD * keyword_score + W_FUNCTION * function_score
+        return np.where(has_block, round_like_python(final, 3), 0.0)
+
+    # --------------------------------------------------------
+    # Storage
+    # --------------------------------------------------------
+
+    def save(self, path: Path):
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(
+                f, has_block=self.has_block, fn_counts=self.fn_counts, digest=np.array(self.digest),
+                kw_vocab=self.keywords.vocab, kw_indptr=self.keywords.indptr, kw_indices=self.keywords.indices,
+                fn_vocab=self.functions.vocab, fn_indptr=self.functions.indptr, fn_indices=self.functions.indices,
+            )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["ScoringIndex"]:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                rows = len(data["has_block"])
+                return cls(
+                    data["has_block"], data["fn_counts"],
+                    TermPostings(data["kw_vocab"], data["kw_indptr"], data["kw_indices"], rows),
+                    TermPostings(data["fn_vocab"], data["fn_indptr"], data["fn_indices"], rows),
+                    str(data["digest"]),
+                )
+        except Exception:
+            return None
+
+
+# ============================================================
+# Index Lifecycle (.codi/scoring.npz)
+# ============================================================
+
+def build_scoring_index(codi_dir: Path, entries: List[Dict[str, Any]], digest: Optional[str]):
+    """Precompute + save the scoring arrays during `codi init`."""
+    path = codi_dir / SCORING_FILE
+    if not digest:
+        path.unlink(missing_ok=True)
+        return
+    ScoringIndex.build(entries, digest).save(path)
+
+
+def load_scoring_index(codi_dir: Path, entries: List[Dict[str, Any]], digest: Optional[str]) -> ScoringIndex:
+    """The saved arrays when they belong to this index, else built now."""
+    scoring = ScoringIndex.load(codi_dir / SCORING_FILE) if digest else None
+    if scoring is None or scoring.digest != digest or len(scoring) != len(entries):
+        return ScoringIndex.build(entries)
+    return scoring
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def round_like_python(values: np.ndarray, digits: int) -> np.ndarray:
+    """
+    np.round scales by 10**digits first, which can land on the other side
+    of a .5 boundary than Python's correctly rounded round(). Re-round the
+    few values that sit near a boundary with round() itself.
+    """
+    scale = 10.0 ** digits
+    rounded = np.round(values, digits)
+    scaled = values * scale
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        rounded[i] = round(float(values[i]), digits)
+    return rounded
+
+
+def top_matches(scores: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+    """
+    Positions of positive scores, best first, ties in position order (what a
+    stable sort gives). With `limit`, argpartition avoids sorting everything.
+    """
+    positions = np.flatnonzero(scores > 0)
+
+    if limit is not None and limit < len(positions):
+        if limit <= 0:
+            return positions[:0]
+        kth = positions[np.argpartition(-scores[positions], limit - 1)[:limit]]
+        positions = positions[scores[positions] >= scores[kth].min()]
+
+    order = positions[np.lexsort((positions, -scores[positions]))]
+    return order if limit is None else order[:limit]
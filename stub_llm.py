@@ -0,0 +1,154 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+import typer
+
+
+# ============================================================
+# Stub OpenAI-compatible /chat/completions server
+# ============================================================
+
+def default_responder(prompt: str) -> str:
+    """Return a fixed metadata object so indexing/task code can parse it."""
+    return json.dumps({
+        "keywords": ["stub", "metadata"],
+        "capabilities": [],
+        "side_effects": [],
+        "inputs": [],
+        "outputs": [],
+        "risks": [],
+        "patterns": [],
+        "data_entities": [],
+        "external_dependencies": []
+    })
+
+
+class StubLLMServer:
+    """
+    Local server mimicking `POST /chat/completions` for tests and benchmarks.
+
+    with StubLLMServer(latency=0.05, error_rate=0.1) as stub:
+        os.environ["AI_URL"] = stub.url
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 429,
+                 responder: Optional[Callable[[str], str]] = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.responder = responder or default_responder
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/chat/completions"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                prompt = body.get("messages", [{}])[-1].get("content", "")
+
+                with stub.lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    fail = random.random() < stub.error_rate
+                    if fail:
+                        stub.errors += 1
+
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+
+                    if fail:
+                        self.send_response(stub.error_status)
+                        self.send_header("Retry-After", "0")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+
+                    content = stub.responder(prompt)
+                    payload = json.dumps({
+                        "id": "stub",
+                        "object": "chat.completion",
+                        "model": body.get("model"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop"
+                        }],
+                        "usage": {
+                            "prompt_tokens": len(prompt) // 4,
+                            "completion_tokens": len(content) // 4,
+                            "total_tokens": (len(prompt) + len(content)) // 4
+                        }
+                    }).encode()
+
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+        return Handler
+
+
+def main(
+    port: int = typer.Option(8765, help="Port to listen on"),
+    latency: float = typer.Option(0.0, help="Seconds of delay per request"),
+    error_rate: float = typer.Option(0.0, help="Fraction of requests that fail"),
+    error_status: int = typer.Option(429, help="HTTP status for failed requests"),
+):
+    """Run the stub server in the foreground."""
+    stub = StubLLMServer(port=port, latency=latency, error_rate=error_rate, error_status=error_status)
+    typer.echo(f"🧪 Stub LLM listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.server.server_close()
+
+
+if __name__ == "__main__":
+    typer.run(main)
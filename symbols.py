@@ -0,0 +1,239 @@
+import bisect
+import re
+from typing import List, Dict, Any
+
+
+# ============================================================
+# Language-aware Symbol Extraction
+# ============================================================
+#
+# One compiled pattern per language family, applied in a single finditer
+# pass. Every quantifier that could scan past the current token is
+# bounded, so the cost per start position is constant and the whole pass
+# is linear in file size — minified JS and huge generated files included.
+# Patterns open with a (?=[...]) first-character set so the regex engine
+# can skip ahead instead of trying every alternative at every position.
+#
+# End lines come from one brace-matching pass (C-like languages) or one
+# indentation pass (Python). `ast` was measured ~40x slower on a 50k-line
+# file, so Python goes through the same regex path.
+#
+# Each symbol: {"name", "kind", "start_line", "end_line", "offset"}
+# kind: "function" | "class" | "method"
+
+IDENT = r"[A-Za-z_$][\w$]{0,200}"
+WS = r"[ \t]{0,40}"
+
+# `name = (...) =>` / `name = function` are anchored on the "=" and the
+# name is read back from just before it (see name_before)
+JS_PATTERN = re.compile(
+    rf"(?=[fc=])(?:\bfunction\*?{WS}(?P<function>{IDENT})"
+    rf"|\bclass[ \t]{{1,40}}(?P<class>{IDENT})"
+    rf"|(?P<assigned>=){WS}(?:async[ \t]{{1,40}})?"
+    rf"(?:(?:\([^()\n]{{0,300}}\)|{IDENT}){WS}=>|function\b))"
+)
+
+JAVA_PATTERN = re.compile(
+    rf"(?=[ciep])(?:\b(?:class|interface|enum)[ \t]{{1,40}}(?P<class>{IDENT})"
+    r"|\b(?:public|private|protected)(?:[ \t]{1,40}(?:static|final|abstract|synchronized|native))*"
+    rf"[ \t]{{1,40}}[\w<>\[\],.?]{{1,120}}[ \t]{{1,40}}(?P<method>{IDENT}){WS}\()"
+)
+
+GO_PATTERN = re.compile(
+    rf"^func{WS}\([^()\n]{{0,200}}\){WS}(?P<method>{IDENT})"
+    rf"|^func[ \t]{{1,40}}(?P<function>{IDENT})"
+    rf"|^type[ \t]{{1,40}}(?P<class>{IDENT})[ \t]{{1,40}}(?:struct|interface)\b",
+    re.MULTILINE,
+)
+
+C_PATTERN = re.compile(
+    rf"^[ \t]{{0,40}}(?:class|struct)[ \t]{{1,40}}(?P<class>{IDENT})[^;{{}}()]{{0,200}}\{{"
+    r"|^[ \t]{0,40}(?:[\w:<>,~]{1,120}[ \t*&]{1,10}){1,6}?"
+    r"(?P<function>~?[A-Za-z_]\w{0,200}(?:::~?[A-Za-z_]\w{0,200})?)"
+    r"[ \t]{0,40}\([^;{}()]{0,300}\)[ \t]{0,40}(?:const[ \t]{0,40})?(?:noexcept[ \t]{0,40})?\n?[ \t]{0,40}\{",
+    re.MULTILINE,
+)
+
+PY_PATTERN = re.compile(
+    rf"^[ \t]{{0,200}}(?:async[ \t]{{1,40}})?def[ \t]{{1,40}}(?P<function>{IDENT})"
+    rf"|^[ \t]{{0,200}}class[ \t]{{1,40}}(?P<class>{IDENT})",
+    re.MULTILINE,
+)
+
+# The original six patterns (JS/Python/Java) in one pass, bounded
+GENERIC_PATTERN = re.compile(
+    rf"(?=[fcdp=])(?:\bfunction[ \t]{{1,40}}(?P<function>{IDENT})"
+    rf"|(?P<arrow>=){WS}\([^()\n]{{0,300}}\){WS}=>"
+    rf"|\bclass[ \t]{{1,40}}(?P<class>{IDENT})"
+    rf"|\bdef[ \t]{{1,40}}(?P<def>{IDENT})"
+    r"|\b(?:public|private|protected)[ \t]{1,40}[a-zA-Z<>]{1,120}[ \t]{1,40}"
+    rf"(?P<method>{IDENT}){WS}\()"
+)
+
+PATTERNS = {
+    ".py": PY_PATTERN,
+    ".js": JS_PATTERN, ".jsx": JS_PATTERN, ".ts": JS_PATTERN, ".tsx": JS_PATTERN,
+    ".html": JS_PATTERN,
+    ".java": JAVA_PATTERN,
+    ".go": GO_PATTERN,
+    ".c": C_PATTERN, ".h": C_PATTERN, ".cpp": C_PATTERN,
+}
+
+# Languages whose bodies are delimited by braces (end line via brace matching)
+BRACE_LANGUAGES = {".js", ".jsx", ".ts", ".tsx", ".html", ".java", ".go", ".c", ".h", ".cpp"}
+
+KIND_BY_GROUP = {
+    "function": "function", "arrow": "function", "assigned": "function", "def": "function",
+    "class": "class", "method": "method",
+}
+
+# Groups that capture the "=" of an assignment rather than the name
+ASSIGNMENT_GROUPS = {"arrow", "assigned"}
+
+C_NOT_FUNCTIONS = {"if", "for", "while", "switch", "return", "sizeof", "catch", "else"}
+
+# Brace matching: strings and line comments are skipped so their braces don't count
+BRACE_TOKEN = re.compile(
+    r'"(?:[^"\\\n]|\\.){0,2000}"'
+    r"|'(?:[^'\\\n]|\\.){0,2000}'"
+    r"|//[^\n]{0,10000}"
+    r"|[{}]"
+)
+
+BRACE_LOOKAHEAD = 400       # max chars from symbol start to its opening brace
+
+
+def extract_symbols(content: str, suffix: str = "") -> List[Dict[str, Any]]:
+    """Symbols with kind and 1-based line range, ordered by position."""
+
+    suffix = suffix.lower()
+    pattern = PATTERNS.get(suffix, GENERIC_PATTERN)
+    lines = LineIndex(content)
+
+    symbols = []
+    for match in pattern.finditer(content):
+        group = match.lastgroup
+        if group in ASSIGNMENT_GROUPS:
+            offset, name = name_before(content, match.start(group))
+            if not name:
+                continue
+        else:
+            offset, name = match.start(group), match.group(group)
+            if pattern is C_PATTERN and name in C_NOT_FUNCTIONS:
+                continue
+        line = lines.line_of(offset)
+        symbols.append({
+            "name": name,
+            "kind": KIND_BY_GROUP[group],
+            "start_line": line,
+            "end_line": line,
+            "offset": offset,
+        })
+
+    if suffix in BRACE_LANGUAGES and symbols:
+        assign_brace_ends(content, symbols, lines)
+    elif suffix == ".py" and symbols:
+        assign_indent_ends(content, symbols)
+
+    return symbols
+
+
+def symbol_names(symbols: List[Dict[str, Any]]) -> List[str]:
+    """Unique names, first occurrence order (the index `functions` list)."""
+    return list(dict.fromkeys(symbol["name"] for symbol in symbols))
+
+
+def public_symbol(symbol: Dict[str, Any]) -> Dict[str, Any]:
+    """What gets stored in the index (offsets are only valid for this read)."""
+    return {key: symbol[key] for key in ("name", "kind", "start_line", "end_line")}
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+class LineIndex:
+    """Offset ↔ line lookups from one linear scan for newlines."""
+
+    def __init__(self, content: str):
+        self.starts = [0]
+        self.starts.extend(match.end() for match in re.finditer("\n", content))
+
+    def line_of(self, offset: int) -> int:
+        return bisect.bisect_right(self.starts, offset)
+
+    def offset_of(self, line: int) -> int:
+        return self.starts[min(max(line, 1), len(self.starts)) - 1]
+
+
+def assign_brace_ends(content: str, symbols: List[Dict[str, Any]], lines: LineIndex):
+    """
+    One pass pairing braces with a stack, then each symbol ends where the
+    first brace after its start (within BRACE_LOOKAHEAD) closes.
+    """
+    opens, closes, stack = [], {}, []
+    for token in BRACE_TOKEN.finditer(content):
+        text = token.group()
+        if text == "{":
+            stack.append(token.start())
+            opens.append(token.start())
+        elif text == "}" and stack:
+            closes[stack.pop()] = token.start()
+
+    for symbol in symbols:
+        i = bisect.bisect_left(opens, symbol["offset"])
+        if i == len(opens) or opens[i] - symbol["offset"] > BRACE_LOOKAHEAD:
+            continue
+        close = closes.get(opens[i])
+        if close is not None:
+            symbol["end_line"] = lines.line_of(close)
+
+
+def name_before(content: str, end: int):
+    """(offset, identifier) ending just before `end`, skipping spaces; ("" if none)."""
+    i = end
+    while i > 0 and end - i < 40 and content[i - 1] in " \t":
+        i -= 1
+    start = i
+    while start > 0 and i - start < 200 and (content[start - 1].isalnum() or content[start - 1] in "_$"):
+        start -= 1
+    name = content[start:i]
+    if not name or name[0].isdigit():
+        return start, ""
+    return start, name
+
+
+def assign_indent_ends(content: str, symbols: List[Dict[str, Any]]):
+    """
+    One pass over the lines with a stack of open blocks: a block ends at the
+    last code line before the next line indented at or left of it. Lines
+    inside triple-quoted strings and comments don't close blocks. Methods
+    are functions whose enclosing block is a class.
+    """
+    starts = {symbol["start_line"]: symbol for symbol in symbols}
+    stack: List[Any] = []          # (indent, symbol)
+    last_code = 0
+    in_string = False
+
+    for number, text in enumerate(content.split("\n"), 1):
+        text = text.rstrip("\r")                # CRLF files: "\r" alone is a blank line
+        stripped = text.lstrip(" \t")
+        quotes = text.count('"""') + text.count("'''")
+
+        if not in_string and stripped and not stripped.startswith("#"):
+            indent = len(text) - len(stripped)
+            while stack and stack[-1][0] >= indent:
+                stack.pop()[1]["end_line"] = last_code
+
+            symbol = starts.get(number)
+            if symbol is not None:
+                if symbol["kind"] == "function" and stack and stack[-1][1]["kind"] == "class":
+                    symbol["kind"] = "method"
+                stack.append((indent, symbol))
+            last_code = number
+
+        if quotes % 2:
+            in_string = not in_string
+
+    for _, symbol in stack:
+        symbol["end_line"] = max(last_code, symbol["start_line"])
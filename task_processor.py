@@ -1,14 +1,36 @@
 import os
 import re
 import json
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
 import typer
 from rich.console import Console
-from sentence_transformers import SentenceTransformer, util
+from rich.markup import escape
 
 # Local utilities
-from codi.logic.utils import load_json, save_json
+from codi.logic.llm_client import post_chat
+from codi.logic.llm_cache import cached_completion, cache_summary
+from codi.logic.embeddings import (
+    semantic_fields,
+    file_embedding_text,
+    encode,
+    load_embeddings,
+    load_chunk_embeddings,
+    iter_chunks,
+    paths_digest,
+)
+from codi.logic.ann import load_ann_index
+from codi.logic.scoring import ScoringIndex, file_features, top_matches, load_scoring_index
+from codi.logic.graph import load_relation_graph
+from codi.logic.index_store import IndexReader, has_index, load_entries, index_digest
+from codi.logic.daemon import daemon_url, daemon_request
+from codi.logic.task_store import get_task_store
+from codi.logic.profiler import profiler, profiled
+from codi.logic.local_extractor import task_keywords as local_task_keywords
+from codi.constants import CODI_ANN_SHORTLIST, CODI_ANN_NPROBE, CODI_TASK_TOP_K, CODI_EXTRACTOR, AI_MAX_IN_FLIGHT
 
 
 # ============================================================
@@ -16,80 +38,120 @@ from codi.logic.utils import load_json, save_json
 # ============================================================
 
 console = Console()
-TASKS = Path(".codi/tasks.json")
-INDEX = Path(".codi/index.json")
-
-# Load embedding model (global init)
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+CODI_DIR = Path(".codi")
 
 
 # ============================================================
 # STORAGE UTILITIES
 # ============================================================
 
-def ensure_tasks_exists():
-    """Return loaded tasks JSON or empty dict."""
-    if not TASKS.exists():
-        return {}
-    return load_json(TASKS)
-
-
 def load_index():
-    """Load the code index, error if not found."""
-    if not INDEX.exists():
+    """
+    Open the code index, error if not found. Returns an IndexReader, which
+    parses entries on demand (only the top matches of a query), or the
+    entries of a legacy index.json.
+    """
+    if not has_index(CODI_DIR):
         console.print("[bold red]❌ No index found. Run `codi init` first.[/bold red]")
         raise typer.Exit()
-    return json.load(INDEX.open())
-
-
-def semantic_fields(semantic):
-    """Merge semantic metadata fields into one large list of strings."""
-    return (
-        semantic.get("keywords", []) +
-        semantic.get("capabilities", []) +
-        semantic.get("side_effects", []) +
-        semantic.get("inputs", []) +
-        semantic.get("outputs", []) +
-        semantic.get("risks", []) +
-        semantic.get("patterns", [])
-    )
+    reader = IndexReader.open(CODI_DIR)
+    return reader if reader is not None else load_entries(CODI_DIR)
+
+
+@profiled("task.save")
+def save_task(id: str, description: str, task_keywords, matches):
+    """Upsert one task into .codi/tasks.db (top matches only, as references)."""
+    get_task_store().save(id, description, task_keywords, matches)
+
+
+class WarmIndex:
+    """
+    Index entries plus everything scoring needs (file/chunk vectors, ANN
+    index), loaded once and reused across queries (`codi serve`, batches).
+    """
+
+    def __init__(self, index_data, file_vectors, chunks, chunk_vectors, ann, scoring, graph=None):
+        self.index_data = index_data
+        self.file_vectors = file_vectors
+        self.chunks = chunks
+        self.chunk_vectors = chunk_vectors
+        self.ann = ann
+        self.scoring = scoring
+        self.graph = graph
+        self.rows = index_data.rows if isinstance(index_data, IndexReader) else \
+            {entry["path"]: row for row, entry in enumerate(index_data)}
+
+    @classmethod
+    @profiled("index.warm")
+    def load(cls, index_data, stored_only: bool = False, codi_dir: Path = CODI_DIR):
+        """
+        Stored embeddings (row i ↔ index entry i). If they are missing or
+        stale, encode every file once in a single batch for this run — or
+        return None when `stored_only`. `index_data` may be an IndexReader:
+        then only chunked rows are parsed here, and matches on demand.
+        """
+        file_vectors = load_embeddings(codi_dir, index_data)
+        chunks = list(iter_chunks(index_data))
+        chunk_vectors = load_chunk_embeddings(codi_dir, index_data) if chunks else None
+
+        if file_vectors is None or (chunks and chunk_vectors is None):
+            if stored_only:
+                return None
+            console.print("[yellow]⚠ Embeddings missing or stale — run `codi init` to persist them.[/yellow]")
+        if file_vectors is None:
+            file_vectors = encode([file_embedding_text(entry) for entry in index_data])
+        if chunks and chunk_vectors is None:
+            chunk_vectors = encode([file_embedding_text(chunk) for _, _, chunk in chunks])
+
+        ann = load_ann_index(codi_dir, paths_digest(index_data))
+        digest = index_data.digest if isinstance(index_data, IndexReader) else index_digest(codi_dir)
+        scoring = load_scoring_index(codi_dir, index_data, digest)
+        graph = load_relation_graph(codi_dir, index_data, digest)
+        return cls(index_data, file_vectors, chunks, chunk_vectors, ann, scoring, graph)
+
+    def best_chunks(self, task_vector):
+        """{file row: (chunk, similarity)} for the best-matching chunk of each chunked file."""
+        if not self.chunks:
+            return {}
+        return best_chunks_from_similarities(self.chunks, self.chunk_vectors @ task_vector)
 
 
 # ============================================================
 # SCORING ENGINE
 # ============================================================
 
-def compute_score(task_keywords, file_meta):
+def compute_score(task_keywords, file_meta, semantic_score=None):
     """
     Hybrid scoring: semantic similarity + keyword overlap + function matching.
+    `semantic_score` is the precomputed task/file cosine similarity; it is
+    computed on the fly when not given.
+
+    Reference implementation only — no ranking path calls it. `codi task`,
+    batches and the daemon score through scoring.ScoringIndex, which must
+    give identical scores for all files at once; tests/test_scoring.py and
+    `bench.py scoring` check the two against each other.
     """
 
     if not task_keywords:
         return 0.0
 
-    semantic = file_meta.get("semantic", {})
-    functions = file_meta.get("functions", [])
-
-    sem_block = semantic_fields(semantic) + functions
-    file_keywords = semantic.get("keywords", [])
+    has_block, file_set, fn_set = file_features(file_meta)
 
-    if not sem_block:
+    if not has_block:
         return 0.0
 
     # --- Keyword overlap ---
     task_set = {k.lower() for k in task_keywords}
-    file_set = {k.lower() for k in file_keywords}
     keyword_score = len(task_set & file_set) / max(len(task_set), 1)
 
     # --- Function name matching ---
-    fn_set = {fn.lower() for fn in functions}
     function_score = len(task_set & fn_set) / max(len(fn_set), 1)
 
     # --- Semantic embedding similarity ---
-    emb_task = model.encode(" ".join(task_keywords), convert_to_tensor=True)
-    emb_file = model.encode(" ".join(sem_block), convert_to_tensor=True)
-
-    semantic_score = float(util.cos_sim(emb_task, emb_file))
+    if semantic_score is None:
+        sem_block = semantic_fields(file_meta.get("semantic", {})) + file_meta.get("functions", [])
+        emb_task, emb_file = encode([" ".join(task_keywords), " ".join(sem_block)])
+        semantic_score = float(emb_task @ emb_file)
 
     # --- Weighted hybrid score ---
     final_score = (
@@ -101,6 +163,62 @@ def compute_score(task_keywords, file_meta):
     return round(final_score, 3)
 
 
+@profiled("score.shortlist")
+def shortlist_candidates(task_keywords, index_data, warm=None, task_vector=None):
+    """
+    Encode the task once (unless `task_vector` is given) and return (rows,
+    cosine similarities, best chunks) to rescore. Uses the IVF index from
+    `codi init` when present, else every row via one matrix-vector product.
+    A chunked file's similarity is the best of its file-level and
+    chunk-level similarities.
+    """
+    if not task_keywords or not len(index_data):
+        return range(len(index_data)), [0.0] * len(index_data), {}
+
+    warm = warm or WarmIndex.load(index_data)
+    file_vectors, ann = warm.file_vectors, warm.ann
+    if task_vector is None:
+        task_vector = encode([" ".join(task_keywords)])[0]
+    best_chunks = warm.best_chunks(task_vector)
+
+    if ann is None:
+        rows = np.arange(len(index_data))
+        similarities = file_vectors @ task_vector
+    else:
+        rows = ann.search(file_vectors, task_vector, CODI_ANN_SHORTLIST, CODI_ANN_NPROBE)
+        rows = np.union1d(rows, np.fromiter(best_chunks, dtype=np.int64))
+        similarities = np.asarray(file_vectors[rows], dtype=np.float32) @ task_vector
+
+    # rows are sorted: place each chunked file's best chunk without a Python loop over rows
+    similarities = np.array(similarities, dtype=np.float32)
+    if best_chunks:
+        chunk_rows = np.fromiter(best_chunks, dtype=np.int64, count=len(best_chunks))
+        chunk_similarities = np.fromiter((best[1] for best in best_chunks.values()),
+                                         dtype=np.float32, count=len(best_chunks))
+        positions = np.searchsorted(rows, chunk_rows)
+        found = positions < len(rows)
+        found[found] = np.asarray(rows)[positions[found]] == chunk_rows[found]
+        positions = positions[found]
+        similarities[positions] = np.maximum(similarities[positions], chunk_similarities[found])
+
+    return rows, similarities, best_chunks
+
+
+def rank_files(task_keywords, warm, limit=None, task_vector=None):
+    """Ranking against a loaded index: all matches, or the top `limit`."""
+    candidates, similarities, best_chunks = shortlist_candidates(task_keywords, warm.index_data, warm, task_vector)
+    return build_matches(task_keywords, warm.index_data, candidates, similarities, best_chunks,
+                         scoring=warm.scoring, limit=limit, graph=warm.graph)
+
+
+def best_chunks_from_similarities(chunks, similarities):
+    best = {}
+    for (row, _, chunk), similarity in zip(chunks, similarities):
+        if row not in best or similarity > best[row][1]:
+            best[row] = (chunk, float(similarity))
+    return best
+
+
 # ============================================================
 # TASK LISTING
 # ============================================================
@@ -108,39 +226,42 @@ def compute_score(task_keywords, file_meta):
 def list_tasks():
     console.print("\n[bold cyan]📋 Saved Tasks:[/bold cyan]\n")
 
-    tasks = ensure_tasks_exists()
-    if not tasks:
+    # Summary columns only: match lists are never read
+    summaries = list(get_task_store().summaries())
+    if not summaries:
         console.print("[bold red]❌ No tasks created yet.[/bold red]")
         return
 
-    for task_id, data in tasks.items():
-        console.print(f"[bold yellow]ID:[/bold yellow] {task_id}")
-        console.print(f"  📝 {data.get('description', '')}")
+    # One print call without auto-highlighting: rendering dominates with many tasks
+    lines = []
+    for task_id, description, best_file, best_score in summaries:
+        lines.append(f"[bold yellow]ID:[/bold yellow] {escape(task_id)}")
+        lines.append(f"  📝 {escape(description)}")
 
-        best = (data.get("matches") or [{}])[0]
-        if best:
-            console.print(
-                f"  📌 Best match: {best.get('file')} "
-                f"({best.get('score')})"
+        if best_file:
+            lines.append(
+                f"  📌 Best match: {escape(best_file)} "
+                f"({best_score})"
             )
-        console.print("")
+        lines.append("")
+    console.print("\n".join(lines), highlight=False, soft_wrap=True)
 
 
 # ============================================================
 # TASK RE-RUN
 # ============================================================
 
-def run_existing_task(id: str):
+def run_existing_task(id: str, projects: Optional[Dict[str, Path]] = None):
     console.print("\n[bold cyan]🔁 Re-processing task...[/bold cyan]\n")
 
-    tasks = ensure_tasks_exists()
+    task = get_task_store().get(id)
 
-    if id not in tasks:
+    if task is None:
         console.print(f"[bold red]❌ Task '{id}' does not exist.[/bold red]")
         console.print(f"👉 Run: [yellow]codi task --id {id} --desc \"your description\"[/yellow]")
         raise typer.Exit()
 
-    process_task(id, tasks[id]["description"])
+    process_task(id, task["description"], projects)
     console.print("\n[bold green]✓ Task reprocessed successfully![/bold green]\n")
 
 
@@ -148,9 +269,9 @@ def run_existing_task(id: str):
 # CREATE OR UPDATE TASK
 # ============================================================
 
-def create_or_update_task(id: str, description: str):
+def create_or_update_task(id: str, description: str, projects: Optional[Dict[str, Path]] = None):
     console.print(f"📝 Updating task: [bold]{id}[/bold]")
-    process_task(id, description)
+    process_task(id, description, projects)
     console.print("\n[bold green]✓ Task saved & processed![/bold green]\n")
 
 
@@ -158,49 +279,196 @@ def create_or_update_task(id: str, description: str):
 # MAIN TASK PROCESSOR
 # ============================================================
 
-def process_task(id: str, description: str):
+def process_task(id: str, description: str, projects: Optional[Dict[str, Path]] = None):
+    """Score and save one task; `projects` (name → root) scores it across those indexes instead."""
     console.print("🔑 Extracting keywords...")
 
-    task_keywords = extract_keywords_from_ai(description)
-    console.print(f"[green]✓ Keywords:[/green] {task_keywords}\n")
-
-    index_data = load_index()
-    matches = []
-
-    # Score each index entry
-    for entry in index_data:
-        score = compute_score(task_keywords, entry)
-
-        if score > 0:
-            matches.append({
-                "file": entry.get("path"),
-                "score": score,
-                "functions": entry.get("functions", []),
-                "keywords": entry.get("keywords", []),
-                "semantic": entry.get("semantic", {}),
-                "related_files": entry.get("related_files", []),
-            })
-
-    # Sort best → worst
-    matches.sort(key=lambda x: x["score"], reverse=True)
-
-    # Store
-    tasks = ensure_tasks_exists()
-    tasks[id] = {
-        "description": description,
-        "keywords": task_keywords,
-        "matches": matches,
-    }
-    save_json(TASKS, tasks)
+    with profiler.span("task.keywords"):
+        task_keywords = extract_keywords_from_ai(description)
+    console.print(f"[green]✓ Keywords:[/green] {task_keywords}")
+    if cache_summary():
+        console.print(f"[dim]{cache_summary()}[/dim]")
+    console.print("")
+
+    # A running `codi serve` already holds the index + model: let it score & store
+    matches = None
+    url = None if projects else daemon_url(CODI_DIR)
+    if projects:
+        from codi.logic.federation import rank_projects
+
+        with profiler.span("task.federation", projects=len(projects)):
+            matches, errors = rank_projects(task_keywords, projects, CODI_TASK_TOP_K)
+        for project, error in errors.items():
+            console.print(f"[yellow]⚠ Skipped project {project}:[/yellow] {error}")
+        console.print(f"[dim]🌐 Scored across {len(projects) - len(errors)} project(s)[/dim]")
+        save_task(id, description, task_keywords, matches)
+
+    elif url:
+        try:
+            with profiler.span("task.daemon"):
+                matches = daemon_request(url, "/task", {
+                    "id": id, "description": description, "keywords": task_keywords, "limit": 5,
+                })["matches"]
+            console.print("[dim]⚡ Scored by codi serve[/dim]")
+        except OSError:
+            matches = None
+
+    if matches is None:
+        index_data = load_index()
+        matches = rank_files(task_keywords, WarmIndex.load(index_data), CODI_TASK_TOP_K) \
+            if task_keywords and index_data else []
+        save_task(id, description, task_keywords, matches)
 
     # Display
     console.print("\n📁 [cyan]Top matching files:[/cyan]")
     for m in matches[:5]:
-        console.print(f"  → {m['file']} ({m['score']})")
+        chunk = m.get("chunk")
+        where = f" :: {chunk['name']} L{chunk['start_line']}-{chunk['end_line']}" if chunk else ""
+        console.print(f"  → {m['file']}{where} ({m['score']})")
 
     return matches
 
 
+@profiled("score.rank")
+def build_matches(task_keywords, index_data, candidates, similarities, best_chunks,
+                  scoring=None, limit=None, graph=None):
+    """
+    Score candidate rows → match records, best first. With `limit`, only
+    the top `limit` records are built (same order as the full list).
+    `scoring` is a ScoringIndex over the whole index, if one is loaded;
+    `graph` (a RelationGraph) re-ranks the scores along related_files.
+    """
+
+    # Score every candidate at once
+    rows = np.asarray(candidates, dtype=np.int64)
+    if scoring is None:
+        # Only the candidates' features (an ANN shortlist is a small slice)
+        scores = ScoringIndex.build([index_data[row] for row in rows]).scores(task_keywords, similarities)
+    else:
+        scores = scoring.scores(task_keywords, similarities, rows)
+
+    if graph is not None:
+        with profiler.span("score.graph"):
+            rows, scores = graph.rerank(rows, scores)
+
+    # Best → worst; only the records that are returned get built
+    scored = [(float(scores[i]), int(rows[i])) for i in top_matches(scores, limit)]
+
+    matches = []
+    for score, row in scored:
+        entry = index_data[row]
+        matches.append({
+            "file": entry.get("path"),
+            "score": score,
+            "functions": entry.get("functions", []),
+            "keywords": entry.get("keywords", []),
+            "semantic": entry.get("semantic", {}),
+            "related_files": entry.get("related_files", []),
+        })
+
+        # Function-level hit for large, chunked files
+        if row in best_chunks:
+            chunk = best_chunks[row][0]
+            matches[-1]["chunk"] = {
+                "name": chunk["name"],
+                "start_line": chunk["start_line"],
+                "end_line": chunk["end_line"],
+            }
+
+    return matches
+
+
+# ============================================================
+# BATCH TASK PROCESSOR
+# ============================================================
+
+BATCH_BLOCK = 64        # stories per similarity block (bounds the stories × files matrix)
+
+
+def load_stories(path: Path):
+    """JSON Lines: {"id": ..., "desc" | "description": ...} per line."""
+    stories = []
+    with path.open() as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                story = json.loads(line)
+            except json.JSONDecodeError:
+                story = None
+            if not isinstance(story, dict):
+                console.print(f"[yellow]⚠ Skipping line {number}: not a JSON object[/yellow]")
+                continue
+            description = story.get("desc") or story.get("description")
+            if not story.get("id") or not description:
+                console.print(f"[yellow]⚠ Skipping line {number}: needs \"id\" and \"desc\"[/yellow]")
+                continue
+            stories.append((str(story["id"]), description))
+    return stories
+
+
+def process_batch(path: Path):
+    """
+    Score many stories in one process: the index and embeddings are loaded
+    once, keywords are extracted concurrently, all stories are encoded in one
+    call and scored against every file with one matrix product per block,
+    and all tasks are saved in one transaction at the end.
+    """
+    stories = load_stories(path)
+    if not stories:
+        console.print("[bold red]❌ No stories found.[/bold red]")
+        return
+
+    start = time.perf_counter()
+    index_data = load_index()
+
+    console.print(f"🔑 Extracting keywords for {len(stories)} stories...")
+    with profiler.span("task.keywords", stories=len(stories)), ThreadPoolExecutor(max_workers=AI_MAX_IN_FLIGHT) as pool:
+        all_keywords = list(pool.map(extract_keywords_from_ai, [desc for _, desc in stories]))
+    if cache_summary():
+        console.print(f"[dim]{cache_summary()}[/dim]")
+
+    scored = [i for i, keywords in enumerate(all_keywords) if keywords]
+    results = [[] for _ in stories]
+
+    if scored and index_data:
+        warm = WarmIndex.load(index_data)
+        story_vectors = encode([" ".join(all_keywords[i]) for i in scored])
+        chunks = warm.chunks
+        chunk_similarities = warm.chunk_vectors @ story_vectors.T if chunks else None
+        rows = np.arange(len(index_data))
+
+        for block in range(0, len(scored), BATCH_BLOCK):
+            with profiler.span("score.similarity", stories=len(scored[block:block + BATCH_BLOCK])):
+                similarities = story_vectors[block:block + BATCH_BLOCK] @ np.asarray(warm.file_vectors).T
+
+            for offset, file_similarities in enumerate(similarities):
+                column = block + offset
+                best_chunks = {}
+                if chunk_similarities is not None:
+                    best_chunks = best_chunks_from_similarities(chunks, chunk_similarities[:, column])
+                    for row, (_, similarity) in best_chunks.items():
+                        file_similarities[row] = max(file_similarities[row], similarity)
+
+                i = scored[column]
+                results[i] = build_matches(all_keywords[i], index_data, rows, file_similarities, best_chunks,
+                                           scoring=warm.scoring, limit=CODI_TASK_TOP_K, graph=warm.graph)
+
+    tasks = [(id, description, keywords, matches)
+             for (id, description), keywords, matches in zip(stories, all_keywords, results)]
+    for id, _, _, matches in tasks:
+        best = f"{matches[0]['file']} ({matches[0]['score']})" if matches else "no matches"
+        console.print(f"  ✓ [bold]{id}[/bold] → {best}")
+    with profiler.span("task.save", tasks=len(tasks)):
+        get_task_store().save_many(tasks)
+
+    elapsed = time.perf_counter() - start
+    console.print(
+        f"\n[bold green]✓ {len(stories)} stories processed in {elapsed:.2f}s "
+        f"({len(stories) / max(elapsed, 1e-9):.1f} stories/s)[/bold green]\n"
+    )
+
+
 # ============================================================
 # AI KEYWORD EXTRACTION (INLINE)
 # ============================================================
@@ -209,12 +477,32 @@ class MissingAPIKeyError(Exception):
     pass
 
 
+# Bump whenever build_keyword_prompt changes so cached keywords are dropped.
+TASK_PROMPT_VERSION = "1"
+
+KEYWORD_EXTRACTORS = ("llm", "local")
+_extractor = CODI_EXTRACTOR
+
+
+def set_extractor(name: str):
+    """`--extractor`: "llm" or "local" (offline, no network)."""
+    global _extractor
+    if name not in KEYWORD_EXTRACTORS:
+        raise ValueError(f"Unknown extractor {name!r} (choose from: {', '.join(KEYWORD_EXTRACTORS)})")
+    _extractor = name
+
+
 def extract_keywords_from_ai(content: str):
-    """LLM-powered keyword extraction."""
+    """LLM-powered keyword extraction (served from the LLM cache when possible)."""
+    if _extractor == "local":
+        return local_task_keywords(content)
+
     api_key, model, url = validate_ai_env()
-    prompt = build_keyword_prompt(content)
-    response = call_ai_api(api_key, model, url, prompt)
-    data = safe_json_extract_object(response)
+    data = cached_completion(
+        model, url, f"task:{TASK_PROMPT_VERSION}", content,
+        complete=lambda: call_ai_api(api_key, model, url, build_keyword_prompt(content)),
+        parse=safe_json_extract_object,
+    )
     return data.get("keywords", [])
 
 
@@ -259,30 +547,18 @@ TEXT:
 
 def call_ai_api(api_key, model, url, prompt):
     """Call OpenAI-compatible LLM API."""
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-
-    payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.0
-    }
-
-    response = requests.post(url, headers=headers, json=payload, timeout=30)
-    response.raise_for_status()
-
-    return response.json()["choices"][0]["message"]["content"]
+    return post_chat(api_key, model, url, prompt, temperature=0.0)
 
 
 def safe_json_extract_object(text: str):
     """Extract and parse JSON from arbitrary AI output."""
     match = re.search(r"\{[\s\S]*?\}", text)
     if not match:
+        profiler.count("llm.json_parse_failures")
         return {"keywords": []}
 
     try:
         return json.loads(match.group(0))
     except json.JSONDecodeError:
+        profiler.count("llm.json_parse_failures")
         return {"keywords": []}
@@ -0,0 +1,145 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from codi.constants import CODI_TASK_TOP_K
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+#
+# .codi/tasks.db   one row per task: description, keywords, the best match
+#                  (denormalized for `codi task --list`) and the top
+#                  CODI_TASK_TOP_K matches as references into the index —
+#                  {"file", "score"[, "chunk"]}, never copies of index entries.
+#
+# A legacy .codi/tasks.json is imported on first open and renamed to
+# tasks.json.bak.
+
+TASKS_DB = Path(".codi/tasks.db")
+LEGACY_TASKS = "tasks.json"
+
+
+def match_reference(match: Dict[str, Any]) -> Dict[str, Any]:
+    """What is stored per match; everything else is looked up in the index."""
+    ref = {"file": match.get("file"), "score": match.get("score")}
+    if match.get("chunk"):
+        ref["chunk"] = match["chunk"]
+    return ref
+
+
+# ============================================================
+# SQLite Task Store
+# ============================================================
+
+class TaskStore:
+    """
+    Saving a task upserts its row (rewriting nothing else); listing reads
+    only the summary columns. Tasks keep their first-saved order, like the
+    old tasks.json dict did.
+    """
+
+    def __init__(self, path: Path, top_k: int = CODI_TASK_TOP_K):
+        self.path = path
+        self.top_k = top_k
+        self.lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                description TEXT NOT NULL,
+                keywords TEXT NOT NULL,
+                best_file TEXT,
+                best_score REAL,
+                matches TEXT NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self.migrate(path.parent / LEGACY_TASKS)
+
+    def row(self, id: str, description: str, keywords: List[str], matches: List[Dict[str, Any]]) -> Tuple:
+        refs = [match_reference(m) for m in matches[:self.top_k]]
+        best = refs[0] if refs else {}
+        return (id, description, json.dumps(keywords), best.get("file"), best.get("score"),
+                json.dumps(refs, separators=(",", ":")), time.time())
+
+    def save_many(self, tasks: List[Tuple[str, str, List[str], List[Dict[str, Any]]]]):
+        """Upsert (id, description, keywords, matches) tuples in one transaction."""
+        rows = [self.row(*task) for task in tasks]
+        with self.lock:
+            self.db.executemany("""
+                INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    description = excluded.description,
+                    keywords = excluded.keywords,
+                    best_file = excluded.best_file,
+                    best_score = excluded.best_score,
+                    matches = excluded.matches,
+                    updated = excluded.updated
+            """, rows)
+            self.db.commit()
+
+    def save(self, id: str, description: str, keywords: List[str], matches: List[Dict[str, Any]]):
+        self.save_many([(id, description, keywords, matches)])
+
+    def get(self, id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT description, keywords, matches FROM tasks WHERE id = ?", (id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"description": row[0], "keywords": json.loads(row[1]), "matches": json.loads(row[2])}
+
+    def summaries(self) -> Iterator[Tuple[str, str, Optional[str], Optional[float]]]:
+        """(id, description, best file, best score) per task, without touching match lists."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, description, best_file, best_score FROM tasks ORDER BY rowid"
+            ).fetchall()
+        return iter(rows)
+
+    def migrate(self, legacy: Path):
+        """Import an old tasks.json (compacting its matches), then set it aside."""
+        if not legacy.exists():
+            return
+        try:
+            with legacy.open() as f:
+                tasks = json.load(f)
+        except Exception:
+            return
+        if not isinstance(tasks, dict):         # not a tasks.json we wrote: leave it in place
+            return
+
+        self.save_many([
+            (id, data.get("description", ""), data.get("keywords", []), data.get("matches", []))
+            for id, data in tasks.items() if isinstance(data, dict)
+        ])
+        legacy.replace(legacy.with_name(LEGACY_TASKS + ".bak"))
+
+    def close(self):
+        self.db.close()
+
+
+# ============================================================
+# Module-level Access
+# ============================================================
+
+_store: Optional[TaskStore] = None
+_store_lock = threading.Lock()
+
+
+def get_task_store() -> TaskStore:
+    """The process-wide store for the project in the current directory."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TaskStore(TASKS_DB)
+        return _store
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from codi.logic.imports_graph import import_specs, link_imports
+
+
+def link(files):
+    """{path: source} → {path: resolved imports}."""
+    entries = [{"path": path, "import_specs": import_specs(text, Path(path).suffix)} for path, text in files.items()]
+    link_imports(entries, Path("/nonexistent"))
+    return {entry["path"]: entry["imports"] for entry in entries}
+
+
+# ============================================================
+# Python
+# ============================================================
+
+def test_stdlib_never_binds_to_project_files():
+    imports = link({
+        "app/main.py": "import json\nimport queue\nfrom types import SimpleNamespace\nimport app.util.types\n",
+        "tests/fixtures/json.py": "",
+        "workers/queue.py": "",
+        "app/util/types.py": "",
+    })
+    assert imports["app/main.py"] == ["app/util/types.py"]
+
+
+def test_absolute_imports_do_not_match_at_any_depth():
+    imports = link({
+        "app/main.py": "import helpers\nfrom models import User\n",
+        "vendor/lib/helpers.py": "",
+        "tests/fixtures/models.py": "",
+    })
+    assert imports["app/main.py"] == []
+
+
+def test_absolute_imports_from_project_root():
+    imports = link({
+        "app/main.py": "from app.db import session\nimport app.util\n",
+        "app/db.py": "",
+        "app/util/__init__.py": "",
+    })
+    assert imports["app/main.py"] == ["app/db.py", "app/util/__init__.py"]
+
+
+def test_learned_source_root():
+    imports = link({
+        "src/shop/cart.py": "from shop.db import session\nfrom shop import models\n",
+        "src/shop/db.py": "",
+        "src/shop/models.py": "",
+        "src/shop/__init__.py": "",
+    })
+    assert imports["src/shop/cart.py"] == ["src/shop/__init__.py", "src/shop/db.py", "src/shop/models.py"]
+
+
+def test_learned_package_prefix_in_a_flat_checkout():
+    imports = link({
+        "cli.py": "from codi.logic.utils import run\nfrom codi.logic.scoring import score\nfrom rich.console import Console\n",
+        "utils.py": "",
+        "scoring.py": "",
+        "console.py": "",
+    })
+    assert imports["cli.py"] == ["scoring.py", "utils.py"]
+
+
+def test_relative_imports():
+    imports = link({
+        "pkg/sub/a.py": "from . import b\nfrom ..c import run\nfrom .missing import x\n",
+        "pkg/sub/b.py": "",
+        "pkg/c.py": "",
+    })
+    assert imports["pkg/sub/a.py"] == ["pkg/c.py", "pkg/sub/b.py"]
+
+
+def test_imported_by_is_the_reverse():
+    files = {"a.py": "import b\n", "b.py": "import c\n", "c.py": ""}
+    entries = [{"path": path, "import_specs": import_specs(text, ".py")} for path, text in files.items()]
+    link_imports(entries, Path("/nonexistent"))
+    assert {entry["path"]: entry["imported_by"] for entry in entries} == {"a.py": [], "b.py": ["a.py"], "c.py": ["b.py"]}
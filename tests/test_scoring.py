@@ -0,0 +1,120 @@
+import random
+
+import numpy as np
+import pytest
+
+from codi.logic.scoring import ScoringIndex
+from codi.logic.task_processor import build_matches, compute_score
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+
+WORDS = [f"term{i}" for i in range(300)]
+
+
+def make_entries(n: int, seed: int = 0):
+    """Index-shaped entries; some duplicated (ties) and some with nothing to score."""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(n):
+        keywords = rng.sample(WORDS, rng.randint(0, 8))
+        entries.append({
+            "path": f"src/module{i:04d}.py",
+            "semantic": {"keywords": [k.upper() if rng.random() < 0.2 else k for k in keywords],
+                         "capabilities": rng.sample(WORDS, 2)},
+            "keywords": keywords,
+            "functions": [f"fn_{i}_{j}" for j in range(rng.randint(0, 5))],
+        })
+
+    for entry in rng.sample(entries, n // 10):
+        entry["semantic"], entry["functions"] = {}, []
+    for i in range(0, n - 1, 7):       # identical features → identical scores
+        entries[i + 1]["semantic"] = dict(entries[i]["semantic"])
+        entries[i + 1]["functions"] = list(entries[i]["functions"])
+    return entries
+
+
+def random_query(rng: random.Random, entries):
+    keywords = [w.upper() if rng.random() < 0.3 else w for w in rng.sample(WORDS, rng.randint(1, 6))]
+    if rng.random() < 0.5:
+        with_functions = [entry for entry in entries if entry["functions"]]
+        keywords.append(rng.choice(with_functions)["functions"][0].upper())
+    return keywords
+
+
+def random_similarities(seed: int, n: int, ties: bool = False) -> np.ndarray:
+    similarities = np.random.default_rng(seed).uniform(-0.2, 0.9, n).astype(np.float32)
+    if ties:        # few distinct values, landing on rounding boundaries
+        similarities = (np.round(similarities, 1) + np.float32(0.001)).astype(np.float32)
+    return similarities
+
+
+def reference_scores(task_keywords, entries, similarities):
+    return [compute_score(task_keywords, entry, float(similarity)) for entry, similarity in zip(entries, similarities)]
+
+
+# ============================================================
+# ScoringIndex ↔ compute_score
+# ============================================================
+
+@pytest.mark.parametrize("seed", range(20))
+def test_scores_match_compute_score(seed):
+    entries = make_entries(400, seed)
+    engine = ScoringIndex.build(entries)
+    rng = random.Random(seed)
+
+    keywords = random_query(rng, entries)
+    similarities = random_similarities(seed, len(entries), ties=seed % 2 == 0)
+
+    expected = reference_scores(keywords, entries, similarities)
+    assert engine.scores(keywords, similarities).tolist() == expected
+
+
+def test_scores_on_a_shortlist_match_compute_score():
+    entries = make_entries(400, 1)
+    engine = ScoringIndex.build(entries)
+    keywords = random_query(random.Random(1), entries)
+    rows = np.sort(np.random.default_rng(1).choice(len(entries), 50, replace=False))
+    similarities = random_similarities(1, len(rows))
+
+    expected = reference_scores(keywords, [entries[row] for row in rows], similarities)
+    assert engine.scores(keywords, similarities, rows).tolist() == expected
+
+
+def test_empty_keywords_score_zero():
+    entries = make_entries(50)
+    similarities = random_similarities(0, len(entries))
+
+    assert ScoringIndex.build(entries).scores([], similarities).tolist() == [0.0] * len(entries)
+    assert reference_scores([], entries, similarities) == [0.0] * len(entries)
+
+
+def test_empty_index():
+    engine = ScoringIndex.build([])
+    assert engine.scores(["term1"], np.zeros(0, dtype=np.float32)).tolist() == []
+
+
+# ============================================================
+# Ranking order (ties keep index order)
+# ============================================================
+
+@pytest.mark.parametrize("seed", range(5))
+def test_build_matches_ranks_like_a_stable_sort(seed):
+    entries = make_entries(300, seed)
+    engine = ScoringIndex.build(entries)
+    keywords = random_query(random.Random(seed), entries)
+    similarities = random_similarities(seed, len(entries), ties=True)
+
+    scored = [(score, row) for row, score in enumerate(reference_scores(keywords, entries, similarities)) if score > 0]
+    scored.sort(key=lambda x: x[0], reverse=True)
+    expected = [(entries[row]["path"], score) for score, row in scored]
+    assert len({score for score, _ in scored}) < len(scored), "fixture should produce tied scores"
+
+    rows = np.arange(len(entries))
+    full = build_matches(keywords, entries, rows, similarities, {}, scoring=engine)
+    top = build_matches(keywords, entries, rows, similarities, {}, scoring=engine, limit=10)
+
+    assert [(m["file"], m["score"]) for m in full] == expected
+    assert [(m["file"], m["score"]) for m in top] == expected[:10]
@@ -0,0 +1,67 @@
+import sys
+
+import pytest
+
+from codi.logic.watcher import InotifyWatcher, RESCAN
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    (tmp_path / ".gitignore").write_text("build/\n")
+    w = InotifyWatcher(tmp_path)
+    yield w
+    w.close()
+
+
+def drain(w):
+    """Every event queued so far: merged touched paths, or RESCAN."""
+    touched = w.wait(0.5)
+    while True:
+        more = w.wait(0.1)
+        if more is RESCAN:
+            touched = RESCAN
+        elif not more:
+            return touched
+        elif touched is not RESCAN:
+            touched |= more
+
+
+# ============================================================
+# New directories
+# ============================================================
+
+def test_skipped_and_ignored_dirs_are_not_watched(watcher, tmp_path):
+    (tmp_path / "node_modules" / "lodash" / "dist").mkdir(parents=True)
+    (tmp_path / "build" / "out").mkdir(parents=True)
+
+    assert drain(watcher) == set()
+    assert set(watcher.dirs.values()) == {""}
+
+
+def test_nested_gitignore_applies_to_new_dirs(watcher, tmp_path):
+    (tmp_path / "app").mkdir()
+    assert drain(watcher) is RESCAN
+    (tmp_path / "app" / ".gitignore").write_text("dist/\n")       # added once app/ is watched
+    assert drain(watcher) is RESCAN
+
+    (tmp_path / "app" / "dist").mkdir()
+    assert drain(watcher) == set()
+    assert "app/dist" not in watcher.dirs.values()
+
+
+def test_new_source_dir_is_watched(watcher, tmp_path):
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+
+    assert drain(watcher) is RESCAN
+    assert {"src", "src/pkg"} <= set(watcher.dirs.values())
+
+
+def test_watch_limit_does_not_crash_wait(watcher, tmp_path, monkeypatch):
+    def exhausted(*args):
+        raise OSError(28, "inotify_add_watch failed (raise fs.inotify.max_user_watches or use --poll)")
+    monkeypatch.setattr(watcher, "add_tree", exhausted)
+
+    (tmp_path / "src").mkdir()
+    assert drain(watcher) is RESCAN
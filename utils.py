@@ -23,5 +23,9 @@ def load_json(path: Path):
 
 
 def save_json(path: Path, data):
+    """Write via a temp file + rename so readers never see a partial file."""
     path.parent.mkdir(exist_ok=True)
-    json.dump(data, path.open("w"), indent=2)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("w") as f:
+        json.dump(data, f, indent=2)
+    tmp.replace(path)
@@ -0,0 +1,288 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+import typer
+
+from codi.logic.ingest import scan_project, load_gitignore, is_ignored, GitIgnoreRule
+from codi.logic.utils import is_text_file
+from codi.constants import (
+    SKIP_DIRS,
+    SKIP_FILES,
+    CODI_SCAN_WORKERS,
+    CODI_WATCH_DEBOUNCE,
+    CODI_WATCH_MAX_DELAY,
+    CODI_WATCH_POLL,
+)
+
+
+# ============================================================
+# CONSTANTS / CONFIG
+# ============================================================
+#
+# A watcher's wait() blocks until something changes and returns the set of
+# touched relative paths, or RESCAN when it can't tell exactly (directory
+# moved/deleted, .gitignore edited, event queue overflow) — then the next
+# index run scans the whole tree, still re-extracting only changed files.
+
+RESCAN = None
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+EVENT_HEADER = struct.Struct("iIII")        # wd, mask, cookie, len
+READ_SIZE = 64 * 1024
+
+
+def is_relevant(rel: str) -> bool:
+    """Cheap path filter applied to every event (gitignore is checked at index time)."""
+    parts = rel.split("/")
+    if any(part in SKIP_DIRS for part in parts[:-1]):
+        return False
+    return parts[-1] not in SKIP_FILES and is_text_file(Path(parts[-1]))
+
+
+# ============================================================
+# inotify (Linux, via ctypes)
+# ============================================================
+
+class InotifyWatcher:
+    """One watch per directory (inotify is not recursive), added as dirs appear."""
+
+    def __init__(self, root: Path):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify not available")
+
+        self.root = root
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: Dict[int, str] = {}          # wd → relative dir ("" = root)
+        self.inherited: Dict[int, Tuple[GitIgnoreRule, ...]] = {}  # wd → .gitignore rules from above
+        self.rules: Dict[int, Tuple[GitIgnoreRule, ...]] = {}      # wd → inherited + its own .gitignore
+        self.add_tree("")
+
+    def add_tree(self, rel_dir: str, rules: Tuple[GitIgnoreRule, ...] = ()):
+        """Watch rel_dir and every non-skipped directory below it."""
+        pending = [(rel_dir, rules)]
+        while pending:
+            rel, rules = pending.pop()
+            directory = self.root / rel
+            wd = self.libc.inotify_add_watch(self.fd, str(directory).encode(), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                if errno in (2, 20):            # ENOENT / ENOTDIR: gone already
+                    continue
+                raise OSError(errno, f"inotify_add_watch failed for {directory} "
+                                     "(raise fs.inotify.max_user_watches or use --poll)")
+            self.dirs[wd] = rel
+            self.inherited[wd] = rules
+
+            rules = rules + tuple(load_gitignore(directory, rel))
+            self.rules[wd] = rules
+            try:
+                with os.scandir(directory) as it:
+                    for item in it:
+                        child = f"{rel}/{item.name}" if rel else item.name
+                        if item.is_dir(follow_symlinks=False) and item.name not in SKIP_DIRS \
+                                and not is_ignored(rules, child, True):
+                            pending.append((child, rules))
+            except OSError:
+                continue
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        """Touched paths (empty set on timeout) or RESCAN."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        touched: Set[str] = set()
+        rescan = False
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return touched
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", errors="ignore")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                self.inherited.pop(wd, None)
+                self.rules.pop(wd, None)
+                continue
+
+            base = self.dirs.get(wd)
+            if base is None:
+                continue
+            rel = f"{base}/{name}" if base and name else (name or base)
+
+            if mask & IN_ISDIR:
+                rules = self.rules.get(wd, ())
+                if any(part in SKIP_DIRS for part in rel.split("/")) or is_ignored(rules, rel, True):
+                    continue                    # node_modules/, build output, ...
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self.add_tree(rel, rules)   # may already hold files: rescan below
+                    except OSError as e:
+                        typer.echo(f"⚠ Not watching {rel}: {e}")
+                rescan = True
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                rescan = rescan or bool(base)
+            elif name == ".gitignore":
+                self.rules[wd] = self.inherited.get(wd, ()) + tuple(load_gitignore(self.root / base, base))
+                rescan = True
+            elif is_relevant(rel):
+                touched.add(rel)
+
+        return RESCAN if rescan else touched
+
+    def close(self):
+        os.close(self.fd)
+
+
+# ============================================================
+# Polling Fallback
+# ============================================================
+
+class PollingWatcher:
+    """Re-scan + stat every `interval` seconds and diff (size, mtime)."""
+
+    def __init__(self, root: Path, interval: float):
+        self.root = root
+        self.interval = interval
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for rel in scan_project(self.root, CODI_SCAN_WORKERS):
+            try:
+                st = (self.root / rel).stat()
+            except FileNotFoundError:
+                continue
+            snapshot[str(rel)] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            pause = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if pause > 0:
+                time.sleep(pause)
+
+            current = self.take_snapshot()
+            touched = {
+                rel for rel in current.keys() | self.snapshot.keys()
+                if current.get(rel) != self.snapshot.get(rel)
+            }
+            self.snapshot = current
+            if touched or (deadline is not None and time.monotonic() >= deadline):
+                return touched
+
+    def close(self):
+        pass
+
+
+def open_watcher(root: Path, poll: bool = False):
+    """inotify where available, else polling."""
+    if not poll:
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            typer.echo(f"⚠ inotify unavailable ({e}); polling every {CODI_WATCH_POLL}s")
+    return PollingWatcher(root, CODI_WATCH_POLL)
+
+
+# ============================================================
+# Debounced Watch Loop
+# ============================================================
+
+def collect_burst(watcher, first: Optional[Set[str]], debounce: float, max_delay: float) -> Optional[Set[str]]:
+    """
+    Coalesce events until `debounce` seconds pass without one (or
+    `max_delay` since the first), so a `git checkout` is one re-index.
+    """
+    touched = first
+    deadline = time.monotonic() + max_delay
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return touched
+
+        more = watcher.wait(min(debounce, remaining))
+        if more is RESCAN:
+            touched = RESCAN
+        elif not more:
+            return touched
+        elif touched is not RESCAN:
+            touched |= more
+
+
+def watch_project(index, poll: bool = False, debounce: float = CODI_WATCH_DEBOUNCE,
+                  max_delay: float = CODI_WATCH_MAX_DELAY):
+    """
+    Run `index(touched)` once to catch up, then after every burst of changes.
+    touched is a set of relative paths, or None for a full incremental scan.
+    Blocks in select() between bursts, so an idle project costs no CPU
+    (the polling fallback wakes every CODI_WATCH_POLL seconds).
+    """
+    root = Path(".").resolve()
+    watcher = open_watcher(root, poll)
+    kind = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+
+    try:
+        index(None)
+        typer.echo(f"\n👀 Watching {root} ({kind}) — Ctrl+C to stop")
+
+        while True:
+            first = watcher.wait(None)
+            if first is not RESCAN and not first:
+                continue
+
+            touched = collect_burst(watcher, first, debounce, max_delay)
+            label = "full rescan" if touched is RESCAN else f"{len(touched)} file(s)"
+            typer.echo(f"\n🔁 Changes detected: {label}")
+
+            start = time.perf_counter()
+            try:
+                index(touched)
+            except Exception as e:
+                typer.echo(f"❌ Re-index failed: {e}")
+                continue
+            typer.echo(f"⏱  Re-indexed in {time.perf_counter() - start:.2f}s")
+    finally:
+        watcher.close()